@@ -0,0 +1,13 @@
+import logging
+
+logger = logging.getLogger("accounts.audit")
+
+
+def record(actor, action, **details):
+    """Una entrada de auditoría por acción de administración, aunque afecte a N usuarios."""
+    logger.info(
+        "actor=%s action=%s %s",
+        getattr(actor, "pk", None),
+        action,
+        " ".join(f"{key}={value}" for key, value in details.items()),
+    )
@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+
+def set_user_claims(token, user):
+    """Claims que permiten autenticar sin consultar ``accounts_user``."""
+    token["role"] = user.role
+    token["email"] = user.email
+    token["company_id"] = user.codigo_empresa_id
+    return token
+
+
+class ClaimsUser(TokenUser):
+    """
+    Usuario construido a partir de los claims del access token.
+
+    ``id``, ``role``, ``email`` y ``codigo_empresa_id`` salen del token; el
+    resto de atributos (``first_name``, ``codigo_empresa``...) cargan la fila
+    de ``User`` la primera vez que se piden, una sola vez por petición.
+    """
+
+    @cached_property
+    def db_user(self):
+        return get_user_model()._default_manager.get(pk=self.pk)
+
+    def _claim(self, name):
+        if name in self.token:
+            return self.token[name]
+        # Token emitido antes de añadir el claim
+        return getattr(self.db_user, name)
+
+    @cached_property
+    def role(self):
+        return self._claim("role")
+
+    @cached_property
+    def email(self):
+        return self._claim("email")
+
+    @cached_property
+    def codigo_empresa_id(self):
+        if "company_id" in self.token:
+            return self.token["company_id"]
+        return self.db_user.codigo_empresa_id
+
+    def __str__(self):
+        return self.email or super().__str__()
+
+    def __eq__(self, other):
+        if isinstance(other, get_user_model()):
+            return self.pk == other.pk
+        return super().__eq__(other)
+
+    __hash__ = TokenUser.__hash__
+
+    def __getattr__(self, attr):
+        if attr.startswith("_") or attr == "token":
+            raise AttributeError(attr)
+        if attr in self.token:
+            return self.token[attr]
+        return getattr(self.db_user, attr)
+
+    # Las operaciones que escriben trabajan sobre la fila real
+    def check_password(self, raw_password):
+        return self.db_user.check_password(raw_password)
+
+    def set_password(self, raw_password):
+        self.db_user.set_password(raw_password)
+
+    def save(self, *args, **kwargs):
+        self.db_user.save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self.db_user.delete(*args, **kwargs)
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Autenticación JWT sin SELECT por petición: ``request.user`` es un
+    ClaimsUser. Los claims se renuevan en cada ``token/refresh/``, así que un
+    cambio de rol o una desactivación tarda como mucho ACCESS_TOKEN_LIFETIME
+    en aplicarse.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
+
+
+def get_db_user(user):
+    """Devuelve la instancia de ``User`` detrás de ``request.user``."""
+    return user.db_user if isinstance(user, ClaimsUser) else user
@@ -0,0 +1,71 @@
+"""
+Hashers de Django con el coste configurable por ``PASSWORD_HASH_COST``
+(solo para el hasher preferido, ``PASSWORD_HASHER``):
+
+- pbkdf2_sha256: iteraciones
+- scrypt: work_factor (potencia de 2)
+- argon2: time_cost
+- bcrypt_sha256: rounds (log2)
+
+Con el coste cambiado, cada contraseña se recodifica en su siguiente login
+correcto (``must_update``); las demás siguen verificándose con los
+parámetros guardados en su hash.
+"""
+
+import base64
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def _cost(hasher, default):
+    if settings.PASSWORD_HASH_COST and settings.PASSWORD_HASHER == hasher.algorithm:
+        return settings.PASSWORD_HASH_COST
+    return default
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return _cost(self, hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return _cost(self, hashers.ScryptPasswordHasher.work_factor)
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        # Igual que el de Django, pero con maxmem calculado a partir de los
+        # parámetros de este hash: verify() pasa los guardados, que pueden
+        # ser mayores que el coste configurado. scrypt usa ~128 * n * r
+        # bytes y el límite por defecto de OpenSSL (32 MiB) no admite
+        # work_factor por encima de 2**14.
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=n,
+            r=r,
+            p=p,
+            maxmem=256 * n * r * p,
+            dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode("ascii").strip()
+        return "%s$%d$%s$%d$%d$%s" % (self.algorithm, n, salt, r, p, hash_)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return _cost(self, hashers.Argon2PasswordHasher.time_cost)
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        return _cost(self, hashers.BCryptSHA256PasswordHasher.rounds)
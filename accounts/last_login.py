@@ -0,0 +1,96 @@
+"""
+Escritura de ``last_login`` al iniciar sesión por JWT (``LAST_LOGIN_UPDATE``):
+
+- ``off``: no se escribe (como hasta ahora: ``UPDATE_LAST_LOGIN`` de
+  simplejwt nunca estuvo activo).
+- ``sync``: un UPDATE de una sola columna por login.
+- ``batch``: las fechas se acumulan en memoria y se escriben juntas, con un
+  único UPDATE, cada ``LAST_LOGIN_BATCH_SIZE`` logins o, como mucho,
+  ``LAST_LOGIN_BATCH_SECONDS`` segundos después de la primera pendiente
+  (un temporizador las escribe aunque no llegue otro login). Si el proceso
+  muere se pierden las pendientes: es un dato informativo.
+
+Con ``LAST_LOGIN_MIN_INTERVAL`` no se reescribe una fecha guardada hace
+menos de esos segundos.
+"""
+
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+_pending = {}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+_timer = None
+
+
+def record(user):
+    global _timer
+    mode = settings.LAST_LOGIN_UPDATE
+    if mode == "off":
+        return
+
+    now = timezone.now()
+    interval = settings.LAST_LOGIN_MIN_INTERVAL
+    if interval and user.last_login and (now - user.last_login).total_seconds() < interval:
+        return
+    user.last_login = now
+
+    if mode == "batch":
+        with _lock:
+            _pending[user.pk] = now
+            due = (
+                len(_pending) >= settings.LAST_LOGIN_BATCH_SIZE
+                or time.monotonic() - _last_flush >= settings.LAST_LOGIN_BATCH_SECONDS
+            )
+            if not due and _timer is None:
+                _timer = threading.Timer(settings.LAST_LOGIN_BATCH_SECONDS, _flush_on_timer)
+                _timer.daemon = True
+                _timer.start()
+        if due:
+            flush()
+    else:
+        get_user_model()._default_manager.filter(pk=user.pk).update(last_login=now)
+
+
+def flush():
+    """Escribe las fechas pendientes con un único UPDATE (CASE id WHEN ...)."""
+    global _last_flush, _timer
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    if pending:
+        User = get_user_model()
+        User._default_manager.bulk_update(
+            [User(pk=pk, last_login=value) for pk, value in pending.items()],
+            ["last_login"],
+        )
+    return len(pending)
+
+
+def _flush_on_timer():
+    try:
+        flush()
+    except DatabaseError:
+        pass
+    finally:
+        # El hilo del temporizador abre su propia conexión
+        connections.close_all()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        flush()
+    except DatabaseError:
+        # Al apagar el worker la BD puede no estar disponible
+        pass
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_add_codigo_empresa_to_user'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('companies', '0005_company_single_primary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-date_joined', '-id'], name='user_joined_id_idx'),
+        ),
+    ]
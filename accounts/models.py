@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from companies.models import Company
+from companies import services as company_services
 
 class UserManager(BaseUserManager):
     use_in_migrations = True
@@ -19,10 +20,10 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault("is_superuser", False)
         # Asignar empresa primary por defecto si no se especifica
         if "codigo_empresa" not in extra_fields:
-            try:
-                primary_company = Company.objects.get(is_primary=True)
+            primary_company = company_services.primary_company()
+            if primary_company:
                 extra_fields["codigo_empresa"] = primary_company
-            except Company.DoesNotExist:
+            else:
                 # Si no existe empresa primary, crear una o usar la primera disponible
                 company = Company.objects.first()
                 if company:
@@ -60,5 +61,12 @@ class User(AbstractUser):
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        swappable = "AUTH_USER_MODEL"
+        indexes = [
+            # Paginación por cursor del listado de administración
+            models.Index(fields=["-date_joined", "-id"], name="user_joined_id_idx"),
+        ]
+
     def __str__(self):
         return self.email
@@ -0,0 +1,7 @@
+from config.pagination import KeysetCursorPagination
+
+
+class UserCursorPagination(KeysetCursorPagination):
+    """Cursor sobre ``(-date_joined, -id)``: User no tiene ``created_at``."""
+
+    ordering = ("-date_joined", "-id")
@@ -0,0 +1,125 @@
+"""
+Logins por segundo y núcleo del endpoint ``token/``.
+
+1. ``hashers``: verificación de una contraseña con cada hasher y coste
+   (``PASSWORD_HASHER`` / ``PASSWORD_HASH_COST``). Es el límite superior de
+   logins/s por núcleo con esa configuración.
+2. ``endpoint``: el login completo (consulta, hash, tokens JWT y
+   ``last_login``) con el hasher configurado, por cada ``LAST_LOGIN_UPDATE``,
+   con las consultas por login. Usa un usuario temporal y deshace los cambios.
+
+    python manage.py runscript bench_login --script-args logins=20 hashers=pbkdf2_sha256,scrypt
+"""
+
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    BCryptSHA256PasswordHasher as DjangoBCrypt,
+    PBKDF2PasswordHasher as DjangoPBKDF2,
+    ScryptPasswordHasher as DjangoScrypt,
+)
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+
+from accounts import hashers, last_login
+from accounts.views import EmailTokenObtainPairView
+
+PASSWORD = "contraseña-de-prueba"
+
+# Coste por defecto de Django, la mitad y el doble (argon2: time_cost)
+COSTS = {
+    "pbkdf2_sha256": (
+        hashers.PBKDF2PasswordHasher,
+        [DjangoPBKDF2.iterations // 2, DjangoPBKDF2.iterations, DjangoPBKDF2.iterations * 2],
+    ),
+    "scrypt": (
+        hashers.ScryptPasswordHasher,
+        [DjangoScrypt.work_factor // 2, DjangoScrypt.work_factor, DjangoScrypt.work_factor * 2],
+    ),
+    "argon2": (hashers.Argon2PasswordHasher, [1, 2, 4]),
+    "bcrypt_sha256": (
+        hashers.BCryptSHA256PasswordHasher,
+        [DjangoBCrypt.rounds - 1, DjangoBCrypt.rounds, DjangoBCrypt.rounds + 1],
+    ),
+}
+
+
+def timed(count, func):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count
+
+
+def bench_hashers(names, logins):
+    results = {}
+    for name in names:
+        hasher_class, costs = COSTS[name]
+        hasher = hasher_class()
+        if hasher.library:
+            try:
+                hasher._load_library()
+            except ValueError as exc:
+                results[name] = {"unavailable": str(exc)}
+                continue
+        results[name] = {}
+        for cost in costs:
+            with override_settings(PASSWORD_HASHER=name, PASSWORD_HASH_COST=cost):
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+                seconds = timed(logins, lambda: hasher.verify(PASSWORD, encoded))
+            results[name][str(cost)] = {
+                "ms_per_login": round(seconds * 1000, 2),
+                "logins_per_s_per_core": round(1 / seconds, 1),
+            }
+    return results
+
+
+def bench_endpoint(logins):
+    User = get_user_model()
+    view = EmailTokenObtainPairView.as_view()
+    factory = APIRequestFactory()
+    results = {}
+    with transaction.atomic():
+        user = User.objects.create_user(email="bench-login@example.com", password=PASSWORD)
+
+        def login():
+            request = factory.post(
+                "/api/auth/token/", {"email": user.email, "password": PASSWORD}, format="json"
+            )
+            response = view(request)
+            assert response.status_code == 200, response.data
+
+        for mode in ("off", "sync", "batch"):
+            with override_settings(LAST_LOGIN_UPDATE=mode):
+                login()
+                with CaptureQueriesContext(connection) as queries:
+                    seconds = timed(logins, login)
+                    last_login.flush()
+            results[mode] = {
+                "ms_per_login": round(seconds * 1000, 2),
+                "logins_per_s_per_core": round(1 / seconds, 1),
+                "queries_per_login": round(len(queries) / logins, 2),
+            }
+        transaction.set_rollback(True)
+    return results
+
+
+def run(*args):
+    options = {"logins": "20", "hashers": ",".join(COSTS)}
+    options.update(arg.split("=", 1) for arg in args)
+    logins = int(options["logins"])
+
+    result = {
+        "logins": logins,
+        "configured": {
+            "hasher": settings.PASSWORD_HASHER,
+            "cost": settings.PASSWORD_HASH_COST,
+        },
+        "hashers": bench_hashers(options["hashers"].split(","), logins),
+        "endpoint": bench_endpoint(logins),
+    }
+    print(json.dumps(result, indent=2))
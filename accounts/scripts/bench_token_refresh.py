@@ -0,0 +1,133 @@
+"""
+Latencia de ``token/refresh/`` con una lista negra de tokens históricos.
+
+Carga ``tokens`` tokens en ``token_blacklist`` (todos en la lista negra, la
+fracción ``expired`` ya caducados), mide refresh consecutivos con rotación
+con la vista de simplejwt (consulta previa + get_or_create) y con la del
+proyecto (accounts/tokens.py), poda con ``prune_tokens`` y vuelve a medir.
+Al terminar borra los tokens cargados y el usuario temporal (``keep=1`` los
+conserva). En PostgreSQL la carga usa generate_series; en otras BD,
+bulk_create.
+
+    python manage.py runscript bench_token_refresh --script-args tokens=10000000 refreshes=200
+"""
+
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.views import TokenRefreshView
+
+from accounts.management.commands.prune_tokens import prune_expired
+from accounts.tokens import RefreshToken
+from accounts.views import ClaimsTokenRefreshView
+
+PREFIX = "bench-"
+BATCH_SIZE = 10000
+
+
+def seed_postgresql(count, expired):
+    outstanding = connection.ops.quote_name(OutstandingToken._meta.db_table)
+    blacklisted = connection.ops.quote_name(BlacklistedToken._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {outstanding} (jti, token, created_at, expires_at)
+            SELECT %s || i, '', now() - interval '1 day',
+                   CASE WHEN i <= %s THEN now() - interval '1 hour' ELSE now() + interval '1 hour' END
+            FROM generate_series(1, %s) AS i
+            """,
+            [PREFIX, expired, count],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {blacklisted} (token_id, blacklisted_at)
+            SELECT id, now() FROM {outstanding} WHERE jti LIKE %s
+            """,
+            [PREFIX + "%"],
+        )
+        cursor.execute(f"ANALYZE {outstanding}")
+        cursor.execute(f"ANALYZE {blacklisted}")
+
+
+def seed_orm(count, expired):
+    now = timezone.now()
+    for start in range(1, count + 1, BATCH_SIZE):
+        tokens = OutstandingToken.objects.bulk_create(
+            OutstandingToken(
+                jti=f"{PREFIX}{i}",
+                token="",
+                created_at=now - timedelta(days=1),
+                expires_at=now + timedelta(hours=-1 if i <= expired else 1),
+            )
+            for i in range(start, min(start + BATCH_SIZE, count + 1))
+        )
+        if tokens[0].pk is None:
+            tokens = OutstandingToken.objects.filter(jti__in=[t.jti for t in tokens])
+        BlacklistedToken.objects.bulk_create(BlacklistedToken(token=token) for token in tokens)
+
+
+def measure(view, user, refreshes):
+    factory = APIRequestFactory()
+    refresh = str(RefreshToken.for_user(user))
+    timings = []
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(refreshes):
+            request = factory.post("/api/auth/token/refresh/", {"refresh": refresh}, format="json")
+            start = time.perf_counter()
+            response = view(request)
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.data
+            refresh = response.data["refresh"]
+    timings.sort()
+    return {
+        "mean_ms": round(statistics.mean(timings) * 1000, 3),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95)] * 1000, 3),
+        "queries_per_refresh": round(len(queries) / refreshes, 2),
+    }
+
+
+def run(*args):
+    options = {"tokens": "10000000", "refreshes": "200", "expired": "0.5", "keep": "0"}
+    options.update(arg.split("=", 1) for arg in args)
+    count = int(options["tokens"])
+    refreshes = int(options["refreshes"])
+    expired = int(count * float(options["expired"]))
+
+    User = get_user_model()
+    user = User.objects.create_user(email="bench-refresh@example.com", password=None)
+    views = {
+        "simplejwt": TokenRefreshView.as_view(),
+        "claims": ClaimsTokenRefreshView.as_view(),
+    }
+    try:
+        start = time.perf_counter()
+        if connection.vendor == "postgresql":
+            seed_postgresql(count, expired)
+        else:
+            seed_orm(count, expired)
+        result = {
+            "tokens": count,
+            "expired": expired,
+            "seed_s": round(time.perf_counter() - start, 2),
+            "before_prune": {name: measure(view, user, refreshes) for name, view in views.items()},
+        }
+
+        start = time.perf_counter()
+        result["pruned"] = prune_expired(5000)
+        result["prune_s"] = round(time.perf_counter() - start, 2)
+        result["after_prune"] = {name: measure(view, user, refreshes) for name, view in views.items()}
+    finally:
+        if options["keep"] != "1":
+            OutstandingToken.objects.filter(jti__startswith=PREFIX).delete()
+            OutstandingToken.objects.filter(user=user).delete()
+            user.delete()
+    print(json.dumps(result, indent=2))
@@ -3,6 +3,7 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from companies.models import Company
+from companies import services as company_services
 
 User = get_user_model()
 
@@ -15,6 +16,18 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "email", "role", "is_active", "is_staff", "is_superuser", "first_name", "last_name", "date_joined", "codigo_empresa", "codigo_empresa_nombre"]
         read_only_fields = ["id", "is_staff", "is_superuser", "date_joined", "codigo_empresa_nombre"]
 
+class BulkUserUpdateSerializer(serializers.Serializer):
+    """Cuerpo de las acciones masivas: ``ids`` (opcional si se filtra por query string)."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False
+    )
+
+class BulkSetRoleSerializer(BulkUserUpdateSerializer):
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES)
+
+class BulkSetActiveSerializer(BulkUserUpdateSerializer):
+    is_active = serializers.BooleanField()
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, trim_whitespace=False)
     password2 = serializers.CharField(write_only=True, trim_whitespace=False)
@@ -37,10 +50,10 @@ class RegisterSerializer(serializers.ModelSerializer):
         validated_data.pop("password2", None)
         # Asignar empresa primary por defecto si no se especifica
         if "codigo_empresa" not in validated_data:
-            try:
-                primary_company = Company.objects.get(is_primary=True)
+            primary_company = company_services.primary_company()
+            if primary_company:
                 validated_data["codigo_empresa"] = primary_company
-            except Company.DoesNotExist:
+            else:
                 # Si no existe empresa primary, usar la primera disponible o crear una
                 company = Company.objects.first()
                 if not company:
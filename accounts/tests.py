@@ -1,3 +1,256 @@
-from django.test import TestCase
+import time
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from companies.models import Company
+
+from . import last_login
+from .authentication import set_user_claims
+from .hashers import ScryptPasswordHasher
+from .models import User
+from .views import EmailTokenObtainPairSerializer
+
+
+class UserAdminListTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Empresa A")
+        self.admin = User.objects.create_user(
+            email="admin@example.com", password="x", role="admin", codigo_empresa=self.company
+        )
+        self.client.force_authenticate(self.admin)
+
+    def create_users(self, count, **extra):
+        # Cada usuario en su propia empresa: sin JOIN sería una consulta por fila
+        for _ in range(count):
+            n = User.objects.count()
+            company = Company.objects.create(name=f"Empresa {n}")
+            User.objects.create_user(
+                email=f"user{n}@example.com",
+                password="x",
+                codigo_empresa=company,
+                **extra,
+            )
+
+    def list_users(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("users-list"), params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_does_not_grow_with_users(self):
+        self.create_users(2)
+        response, baseline = self.list_users()
+        self.assertEqual(len(response.data["results"]), 3)
+
+        self.create_users(20)
+        response, queries = self.list_users()
+        self.assertEqual(len(response.data["results"]), 23)
+        self.assertEqual(queries, baseline)
+        expected = dict(User.objects.values_list("email", "codigo_empresa__name"))
+        for user in response.data["results"]:
+            self.assertEqual(user["codigo_empresa_nombre"], expected[user["email"]])
+
+    def test_filters(self):
+        self.create_users(2)
+        self.create_users(1, role="admin", is_active=False)
+
+        response, _ = self.list_users(role="admin")
+        self.assertEqual(len(response.data["results"]), 2)
+        response, _ = self.list_users(is_active="false")
+        self.assertEqual(len(response.data["results"]), 1)
+        response, _ = self.list_users(company=self.company.id)
+        self.assertEqual([u["email"] for u in response.data["results"]], ["admin@example.com"])
+        self.assertEqual(self.client.get(reverse("users-list"), {"role": "root"}).status_code, 400)
+
+
+class UserBulkActionTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Empresa A")
+        self.admin = User.objects.create_user(
+            email="admin@example.com", password="x", role="admin", codigo_empresa=self.company
+        )
+        self.client.force_authenticate(self.admin)
+        self.users = [
+            User.objects.create_user(email=f"user{i}@example.com", password="x", role=role)
+            for i, role in enumerate(["user", "user", "admin"])
+        ]
+
+    def bulk(self, action, body, **params):
+        url = reverse(f"users-{action}")
+        if params:
+            url += "?" + "&".join(f"{k}={v}" for k, v in params.items())
+        return self.client.post(url, body, format="json")
+
+    def test_by_ids(self):
+        ids = [self.users[0].pk, self.users[1].pk]
+        with self.assertNumQueries(1):
+            response = self.bulk("bulk-set-role", {"ids": ids, "role": "admin"})
+        self.assertEqual(response.data, {"updated": 2})
+        self.assertEqual(User.objects.filter(pk__in=ids, role="admin").count(), 2)
+
+    def test_by_filter_skips_caller(self):
+        response = self.bulk("bulk-set-active", {"is_active": False}, role="admin")
+        self.assertEqual(response.data, {"updated": 1})
+        self.assertFalse(User.objects.get(pk=self.users[2].pk).is_active)
+        self.assertTrue(User.objects.get(pk=self.admin.pk).is_active)
+
+        response = self.bulk("bulk-set-role", {"ids": [self.admin.pk], "role": "user"})
+        self.assertEqual(response.data, {"updated": 0})
+        self.assertEqual(User.objects.get(pk=self.admin.pk).role, "admin")
+
+    def test_empty_selector(self):
+        for params in ({}, {"role": ""}, {"role": "", "is_active": "", "company": ""}):
+            with self.subTest(params):
+                response = self.bulk("bulk-set-active", {"is_active": False}, **params)
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(User.objects.filter(is_active=False).count(), 0)
+        self.assertEqual(self.bulk("bulk-set-role", {"role": "user"}, role="root").status_code, 400)
+
+    def test_audit_entry(self):
+        with self.assertLogs("accounts.audit", "INFO") as logs:
+            self.bulk("bulk-set-active", {"is_active": False}, role="user")
+        self.assertEqual(len(logs.records), 1)
+        message = logs.records[0].getMessage()
+        self.assertIn(f"actor={self.admin.pk} action=bulk_set_active updated=2", message)
+        self.assertIn("ids=* filters={'role': 'user'} is_active=False", message)
+
+
+class LoginTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="login@example.com", password="secreta")
+
+    def login(self, password):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("token_obtain_pair"), {"email": self.user.email, "password": password}
+            )
+        return response, len(queries)
+
+    def test_single_query(self):
+        response, queries = self.login("secreta")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.data)
+        # SELECT del usuario + INSERT del refresh token en token_blacklist
+        self.assertEqual(queries, 2)
+
+    def test_wrong_password(self):
+        response, queries = self.login("otra")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["code"], "invalid_password")
+        self.assertEqual(queries, 1)
+
+    def test_refresh_token_is_single_use(self):
+        refresh = self.login("secreta")[0].data["refresh"]
+        url = reverse("token_refresh")
+
+        response = self.client.post(url, {"refresh": refresh})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["refresh"], refresh)
+
+        cache.clear()  # sin la caché el reuso lo detecta la BD
+        response = self.client.post(url, {"refresh": refresh})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.post(url, {"refresh": refresh}).status_code, 401)
+
+
+class ClaimsAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Empresa A")
+        self.user = User.objects.create_user(
+            email="u@example.com", password="x", role="admin", codigo_empresa=self.company
+        )
+
+    def get(self, name, token):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name), headers={"Authorization": f"Bearer {token}"})
+        user_queries = [q["sql"] for q in queries if '"accounts_user"' in q["sql"]]
+        return response, user_queries
+
+    def claims_token(self, **claims):
+        token = set_user_claims(AccessToken.for_user(self.user), self.user)
+        token.payload.update(claims)
+        return token
+
+    def refresh(self):
+        token = EmailTokenObtainPairSerializer.get_token(self.user)
+        self.assertEqual(token["role"], "admin")
+        return self.client.post(reverse("token_refresh"), {"refresh": str(token)})
+
+    def test_no_user_select(self):
+        response, user_queries = self.get("clients-list", self.claims_token())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_queries, [])
+
+    def test_is_admin_uses_claims(self):
+        # La BD dice admin, el token no: manda el token hasta el refresco
+        response, user_queries = self.get("users-list", self.claims_token(role="user"))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(user_queries, [])
+
+        User.objects.filter(pk=self.user.pk).update(role="user")
+        response, _ = self.get("users-list", self.claims_token(role="admin"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_token_without_claims(self):
+        # Tokens emitidos antes de los claims: se lee la fila una vez
+        response, user_queries = self.get("users-list", AccessToken.for_user(self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(user_queries)
+
+        User.objects.filter(pk=self.user.pk).update(role="user")
+        response, _ = self.get("users-list", AccessToken.for_user(self.user))
+        self.assertEqual(response.status_code, 403)
+
+    def test_refresh_rejects_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.refresh()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["code"], "user_inactive")
+
+    def test_refresh_updates_claims(self):
+        other = Company.objects.create(name="Empresa B")
+        User.objects.filter(pk=self.user.pk).update(role="user", codigo_empresa=other)
+
+        # self.user conserva los datos viejos: el refresh lleva los claims de antes
+        response = self.refresh()
+        self.assertEqual(response.status_code, 200)
+        access = AccessToken(response.data["access"])
+        self.assertEqual((access["role"], access["company_id"]), ("user", other.pk))
+
+
+class ScryptHasherTests(APITestCase):
+    def test_verifies_hash_with_higher_cost_than_configured(self):
+        with override_settings(PASSWORD_HASHER="scrypt", PASSWORD_HASH_COST=2**15):
+            encoded = ScryptPasswordHasher().encode("secreta", "salsalsal")
+        with override_settings(PASSWORD_HASHER="scrypt", PASSWORD_HASH_COST=2**10):
+            hasher = ScryptPasswordHasher()
+            self.assertTrue(hasher.verify("secreta", encoded))
+            self.assertFalse(hasher.verify("otra", encoded))
+            self.assertTrue(hasher.must_update(encoded))
+
+
+@override_settings(LAST_LOGIN_UPDATE="batch", LAST_LOGIN_BATCH_SIZE=100, LAST_LOGIN_BATCH_SECONDS=2)
+class LastLoginBatchTests(APITransactionTestCase):
+    def test_timer_flushes_idle_batch(self):
+        user = User.objects.create_user(email="login@example.com", password="secreta")
+        last_login.flush()  # el plazo empieza ahora
+        response = self.client.post(
+            reverse("token_obtain_pair"), {"email": user.email, "password": "secreta"}
+        )
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertIsNone(user.last_login)
+
+        # Sin más logins, el temporizador escribe la fecha pendiente
+        deadline = time.monotonic() + 5
+        while user.last_login is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+            user.refresh_from_db()
+        self.assertIsNotNone(user.last_login)
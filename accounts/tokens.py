@@ -0,0 +1,82 @@
+"""
+Refresh tokens con lista negra (``token_blacklist``) sin consulta previa en
+``token/refresh/``.
+
+Con ``ROTATE_REFRESH_TOKENS`` + ``BLACKLIST_AFTER_ROTATION`` cada refresh
+termina metiendo su token en la lista negra. En lugar de consultar antes si
+ya está (un JOIN sobre tablas que crecen sin parar) y después insertarlo,
+``RotatingRefreshToken.blacklist`` hace la inserción directamente: la
+restricción UNIQUE de ``BlacklistedToken.token`` detecta el reuso, incluso
+con dos refresh simultáneos del mismo token.
+
+Los jti que ya están en la lista negra se guardan además en la caché
+``default`` hasta que caducan, de modo que los reintentos con un token ya
+usado se rechazan sin ir a la BD. Solo se cachea el "sí": una entrada que
+falta (otro worker, desalojo) se resuelve en la BD, nunca como válida.
+"""
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+
+def _cache_key(jti):
+    return f"jwt:blacklisted:{jti}"
+
+
+class RefreshToken(tokens.RefreshToken):
+    def _remember_blacklisted(self):
+        remaining = self["exp"] - int(timezone.now().timestamp())
+        if remaining > 0:
+            cache.set(_cache_key(self[api_settings.JTI_CLAIM]), True, remaining)
+
+    def _blacklisted_in_cache(self):
+        return cache.get(_cache_key(self[api_settings.JTI_CLAIM])) is not None
+
+    def check_blacklist(self):
+        if self._blacklisted_in_cache():
+            raise TokenError("Token is blacklisted")
+        super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        self._remember_blacklisted()
+        return result
+
+
+class RotatingRefreshToken(RefreshToken):
+    """
+    Token de ``token/refresh/`` con rotación: la comprobación en BD la hace
+    ``blacklist()``, que falla si el token ya estaba en la lista negra.
+    """
+
+    def check_blacklist(self):
+        if not (api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION):
+            return super().check_blacklist()
+        if self._blacklisted_in_cache():
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        # Los tokens emitidos al rotar no están en OutstandingToken (solo los
+        # del login): se inserta directamente y solo se busca si ya existía
+        jti = self[api_settings.JTI_CLAIM]
+        try:
+            with transaction.atomic():
+                outstanding = OutstandingToken.objects.create(
+                    jti=jti, token=str(self), expires_at=datetime_from_epoch(self["exp"])
+                )
+        except IntegrityError:
+            outstanding = OutstandingToken.objects.get(jti=jti)
+        try:
+            with transaction.atomic():
+                blacklisted = BlacklistedToken.objects.create(token=outstanding)
+        except IntegrityError:
+            self._remember_blacklisted()
+            raise TokenError("Token is blacklisted")
+        self._remember_blacklisted()
+        return blacklisted
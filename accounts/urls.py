@@ -1,8 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
+from rest_framework_simplejwt.views import TokenVerifyView
 
-from .views import EmailTokenObtainPairView, RegisterViewSet, MeViewSet, UserAdminViewSet
+from .views import (
+    ClaimsTokenRefreshView,
+    EmailTokenObtainPairView,
+    MeViewSet,
+    RegisterViewSet,
+    UserAdminViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"register", RegisterViewSet, basename="register")
@@ -11,7 +17,7 @@ router.register(r"users", UserAdminViewSet, basename="users")
 
 urlpatterns = [
     path("token/", EmailTokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("token/refresh/", ClaimsTokenRefreshView.as_view(), name="token_refresh"),
     path("token/verify/", TokenVerifyView.as_view(), name="token_verify"),
     path("", include(router.urls)),
 ]
@@ -1,44 +1,51 @@
 from django.contrib.auth import get_user_model
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
-from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 
+from . import audit, last_login
 from .serializers import (
+    BulkSetActiveSerializer,
+    BulkSetRoleSerializer,
     UserSerializer,
     RegisterSerializer,
     ProfileUpdateSerializer,
     PasswordChangeSerializer,
 )
+from .pagination import UserCursorPagination
 from .permissions import IsAdmin, IsSelfOrAdmin
+from .authentication import get_db_user, set_user_claims
+from .tokens import RefreshToken, RotatingRefreshToken
 
 User = get_user_model()
 
 # Auth por email (JWT)
 class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        token["role"] = user.role
-        token["email"] = user.email
-        return token
+        return set_user_claims(token, user)
 
     # forzar email como campo de login
     username_field = User.EMAIL_FIELD if hasattr(User, "EMAIL_FIELD") else "email"
 
     def validate(self, attrs):
-        from django.contrib.auth import authenticate
+        from django.contrib.auth.signals import user_login_failed
         from rest_framework_simplejwt import exceptions
-        from rest_framework_simplejwt.settings import api_settings
-        
+
         email = attrs.get(self.username_field)
         password = attrs.get("password")
 
-        # Verificar primero si el usuario existe
+        # Una sola consulta: la misma fila sirve para comprobar la contraseña
+        # y para los claims del token (authenticate() la volvía a leer)
         try:
-            user_exists = User.objects.get(email=email)
+            user = User.objects.get(email=email)
         except User.DoesNotExist:
             raise exceptions.AuthenticationFailed(
                 "No existe un usuario con este email",
@@ -46,49 +53,81 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
             )
 
         # Si el usuario existe pero está inactivo
-        if not user_exists.is_active:
+        if not user.is_active:
             raise exceptions.AuthenticationFailed(
                 "Esta cuenta está desactivada",
                 "user_inactive",
             )
 
-        # Intentar autenticar
-        authenticate_kwargs = {
-            self.username_field: email,
-            "password": password,
-        }
-        try:
-            authenticate_kwargs["request"] = self.context["request"]
-        except KeyError:
-            pass
-
-        authenticated_user = authenticate(**authenticate_kwargs)
-
-        if not authenticated_user:
+        # Un único cálculo del hash; si el hasher o su coste han cambiado,
+        # check_password recodifica la contraseña
+        if not user.check_password(password):
+            user_login_failed.send(
+                sender=__name__,
+                credentials={self.username_field: email},
+                request=self.context.get("request"),
+            )
             raise exceptions.AuthenticationFailed(
                 "Contraseña incorrecta",
                 "invalid_password",
             )
 
         # Establecer el usuario y generar los tokens (igual que hace TokenObtainPairSerializer)
-        self.user = authenticated_user
-        
+        self.user = user
+
         refresh = self.get_token(self.user)
-        
+
         data = {
             "refresh": str(refresh),
             "access": str(refresh.access_token),
         }
-        
-        if api_settings.UPDATE_LAST_LOGIN:
-            from django.contrib.auth.models import update_last_login
-            update_last_login(None, self.user)
-        
+
+        last_login.record(self.user)
+
         return data
 
 class EmailTokenObtainPairView(TokenObtainPairView):
     serializer_class = EmailTokenObtainPairSerializer
 
+# Refresco que actualiza los claims del usuario (rol, email, empresa) y
+# rechaza cuentas desactivadas: es la única consulta a accounts_user que
+# hace la autenticación por claims, una vez por ACCESS_TOKEN_LIFETIME.
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RotatingRefreshToken
+
+    def validate(self, attrs):
+        from rest_framework_simplejwt import exceptions
+        from rest_framework_simplejwt.settings import api_settings
+
+        refresh = self.token_class(attrs["refresh"])
+        user = (
+            User.objects.filter(pk=refresh[api_settings.USER_ID_CLAIM], is_active=True)
+            .only("id", "email", "role", "codigo_empresa_id")
+            .first()
+        )
+        if user is None:
+            raise exceptions.AuthenticationFailed(
+                "Esta cuenta está desactivada",
+                "user_inactive",
+            )
+        set_user_claims(refresh, user)
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                # Falla si el token ya se había usado (ver accounts/tokens.py)
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+
+        return data
+
+class ClaimsTokenRefreshView(TokenRefreshView):
+    serializer_class = ClaimsTokenRefreshSerializer
+
 # Registro público
 class RegisterViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
     queryset = User.objects.all()
@@ -101,37 +140,70 @@ class MeViewSet(viewsets.ViewSet):
 
     def list(self, request):
         # /accounts/me/  -> GET
-        serializer = UserSerializer(request.user)
+        serializer = UserSerializer(get_db_user(request.user))
         return Response(serializer.data)
 
     def partial_update(self, request, pk=None):
         # /accounts/me/  -> PATCH
-        serializer = ProfileUpdateSerializer(request.user, data=request.data, partial=True)
+        user = get_db_user(request.user)
+        serializer = ProfileUpdateSerializer(user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(UserSerializer(request.user).data)
+        return Response(UserSerializer(user).data)
 
     def update(self, request, pk=None):
         # /accounts/me/  -> PUT
-        serializer = ProfileUpdateSerializer(request.user, data=request.data)
+        user = get_db_user(request.user)
+        serializer = ProfileUpdateSerializer(user, data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(UserSerializer(request.user).data)
+        return Response(UserSerializer(user).data)
 
     @action(detail=False, methods=["post"], url_path="change-password")
     def change_password(self, request):
         s = PasswordChangeSerializer(data=request.data, context={"request": request})
         s.is_valid(raise_exception=True)
-        user = request.user
+        user = get_db_user(request.user)
         user.set_password(s.validated_data["new_password"])
         user.save()
         return Response({"detail": "Contraseña cambiada."}, status=status.HTTP_200_OK)
 
 # Administración completa de usuarios (incluye DELETE, activar/desactivar, cambiar rol)
 class UserAdminViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all().order_by("-date_joined")
+    # codigo_empresa_nombre sale del JOIN, no de una consulta por usuario
+    queryset = User.objects.select_related("codigo_empresa").order_by("-date_joined", "-id")
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
+    pagination_class = UserCursorPagination
+
+    def get_queryset(self):
+        # Filtros: ?role=admin|user, ?is_active=true|false, ?company=<id>
+        return super().get_queryset().filter(**self.get_list_filters())
+
+    def get_list_filters(self):
+        """Filtros del listado con valor (los vacíos se ignoran), ya validados."""
+        params = self.request.query_params
+        filters = {}
+
+        role = params.get("role")
+        if role:
+            if role not in dict(User.ROLE_CHOICES):
+                raise ValidationError({"role": "Valor inválido."})
+            filters["role"] = role
+
+        is_active = params.get("is_active")
+        if is_active:
+            if is_active.lower() not in ["true", "false"]:
+                raise ValidationError({"is_active": "Usa true/false."})
+            filters["is_active"] = is_active.lower() == "true"
+
+        company = params.get("company")
+        if company:
+            if not company.isdigit():
+                raise ValidationError({"company": "Debe ser un id numérico."})
+            filters["codigo_empresa_id"] = int(company)
+
+        return filters
 
     @action(detail=True, methods=["post"], url_path="set-role")
     def set_role(self, request, pk=None):
@@ -140,7 +212,8 @@ class UserAdminViewSet(viewsets.ModelViewSet):
         if role not in ["admin", "user"]:
             return Response({"role": "Valor inválido."}, status=status.HTTP_400_BAD_REQUEST)
         user.role = role
-        user.save()
+        user.save(update_fields=["role"])
+        audit.record(request.user, "set_role", ids=[user.pk], role=role)
         return Response(UserSerializer(user).data)
 
     @action(detail=True, methods=["post"], url_path="set-active")
@@ -150,5 +223,49 @@ class UserAdminViewSet(viewsets.ModelViewSet):
         if str(value).lower() not in ["true", "false"]:
             return Response({"is_active": "Usa true/false."}, status=status.HTTP_400_BAD_REQUEST)
         user.is_active = str(value).lower() == "true"
-        user.save()
+        user.save(update_fields=["is_active"])
+        audit.record(request.user, "set_active", ids=[user.pk], is_active=user.is_active)
         return Response(UserSerializer(user).data)
+
+    # Acciones masivas: los usuarios salen de "ids" en el cuerpo y/o de los
+    # mismos filtros del listado (?role=, ?is_active=, ?company=), y se
+    # actualizan con un único UPDATE ... WHERE id IN (...). Quien las lanza
+    # nunca se desactiva ni se quita el rol de admin a sí mismo.
+    @action(detail=False, methods=["post"], url_path="bulk-set-role")
+    def bulk_set_role(self, request):
+        return self._bulk_update(request, BulkSetRoleSerializer, "role", "bulk_set_role")
+
+    @action(detail=False, methods=["post"], url_path="bulk-set-active")
+    def bulk_set_active(self, request):
+        return self._bulk_update(request, BulkSetActiveSerializer, "is_active", "bulk_set_active")
+
+    def _bulk_update(self, request, serializer_class, field, audit_action):
+        s = serializer_class(data=request.data)
+        s.is_valid(raise_exception=True)
+        ids = s.validated_data.get("ids")
+        # Solo cuentan los filtros que get_queryset aplica: "?role=" vacío
+        # no selecciona nada y no puede convertirse en "todos los usuarios"
+        filters = self.get_list_filters()
+        if ids is None and not filters:
+            return Response(
+                {"detail": "Indica 'ids' o algún filtro (role, is_active, company)."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.get_queryset()
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+        value = s.validated_data[field]
+        if (field, value) in (("is_active", False), ("role", "user")):
+            queryset = queryset.exclude(pk=request.user.pk)
+        updated = queryset.update(**{field: value})
+
+        audit.record(
+            request.user,
+            audit_action,
+            updated=updated,
+            ids=ids if ids is not None else "*",
+            filters=filters,
+            **{field: value},
+        )
+        return Response({"updated": updated}, status=status.HTTP_200_OK)
@@ -4,9 +4,12 @@ from django.db.models.signals import post_migrate
 
 def create_initial_article(sender, **kwargs):
     """Crea un registro inicial si la tabla está vacía"""
+    from companies.services import default_company
     from .models import Article
     if Article.objects.count() == 0:
-        Article.objects.create(name="Mi Artículo")
+        company = default_company()
+        if company:
+            Article.objects.create(name="Mi Artículo", company=company)
 
 
 class ArticlesConfig(AppConfig):
@@ -14,4 +17,6 @@ class ArticlesConfig(AppConfig):
     name = 'articles'
 
     def ready(self):
+        from config import response_cache
+        response_cache.track(self.get_model("Article"))
         post_migrate.connect(create_initial_article, sender=self)
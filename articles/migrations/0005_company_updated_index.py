@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:48
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY no puede ir dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('articles', '0004_company'),
+        ('companies', '0005_company_single_primary'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='article',
+            index=models.Index(fields=['company', 'updated_at'], name='article_company_updated_idx'),
+        ),
+    ]
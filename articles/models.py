@@ -1,12 +1,31 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
+from companies.models import Company
 
 class Article(models.Model):
+    # Sin índice propio: lo cubre "article_company_created_idx"
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.PROTECT,
+        related_name="articles",
+        verbose_name="Empresa",
+        db_index=False,
+    )
     name = models.CharField(max_length=150)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="article_created_id_idx"),
+            models.Index(fields=["company", "-created_at", "-id"], name="article_company_created_idx"),
+            # MAX(updated_at) + COUNT(*) de la ETag del listado, sin leer la tabla
+            models.Index(fields=["company", "updated_at"], name="article_company_updated_idx"),
+            GinIndex(fields=["name"], name="article_name_trgm", opclasses=["gin_trgm_ops"]),
+            GinIndex(SearchVector("name", config="spanish"), name="article_fts"),
+        ]
         verbose_name = "Article"
         verbose_name_plural = "Articles"
 
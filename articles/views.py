@@ -1,8 +1,31 @@
 from rest_framework import viewsets, permissions
+from config.filters import TrigramSearchFilter
+from config.mixins import (
+    BulkMixin,
+    CompanyScopedMixin,
+    ConditionalGetMixin,
+    ExportMixin,
+    FastListMixin,
+    ReplicaReadMixin,
+    ResponseCacheMixin,
+    SparseFieldsMixin,
+)
 from .models import Article
 from .serializers import ArticleSerializer
 
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(
+    ReplicaReadMixin,
+    CompanyScopedMixin,
+    SparseFieldsMixin,
+    ResponseCacheMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    BulkMixin,
+    ExportMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [TrigramSearchFilter]
+    search_fields = ["name"]
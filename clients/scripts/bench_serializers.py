@@ -0,0 +1,97 @@
+"""
+Filas por segundo de la serialización de listados de clientes: ruta normal
+(ModelSerializer + JSONRenderer) frente a la rápida (``values_list`` +
+FastRowSerializer + FastJSONRenderer). No toca la base de datos: las
+instancias y las tuplas se construyen en memoria con los mismos valores.
+
+    python manage.py runscript bench_serializers --script-args rows=5000 repeat=5
+"""
+
+import json
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from clients.models import Client
+from clients.serializers import ClientSerializer
+from config import renderers
+from config.renderers import FastJSONRenderer
+from config.serializers import FastRowSerializer
+
+
+def build_rows(count):
+    now = timezone.now()
+    instances = [
+        Client(
+            id=i,
+            company_id=1,
+            name=f"Cliente {i}",
+            email=f"cliente{i}@ejemplo.es",
+            phone=f"+34 600 {i:06d}",
+            notes="Notas del cliente con acentos: camión, añil" if i % 3 else None,
+            created_at=now - timedelta(minutes=i),
+            updated_at=now - timedelta(seconds=i),
+        )
+        for i in range(1, count + 1)
+    ]
+    fast = FastRowSerializer.from_serializer(ClientSerializer())
+    Row = namedtuple("Row", fast.sources)
+    tuples = [Row(*(getattr(obj, f"{s}_id" if s == "company" else s) for s in fast.sources)) for obj in instances]
+    return instances, tuples, fast
+
+
+def best_of(repeat, func):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(*args):
+    options = {"rows": "5000", "repeat": "5"}
+    options.update(arg.split("=", 1) for arg in args)
+    count = int(options["rows"])
+    repeat = int(options["repeat"])
+
+    instances, tuples, fast = build_rows(count)
+    json_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+
+    def drf_path():
+        return json_renderer.render(ClientSerializer(instances, many=True).data)
+
+    def fast_path():
+        return fast_renderer.render(fast.to_representation(tuples))
+
+    assert drf_path() == fast_path(), "la ruta rápida no produce el mismo JSON"
+
+    timings = {
+        "model_serializer": best_of(repeat, lambda: ClientSerializer(instances, many=True).data),
+        "model_serializer+json": best_of(repeat, drf_path),
+        "fast_rows": best_of(repeat, lambda: fast.to_representation(tuples)),
+        "fast_rows+orjson": best_of(repeat, fast_path),
+    }
+    orjson, renderers.orjson = renderers.orjson, None
+    try:
+        timings["fast_rows+json_fallback"] = best_of(repeat, fast_path)
+    finally:
+        renderers.orjson = orjson
+
+    baseline = timings["model_serializer+json"]
+    result = {
+        "rows": count,
+        "orjson": orjson is not None,
+        "results": {
+            name: {
+                "seconds": round(seconds, 4),
+                "rows_per_s": round(count / seconds),
+                "speedup": round(baseline / seconds, 2),
+            }
+            for name, seconds in timings.items()
+        },
+    }
+    print(json.dumps(result, indent=2))
@@ -1,3 +1,596 @@
-from django.test import TestCase
+import base64
+import copy
+import csv
+import json
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+from urllib.parse import urlencode
 
-# Create your tests here.
+import fakeredis
+import psycopg
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections, transaction
+from django.db.models import Count, Max
+from django.core.cache import cache
+from django.test import AsyncClient, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.test import APIRequestFactory, APITestCase, APITransactionTestCase
+
+from accounts.authentication import set_user_claims
+from accounts.models import User
+from companies.models import Company
+from config import db_router, response_cache
+from config.postgresql_pool import base as pool_backend
+from config.renderers import FastJSONRenderer
+from config.serializers import FastRowSerializer
+
+from .models import Client
+from .serializers import ClientSerializer
+from .views import ClientViewSet
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Empresa A")
+        self.client.force_authenticate(
+            User.objects.create_user(email="u@example.com", password="x", codigo_empresa=self.company)
+        )
+        now = timezone.now()
+        for i in range(7):
+            client = Client.objects.create(company=self.company, name=f"Cliente {i}")
+            # Grupos de tres con el mismo created_at: el desempate es el id
+            Client.objects.filter(pk=client.pk).update(created_at=now - timedelta(minutes=i // 3))
+        self.expected = list(Client.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    def get_page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data["results"]], response.data
+
+    def test_forward_and_backward_pages(self):
+        pages, url = [], reverse("clients-list") + "?page_size=2"
+        while url:
+            ids, data = self.get_page(url)
+            pages.append(ids)
+            url = data["next"]
+        self.assertEqual([pk for page in pages for pk in page], self.expected)
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+
+        back, url = [ids], data["previous"]
+        while url:
+            ids, data = self.get_page(url)
+            back.append(ids)
+            url = data["previous"]
+        self.assertEqual(back, pages[::-1])
+
+    def test_invalid_cursor(self):
+        url = reverse("clients-list")
+        self.assertEqual(self.client.get(url, {"cursor": "no-es-un-cursor"}).status_code, 404)
+        # Cursor bien codificado con una posición que no es "fecha|id"
+        cursor = base64.b64encode(urlencode({"p": "ayer|uno"}).encode()).decode()
+        self.assertEqual(self.client.get(url, {"cursor": cursor}).status_code, 404)
+
+
+class BulkUpsertTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Empresa A")
+        self.client.force_authenticate(
+            User.objects.create_user(email="u@example.com", password="x", codigo_empresa=self.company)
+        )
+        self.existing = Client.objects.create(
+            company=self.company, name="Existente", email="a@example.com", notes="Notas"
+        )
+        self.url = reverse("clients-bulk")
+
+    def test_create(self):
+        response = self.client.post(
+            self.url, [{"name": "Nuevo 1"}, {"name": "Nuevo 2", "phone": "600"}], format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["updated"]), (2, 0))
+        new = Client.objects.get(name="Nuevo 2")
+        self.assertEqual((new.company_id, new.phone), (self.company.id, "600"))
+
+    def test_update_keeps_fields_not_sent(self):
+        before = self.existing.updated_at
+        response = self.client.post(
+            self.url, [{"id": self.existing.id, "phone": "611"}], format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], 1)
+        self.existing.refresh_from_db()
+        self.assertEqual(
+            (self.existing.name, self.existing.email, self.existing.notes, self.existing.phone),
+            ("Existente", "a@example.com", "Notas", "611"),
+        )
+        self.assertGreater(self.existing.updated_at, before)
+
+    def test_mixed_batch(self):
+        other = Client.objects.create(company=self.company, name="Otro", email="b@example.com")
+        response = self.client.post(
+            self.url,
+            [
+                {"name": "Nuevo"},
+                {"id": self.existing.id, "name": "Renombrado"},
+                {"id": other.id, "notes": "Con notas"},
+                {"email": "sin-nombre@example.com"},  # falta name en una inserción
+                {"id": 999999, "name": "No existe"},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["updated"]), (1, 2))
+        self.assertEqual([e["index"] for e in response.data["errors"]], [3, 4])
+        self.existing.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.existing.name, self.existing.email), ("Renombrado", "a@example.com"))
+        self.assertEqual((other.name, other.email, other.notes), ("Otro", "b@example.com", "Con notas"))
+        self.assertTrue(Client.objects.filter(name="Nuevo").exists())
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Empresa A")
+        self.client.force_authenticate(
+            User.objects.create_user(email="u@example.com", password="x", codigo_empresa=self.company)
+        )
+        for name in ("Talleres ACME", "acme_norte", "Ferretería 100%"):
+            Client.objects.create(company=self.company, name=name)
+
+    def search(self, term):
+        response = self.client.get(reverse("clients-list"), {"search": term})
+        self.assertEqual(response.status_code, 200)
+        return sorted(row["name"] for row in response.data["results"])
+
+    def test_contains_is_case_insensitive_and_escapes_wildcards(self):
+        self.assertEqual(self.search("Acme"), ["Talleres ACME", "acme_norte"])
+        self.assertEqual(self.search("e_n"), ["acme_norte"])
+        self.assertEqual(self.search("100%"), ["Ferretería 100%"])
+
+    @skipUnless(connection.vendor == "postgresql", "índices pg_trgm")
+    def test_contains_uses_trigram_index(self):
+        request = Request(APIRequestFactory().get("/", {"search": "acme"}))
+        queryset = ClientViewSet.filter_backends[0]().filter_queryset(
+            request, Client.objects.all(), ClientViewSet()
+        )
+        with connection.cursor() as cursor:
+            # Con pocas filas el planificador prefiere recorrer la tabla o el
+            # índice por fecha; sin ellos, o usa los GIN o vuelve al Seq Scan
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_indexscan = off")
+        plan = queryset.explain()
+        self.assertIn("client_name_trgm", plan)
+        self.assertNotIn("Seq Scan", plan)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Empresa A")
+        self.client.force_authenticate(
+            User.objects.create_user(email="u@example.com", password="x", codigo_empresa=self.company)
+        )
+        self.obj = Client.objects.create(company=self.company, name="Uno")
+        Client.objects.create(company=self.company, name="Dos")
+
+    def assert_not_modified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.content)
+
+    def test_list(self):
+        url = reverse("clients-list")
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(1):  # solo el agregado
+            self.assert_not_modified(url, etag)
+
+        self.obj.name = "Uno bis"
+        self.obj.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response["ETag"]
+        Client.objects.filter(name="Dos").delete()  # no cambia MAX(updated_at)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail(self):
+        url = reverse("clients-detail", args=[self.obj.pk])
+        response = self.client.get(url)
+        self.assertIn("Last-Modified", response)
+        self.assert_not_modified(url, response["ETag"])
+
+        self.obj.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    @skipUnless(connection.vendor == "postgresql", "plan de PostgreSQL")
+    def test_list_etag_uses_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        # Misma consulta que el aggregate() del listado, pero con explain()
+        plan = (
+            Client.objects.filter(company=self.company)
+            .values("company")
+            .annotate(last=Max("updated_at"), total=Count("pk"))
+            .explain()
+        )
+        self.assertIn("using client_company_updated_idx", plan)
+
+
+# Redis en memoria con el mismo backend de Django que en producción
+FAKE_REDIS_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "api": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://fake:6379/0",
+        "OPTIONS": {"connection_class": fakeredis.FakeConnection},
+    },
+}
+
+
+@override_settings(API_RESPONSE_CACHE=True, CACHES=FAKE_REDIS_CACHES)
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        response_cache.get_cache().clear()
+        response_cache.clear_stats()
+        self.company = Company.objects.create(name="Empresa A")
+        self.user = User.objects.create_user(email="u@example.com", password="x", codigo_empresa=self.company)
+        self.client.force_authenticate(self.user)
+        self.obj = Client.objects.create(company=self.company, name="Uno")
+        self.url = reverse("clients-list")
+
+    def names(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [row["name"] for row in response.data["results"]]
+
+    def test_hit_skips_database(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(self.names(second), self.names(first))
+        self.assertEqual(second["ETag"], first["ETag"])
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        stats = response_cache.stats()
+        self.assertEqual((stats["backend"], stats["models"]["clients.client"]["hits"]), ("RedisCache", 2))
+
+    def test_version_bumps_on_commit(self):
+        before = response_cache.version(Client)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Client.objects.create(company=self.company, name="Dos")
+            # Hasta el commit se siguen sirviendo las entradas anteriores
+            self.assertEqual(response_cache.version(Client), before)
+        self.assertGreater(response_cache.version(Client), before)
+        self.assertEqual(self.names(self.client.get(self.url)), ["Dos", "Uno"])
+
+    def test_bulk_upsert_bumps_version(self):
+        before = response_cache.version(Client)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("clients-bulk"), [{"id": self.obj.id, "name": "Uno bis"}], format="json")
+        self.assertGreater(response_cache.version(Client), before)
+
+    def test_tenant_keys_are_isolated(self):
+        other_company = Company.objects.create(name="Empresa B")
+        Client.objects.create(company=other_company, name="Ajeno")
+        self.assertEqual(self.names(self.client.get(self.url)), ["Uno"])
+
+        self.client.force_authenticate(
+            User.objects.create_user(email="b@example.com", password="x", codigo_empresa=other_company)
+        )
+        self.assertEqual(self.names(self.client.get(self.url)), ["Ajeno"])
+        self.assertEqual(response_cache.stats()["misses"], 2)
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Empresa A")
+        self.client.force_authenticate(
+            User.objects.create_user(email="u@example.com", password="x", codigo_empresa=self.company)
+        )
+        self.obj = Client.objects.create(company=self.company, name="Uno", email="a@example.com")
+
+    def test_detail_reads_only_requested_columns(self):
+        url = reverse("clients-detail", args=[self.obj.pk])
+        # Una sola consulta: la ETag no carga updated_at aparte
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"fields": "name"})
+        self.assertEqual(response.data, {"name": "Uno"})
+        self.assertIn("ETag", response)
+
+    def test_list(self):
+        with self.assertNumQueries(2):  # ETag del listado + página
+            response = self.client.get(reverse("clients-list"), {"fields": "id,email"})
+        self.assertEqual(response.data["results"], [{"id": self.obj.id, "email": "a@example.com"}])
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse("clients-list"), {"fields": "name,nope"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Empresa A")
+        self.user = User.objects.create_user(email="u@example.com", password="x", codigo_empresa=self.company)
+        self.client.force_authenticate(self.user)
+        Client.objects.create(company=self.company, name="Ñandú, S.L.", email="a@example.com")
+        Client.objects.create(company=self.company, name="Dos")
+        Client.objects.create(company=Company.objects.create(name="Empresa B"), name="Ajeno")
+        self.url = reverse("clients-export")
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        response, content = self.export()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn('filename="clients.ndjson"', response["Content-Disposition"])
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(sorted(row["name"] for row in rows), ["Dos", "Ñandú, S.L."])
+        self.assertEqual(
+            set(rows[0]),
+            {"id", "company", "name", "email", "phone", "notes", "created_at", "updated_at"},
+        )
+
+    @override_settings(EXPORT_CHUNK_SIZE=1)
+    def test_csv_with_fields(self):
+        response, content = self.export(fmt="csv", fields="name,email")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.reader(content.splitlines()))
+        self.assertEqual(rows[0], ["name", "email"])
+        self.assertEqual(sorted(rows[1:]), [["Dos", ""], ["Ñandú, S.L.", "a@example.com"]])
+
+    def test_invalid_format(self):
+        response = self.client.get(self.url, {"fmt": "xml"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("fmt", response.data)
+
+    async def test_streams_asynchronously_under_asgi(self):
+        # Con un iterador síncrono Django lo cargaría entero en memoria
+        token = set_user_claims(AccessToken.for_user(self.user), self.user)
+        response = await AsyncClient().get(
+            self.url, {"fmt": "csv"}, headers={"Authorization": f"Bearer {token}"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(len(content.splitlines()), 3)
+
+
+class FastListParityTests(APITestCase):
+    """El listado rápido devuelve los mismos bytes que ModelSerializer + JSONRenderer."""
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Empresa A")
+        self.client.force_authenticate(
+            User.objects.create_user(email="u@example.com", password="x", codigo_empresa=self.company)
+        )
+        Client.objects.create(
+            company=self.company, name="Ñandú “Ltd” ✓", email="ñ@example.com",
+            phone="+34 600", notes="línea\u2028otra\u2029fin",
+        )
+        # Sin email, teléfono ni notas: salen como null
+        Client.objects.create(company=self.company, name="Vacío")
+        Client.objects.filter(name="Vacío").update(
+            created_at=datetime(2024, 1, 15, 10, 30, 0, 123456, tzinfo=dt_timezone.utc)
+        )
+
+    def get_both(self, params):
+        url = reverse("clients-list")
+        fast = self.client.get(url, params)
+        with mock.patch.object(ClientViewSet, "fast_list", False), \
+                mock.patch.object(ClientViewSet, "renderer_classes", [JSONRenderer]):
+            slow = self.client.get(url, params)
+        self.assertEqual(fast.status_code, 200)
+        return fast.content, slow.content
+
+    def test_list_bytes(self):
+        for params in ({}, {"fields": "id,notes,created_at"}, {"search": "Ñandú"}):
+            with self.subTest(params):
+                fast, slow = self.get_both(params)
+                self.assertEqual(fast, slow)
+                self.assertIn(b'"results":[{', fast)
+                self.assertIn(b"\\u2028", fast)
+
+    def test_null_fk_and_decimal(self):
+        # Los catálogos no tienen Decimal ni FK opcionales: se comprueba la
+        # conversión de filas y el renderer con esos valores directamente
+        obj = Client(
+            name="Ñandú\u2028", created_at=datetime(2024, 7, 1, 8, 0, 0, 5, tzinfo=dt_timezone.utc)
+        )
+        fast = FastRowSerializer.from_serializer(ClientSerializer())
+        rows = fast.to_representation([[obj.serializable_value(s) for s in fast.sources]])
+        self.assertIsNone(rows[0]["company"])
+        self.assertEqual(
+            FastJSONRenderer().render(rows),
+            JSONRenderer().render(ClientSerializer([obj], many=True).data),
+        )
+
+        price = serializers.DecimalField(max_digits=30, decimal_places=2)
+        data = [{
+            "price": price.to_representation(Decimal("1234.5")),
+            "raw": Decimal("0.10"),
+            "big": Decimal("1E+20"),
+            "company": None,
+            "name": "Ñandú “✓”\u2029",
+        }]
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], DB_REPLICA_STICKY_SECONDS=1)
+class ReplicaRouterTests(APITransactionTestCase):
+    # Dentro de un TestCase todo va a la principal (siempre hay un atomic
+    # abierto), así que las lecturas en réplica necesitan TransactionTestCase
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Réplica simulada: una segunda conexión a la BD de tests, añadida
+        # después de que el runner haya preparado las BD
+        connections.settings["replica"] = copy.deepcopy(connections["default"].settings_dict)
+        cls.addClassCleanup(cls.remove_replica)
+
+    @classmethod
+    def remove_replica(cls):
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name="Empresa A")
+        self.user = User.objects.create_user(email="u@example.com", password="x", codigo_empresa=self.company)
+        self.client.force_authenticate(self.user)
+        Client.objects.create(company=self.company, name="Uno")
+
+    def list_queries(self):
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                response = self.client.get(reverse("clients-list"))
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Uno"])
+        return len(primary), len(replica)
+
+    def test_allow_migrate(self):
+        router = db_router.ReplicaRouter()
+        self.assertTrue(router.allow_migrate("default", "clients"))
+        self.assertFalse(router.allow_migrate("replica", "clients"))
+
+    def test_reads_inside_atomic_use_primary(self):
+        router = db_router.ReplicaRouter()
+        token = db_router.start_replica_reads(self.user.pk)
+        try:
+            self.assertEqual(router.db_for_read(Client), "replica")
+            with transaction.atomic():
+                self.assertIsNone(router.db_for_read(Client))
+            with db_router.primary_reads():
+                self.assertIsNone(router.db_for_read(Client))
+            self.assertEqual(router.db_for_write(Client), "default")
+        finally:
+            db_router.end_replica_reads(token)
+
+    def test_list_reads_from_replica(self):
+        primary, replica = self.list_queries()
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_sticky_window_after_any_write(self):
+        # Escritura fuera de los catálogos: el middleware marca igualmente
+        response = self.client.patch(reverse("me-detail", args=[self.user.pk]), {"first_name": "Ana"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.list_queries()[1], 0)
+
+        time.sleep(1.1)  # DB_REPLICA_STICKY_SECONDS
+        self.assertEqual(self.list_queries()[0], 0)
+
+    def test_reads_do_not_stick(self):
+        self.client.get(reverse("clients-list"))
+        self.assertFalse(db_router.is_sticky(self.user.pk))
+
+
+@skipUnless(connection.vendor == "postgresql", "backend de PostgreSQL")
+class ConnectionPoolTests(SimpleTestCase):
+    """
+    config.postgresql_pool con conexiones propias, haya o no DB_POOL (con
+    DB_POOL=True toda la suite corre además sobre este backend).
+    """
+
+    def pooled(self, alias, name, **settings_dict):
+        settings_dict = {
+            **copy.deepcopy(connection.settings_dict),
+            "ENGINE": "config.postgresql_pool",
+            "NAME": name,
+            "CONN_MAX_AGE": 0,
+            **settings_dict,
+        }
+        settings_dict["OPTIONS"]["pool"] = {"min_size": 1, "max_size": 1}
+        # Registrado en connections: las señales de contrib.postgres lo buscan ahí
+        connections.settings[alias] = settings_dict
+        db = connections[alias]
+        self.addCleanup(self.remove_alias, alias)
+        return db
+
+    def remove_alias(self, alias):
+        connections[alias].close()
+        connections[alias].close_pool()
+        del connections[alias]
+        del connections.settings[alias]
+
+    def backend_pid(self, db):
+        with db.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            return cursor.fetchone()[0]
+
+    def test_connection_returns_to_the_pool(self):
+        db = self.pooled("pool_a", connection.settings_dict["NAME"])
+        pid = self.backend_pid(db)
+        db.set_autocommit(False)
+        self.backend_pid(db)
+        with self.assertLogs("psycopg.pool", "WARNING"):
+            db.close()  # con una transacción abierta: putconn la deshace
+
+        self.assertEqual(self.backend_pid(db), pid)
+        self.assertEqual(db.connection.info.transaction_status, psycopg.pq.TransactionStatus.IDLE)
+        self.assertTrue(db.get_autocommit())
+
+    def test_drop_closes_pools_of_that_database(self):
+        name = f"{connection.settings_dict['NAME']}_pool"
+        with connection._nodb_cursor() as cursor:
+            cursor.execute(f'CREATE DATABASE "{name}"')
+        self.addCleanup(self.drop_if_exists, name)
+
+        # Alias y réplica (TEST MIRROR) con conexiones abiertas en sus pools
+        primary, mirror = self.pooled("pool_a", name), self.pooled("pool_b", name)
+        other = self.pooled("pool_c", connection.settings_dict["NAME"])
+        for db in (primary, mirror, other):
+            self.backend_pid(db)
+            db.close()
+
+        primary.creation._destroy_test_db(name, verbosity=0)
+        self.assertEqual(
+            {key for key in pool_backend._pools if key[0].startswith("pool_")},
+            {("pool_c", connection.settings_dict["NAME"])},
+        )
+
+    def drop_if_exists(self, name):
+        with connection._nodb_cursor() as cursor:
+            cursor.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+
+    def test_requires_conn_max_age_zero(self):
+        db = self.pooled("pool_a", connection.settings_dict["NAME"], CONN_MAX_AGE=60)
+        with self.assertRaises(ImproperlyConfigured):
+            db.pool
+
+
+@override_settings(PERF_METRICS=True, PERF_SERVER_TIMING=True)
+class PerformanceMiddlewareTests(APITestCase):
+    def setUp(self):
+        company = Company.objects.create(name="Empresa A")
+        user = User.objects.create_user(email="u@example.com", password="x", codigo_empresa=company)
+        Client.objects.create(company=company, name="Uno")
+        self.headers = {"Authorization": f"Bearer {set_user_claims(AccessToken.for_user(user), user)}"}
+        self.url = reverse("clients-list")
+
+    def server_timing_queries(self, response):
+        self.assertEqual(response.status_code, 200)
+        return response["Server-Timing"].split('desc="')[1].split(" ")[0]
+
+    def test_counts_queries_under_wsgi(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, headers=self.headers)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(self.server_timing_queries(response), "2")
+
+    async def test_counts_queries_under_asgi(self):
+        # La vista síncrona corre en el hilo de sync_to_async de la petición;
+        # ETag del listado + página, como con WSGI
+        response = await AsyncClient().get(self.url, headers=self.headers)
+        self.assertEqual(self.server_timing_queries(response), "2")
@@ -1,8 +1,32 @@
 from rest_framework import viewsets, permissions
+from config.filters import TrigramSearchFilter
+from config.mixins import (
+    BulkMixin,
+    CompanyScopedMixin,
+    ConditionalGetMixin,
+    ExportMixin,
+    FastListMixin,
+    ReplicaReadMixin,
+    ResponseCacheMixin,
+    SparseFieldsMixin,
+)
 from .models import Client
 from .serializers import ClientSerializer
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(
+    ReplicaReadMixin,
+    CompanyScopedMixin,
+    SparseFieldsMixin,
+    ResponseCacheMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    BulkMixin,
+    ExportMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [TrigramSearchFilter]
+    search_fields = ["name", "email", "phone", "notes"]
+    search_fulltext_fields = ["name", "notes"]
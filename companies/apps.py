@@ -14,4 +14,5 @@ class CompaniesConfig(AppConfig):
     name = 'companies'
 
     def ready(self):
+        from . import signals  # noqa: F401
         post_migrate.connect(create_initial_company, sender=self)
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:36
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY: no bloquea las escrituras en tablas grandes,
+    # pero no puede ir dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('companies', '0003_set_primary_company'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='company',
+            index=models.Index(fields=['-created_at', '-id'], name='company_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated manually
+
+from django.db import migrations, models
+
+
+def keep_single_primary(apps, schema_editor):
+    Company = apps.get_model('companies', 'Company')
+    # Si hay varias principales, se conserva la modificada más recientemente
+    primaries = Company.objects.filter(is_primary=True).order_by('-updated_at', '-id')
+    keep = primaries.values_list('id', flat=True).first()
+    if keep is not None:
+        Company.objects.filter(is_primary=True).exclude(id=keep).update(is_primary=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_single_primary, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='company',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_primary', True)), fields=('is_primary',), name='company_single_primary'),
+        ),
+    ]
@@ -8,6 +8,17 @@ class Company(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="company_created_id_idx"),
+        ]
+        constraints = [
+            # Índice parcial: como mucho una empresa principal, y buscarla es un probe
+            models.UniqueConstraint(
+                fields=["is_primary"],
+                condition=models.Q(is_primary=True),
+                name="company_single_primary",
+            ),
+        ]
         verbose_name = "Company"
         verbose_name_plural = "Companies"
 
@@ -6,3 +6,5 @@ class CompanySerializer(serializers.ModelSerializer):
         model = Company
         fields = "__all__"
         read_only_fields = ["id", "created_at", "updated_at"]
+        # La unicidad de is_primary la resuelve CompanyViewSet desmarcando las demás
+        extra_kwargs = {"is_primary": {"validators": []}}
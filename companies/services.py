@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Company
+
+PRIMARY_COMPANY_CACHE_KEY = "companies:primary"
+_MISSING = object()
+
+
+def primary_company():
+    """
+    Empresa principal (o None), servida desde la caché de Django.
+
+    Se invalida al guardar o borrar cualquier Company (ver signals.py) y en
+    CompanyViewSet cuando se desmarcan las demás con un UPDATE masivo.
+    """
+    company = cache.get(PRIMARY_COMPANY_CACHE_KEY, _MISSING)
+    if company is _MISSING:
+        company = Company.objects.filter(is_primary=True).first()
+        cache.set(PRIMARY_COMPANY_CACHE_KEY, company, settings.PRIMARY_COMPANY_CACHE_TTL)
+    return company
+
+
+def invalidate_primary_company():
+    cache.delete(PRIMARY_COMPANY_CACHE_KEY)
+
+
+def default_company():
+    """Empresa a la que se asignan los registros sin empresa: la principal o la primera."""
+    return primary_company() or Company.objects.order_by("id").first()
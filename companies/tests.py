@@ -1,3 +1,131 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from articles.models import Article
+from clients.models import Client
+from providers.models import Provider
+from warehouses.models import Warehouse
+
+from .models import Company
+from .views import CompanyViewSet
+
+CATALOGS = [
+    ("clients", Client),
+    ("providers", Provider),
+    ("articles", Article),
+    ("warehouses", Warehouse),
+]
+
+
+class TenantIsolationTests(APITestCase):
+    """Un usuario de la empresa A no ve ni modifica los registros de la B."""
+
+    def setUp(self):
+        self.company_a = Company.objects.create(name="Empresa A")
+        self.company_b = Company.objects.create(name="Empresa B")
+        self.client.force_authenticate(
+            User.objects.create_user(email="a@example.com", password="x", codigo_empresa=self.company_a)
+        )
+
+    def test_list_and_retrieve(self):
+        for basename, model in CATALOGS:
+            with self.subTest(basename):
+                own = model.objects.create(company=self.company_a, name="Propio")
+                other = model.objects.create(company=self.company_b, name="Ajeno")
+
+                response = self.client.get(reverse(f"{basename}-list"))
+                self.assertEqual([row["id"] for row in response.data["results"]], [own.id])
+                response = self.client.get(reverse(f"{basename}-detail", args=[other.id]))
+                self.assertEqual(response.status_code, 404)
+
+    def test_update_and_delete(self):
+        for basename, model in CATALOGS:
+            with self.subTest(basename):
+                other = model.objects.create(company=self.company_b, name="Ajeno")
+                url = reverse(f"{basename}-detail", args=[other.id])
+
+                self.assertEqual(self.client.patch(url, {"name": "Cambiado"}).status_code, 404)
+                self.assertEqual(self.client.delete(url).status_code, 404)
+                other.refresh_from_db()
+                self.assertEqual(other.name, "Ajeno")
+
+    def test_create_assigns_own_company(self):
+        for basename, model in CATALOGS:
+            with self.subTest(basename):
+                # Un company en el cuerpo no permite escribir en otra empresa
+                response = self.client.post(
+                    reverse(f"{basename}-list"), {"name": "Nuevo", "company": self.company_b.id}
+                )
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(model.objects.get(pk=response.data["id"]).company_id, self.company_a.id)
+
+    def test_bulk_upsert(self):
+        for basename, model in CATALOGS:
+            with self.subTest(basename):
+                other = model.objects.create(company=self.company_b, name="Ajeno")
+                response = self.client.post(
+                    reverse(f"{basename}-bulk"),
+                    [{"id": other.id, "name": "Cambiado"}, {"name": "Nuevo"}],
+                    format="json",
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual((response.data["created"], response.data["updated"]), (1, 0))
+                self.assertEqual([e["index"] for e in response.data["errors"]], [0])
+                other.refresh_from_db()
+                self.assertEqual(other.name, "Ajeno")
+                self.assertEqual(model.objects.get(name="Nuevo").company_id, self.company_a.id)
+
+
+class PrimaryCompanyTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        # Las migraciones ya crean una principal
+        self.primary = Company.objects.get(is_primary=True)
+        self.primary.name = "Principal"
+        self.primary.save()
+        self.other = Company.objects.create(name="Otra")
+        self.client.force_authenticate(
+            User.objects.create_user(email="admin@example.com", password="x", role="admin")
+        )
+
+    def get_primary(self, **headers):
+        response = self.client.get(reverse("primary-company"), **headers)
+        self.assertEqual(response["Cache-Control"], "public, max-age=60")
+        return response
+
+    def test_etag_and_not_modified(self):
+        response = self.get_primary()
+        self.assertEqual(response.data["name"], "Principal")
+        with self.assertNumQueries(0):  # empresa principal en caché
+            response = self.get_primary(HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+        etag = self.get_primary()["ETag"]
+        self.primary.name = "Principal bis"
+        self.primary.save()
+        self.assertEqual(self.get_primary(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_marking_primary_unmarks_the_rest(self):
+        response = self.client.patch(
+            reverse("companies-detail", args=[self.other.pk]), {"is_primary": True}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(Company.objects.filter(is_primary=True)), [self.other])
+        self.assertEqual(self.get_primary().data["id"], self.other.pk)
+
+        response = self.client.post(reverse("companies-list"), {"name": "Nueva", "is_primary": True})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Company.objects.get(is_primary=True).name, "Nueva")
+
+    def test_concurrent_primary_is_a_conflict(self):
+        # Otra petición marcó su empresa después de que esta desmarcara
+        with mock.patch.object(CompanyViewSet, "_unmark_primaries"):
+            response = self.client.patch(
+                reverse("companies-detail", args=[self.other.pk]), {"is_primary": True}
+            )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(list(Company.objects.filter(is_primary=True)), [self.primary])
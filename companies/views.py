@@ -1,35 +1,78 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from rest_framework import viewsets, permissions
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import APIException
 from accounts.permissions import IsAdmin
+from config.mixins import ConditionalGetMixin, ReplicaReadMixin, SparseFieldsMixin
 from .models import Company
 from .serializers import CompanySerializer
+from . import services
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class PrimaryCompanyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Otra petición ha marcado a la vez otra empresa como principal. Reintenta."
+    default_code = "primary_conflict"
+
+
+class CompanyViewSet(
+    ReplicaReadMixin, SparseFieldsMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
     permission_classes = [IsAdmin]
 
+    # Solo puede haber una principal (índice único parcial): se desmarcan los
+    # demás antes de guardar, en la misma transacción. update() no toca
+    # auto_now: se actualiza updated_at a mano para que cambie su ETag.
+    # Dos peticiones a la vez pueden desmarcar las dos y chocar al guardar
+    # con el índice: la segunda recibe un 409 en lugar de un 500.
     def perform_create(self, serializer):
-        instance = serializer.save()
-        # Si se marca como principal, desmarcar los demás
-        if instance.is_primary:
-            Company.objects.exclude(id=instance.id).update(is_primary=False)
+        self._save_with_single_primary(serializer)
 
     def perform_update(self, serializer):
-        instance = serializer.save()
-        # Si se marca como principal, desmarcar los demás
-        if instance.is_primary:
-            Company.objects.exclude(id=instance.id).update(is_primary=False)
+        self._save_with_single_primary(serializer, exclude_id=serializer.instance.id)
+
+    def _save_with_single_primary(self, serializer, exclude_id=None):
+        try:
+            with transaction.atomic():
+                if serializer.validated_data.get("is_primary"):
+                    self._unmark_primaries(exclude_id)
+                serializer.save()
+        except IntegrityError:
+            raise PrimaryCompanyConflict()
+        finally:
+            services.invalidate_primary_company()
+
+    def _unmark_primaries(self, exclude_id):
+        Company.objects.filter(is_primary=True).exclude(id=exclude_id).update(
+            is_primary=False, updated_at=timezone.now()
+        )
+
+
+def _primary_company_etag(request):
+    try:
+        company = services.primary_company()
+    except Exception:
+        return None
+    if company is None:
+        return '"none"'
+    return f'"{company.id}-{company.updated_at.timestamp()}"'
 
 
+# cache_control por fuera: también el 304 de condition lleva Cache-Control
+@cache_control(public=True, max_age=60)
+@condition(etag_func=_primary_company_etag)
 @api_view(['GET'])
 @permission_classes([])  # Endpoint público, sin autenticación
 def get_primary_company(request):
     """Endpoint público para obtener la empresa principal (sin autenticación)"""
     try:
-        primary_company = Company.objects.filter(is_primary=True).first()
+        primary_company = services.primary_company()
         if primary_company:
             return Response({
                 'id': primary_company.id,
@@ -5,6 +5,20 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Despliegue ASGI (necesario para que las vistas async de ``locations`` no
+bloqueen un worker mientras esperan a Google u OpenAI):
+
+    uvicorn config.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+o con gunicorn gestionando los procesos:
+
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+
+Con ``LOCATIONS_ASYNC_VIEWS=True`` las rutas ``get-city-name/`` y
+``generate-description/`` usan las vistas async; sin él siguen disponibles
+en ``api/locations/async/...``. El resto de la API funciona igual bajo ASGI
+(Django ejecuta las vistas síncronas en un hilo).
 """
 
 import os
@@ -0,0 +1,102 @@
+"""
+Lecturas de los catálogos en réplicas de PostgreSQL (``DATABASE_REPLICAS``).
+
+Solo van a una réplica las consultas de las peticiones que lo piden
+explícitamente (``ReplicaReadMixin``: list/retrieve); todo lo demás, y
+cualquier escritura, usa ``default``. Cada petición elige una réplica al
+azar y la mantiene en todas sus consultas, para que el recuento, la página y
+el ETag salgan de la misma copia. Con la caché de respuestas activa, los
+fallos de caché se leen de la principal (ver ResponseCacheMixin).
+
+Lectura de lo propio: si una petición escribe en la BD (cualquier vista:
+el router anota cada ``db_for_write``), ``StickyPrimaryMiddleware`` deja al
+usuario "pegado" a la principal durante ``DB_REPLICA_STICKY_SECONDS``, que
+debe cubrir el retraso de replicación. La marca se guarda en la caché
+``default``: con varios workers hace falta REDIS_URL para que la vean todos.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_read_alias = ContextVar("replica_read_alias", default=None)
+_writes = ContextVar("db_writes", default=None)
+
+
+def _sticky_key(user_id):
+    return f"db:sticky-primary:{user_id}"
+
+
+def mark_write(user_id):
+    """Manda a la principal las lecturas de ``user_id`` durante un tiempo."""
+    if settings.DATABASE_REPLICAS and settings.DB_REPLICA_STICKY_SECONDS and user_id is not None:
+        cache.set(_sticky_key(user_id), True, settings.DB_REPLICA_STICKY_SECONDS)
+
+
+def is_sticky(user_id):
+    return user_id is not None and cache.get(_sticky_key(user_id)) is not None
+
+
+def start_replica_reads(user_id):
+    """
+    Envía las lecturas de la petición en curso a una réplica. Devuelve el
+    token para ``end_replica_reads`` (None si se queda en la principal).
+    """
+    if not settings.DATABASE_REPLICAS or is_sticky(user_id):
+        return None
+    return _read_alias.set(random.choice(settings.DATABASE_REPLICAS))
+
+
+def end_replica_reads(token):
+    if token is not None:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Lecturas en la principal dentro del bloque, aunque la petición use réplica."""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def track_writes():
+    """
+    Anota si el bloque escribe en la BD: ``state["wrote"]`` pasa a True.
+    Es un dict y no un valor de la ContextVar para que lo vean también las
+    escrituras hechas en hilos (sync_to_async copia el contexto).
+    """
+    state = {"wrote": False}
+    token = _writes.set(state)
+    try:
+        yield state
+    finally:
+        _writes.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Dentro de una transacción se lee de la principal
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        state = _writes.get()
+        if state is not None:
+            state["wrote"] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las réplicas son copias de la principal
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,99 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db.models import CharField, Lookup, Q, TextField
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Greatest
+from rest_framework.filters import SearchFilter
+
+# Debe coincidir con la configuración de los índices GIN "*_fts" de los modelos
+SEARCH_CONFIG = "spanish"
+
+# Modos que devuelven los N más relevantes en lugar de paginar por fecha
+RANKED_SEARCH_MODES = ("similar", "fulltext")
+
+
+def is_ranked_search(request, view=None):
+    if view is not None and not any(
+        issubclass(backend, TrigramSearchFilter) for backend in getattr(view, "filter_backends", ())
+    ):
+        return False
+    return bool(
+        request.query_params.get(SearchFilter.search_param)
+        and request.query_params.get("search_mode") in RANKED_SEARCH_MODES
+    )
+
+
+@CharField.register_lookup
+@TextField.register_lookup
+class ILikeContains(Lookup):
+    """
+    ``columna ILIKE '%término%'`` sobre la columna tal cual. ``icontains``
+    genera ``UPPER(columna::text) LIKE UPPER(...)``, una expresión que los
+    índices GIN ``gin_trgm_ops`` de la columna no pueden usar.
+    """
+
+    lookup_name = "ilike_contains"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        pattern = f"%{connection.ops.prep_for_like_query(rhs_params[0])}%"
+        return f"{lhs} ILIKE {rhs}", [*lhs_params, pattern]
+
+    def as_sqlite(self, compiler, connection):
+        # LIKE ya ignora mayúsculas en SQLite (ASCII)
+        sql, params = self.as_sql(compiler, connection)
+        return sql.replace(" ILIKE ", " LIKE ", 1) + " ESCAPE '\\'", params
+
+
+class TrigramSearchFilter(SearchFilter):
+    """
+    ``?search=`` sobre ``search_fields`` respaldado por índices GIN de pg_trgm.
+
+    ``search_mode``:
+
+    - ``contains`` (por defecto): ILIKE '%término%' sobre la columna (ver
+      ``ILikeContains``) en cualquiera de los campos, con la paginación
+      normal por fecha.
+    - ``similar``: coincidencia aproximada (operador ``%`` de pg_trgm),
+      ordenada por similitud; pensado para typeahead.
+    - ``fulltext``: búsqueda de texto completo sobre ``search_fulltext_fields``
+      (por defecto ``search_fields``), ordenada por SearchRank.
+
+    Los modos ordenados devuelven los primeros ``page_size`` resultados.
+    """
+
+    def construct_search(self, field_name, queryset):
+        lookup = super().construct_search(field_name, queryset)
+        suffix = f"{LOOKUP_SEP}icontains"
+        if lookup.endswith(suffix):
+            lookup = lookup[: -len(suffix)] + f"{LOOKUP_SEP}{ILikeContains.lookup_name}"
+        return lookup
+
+    def filter_queryset(self, request, queryset, view):
+        mode = request.query_params.get("search_mode", "contains")
+        term = request.query_params.get(self.search_param, "").strip()
+        fields = self.get_search_fields(view, request)
+        if not term or not fields or mode not in RANKED_SEARCH_MODES:
+            return super().filter_queryset(request, queryset, view)
+
+        if mode == "similar":
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f"{field}__trigram_similar": term})
+            similarities = [TrigramSimilarity(field, term) for field in fields]
+            similarity = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+            return (
+                queryset.filter(condition)
+                .annotate(search_score=similarity)
+                .order_by("-search_score", "-id")
+            )
+
+        vector_fields = getattr(view, "search_fulltext_fields", None) or fields
+        vector = SearchVector(*vector_fields, config=SEARCH_CONFIG)
+        query = SearchQuery(term, config=SEARCH_CONFIG, search_type="websearch")
+        return (
+            queryset.annotate(search_vector=vector)
+            .filter(search_vector=query)
+            .annotate(search_score=SearchRank(vector, query))
+            .order_by("-search_score", "-id")
+        )
@@ -0,0 +1,227 @@
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+from . import db_router, metrics
+from .serializers import FastRowSerializer
+
+REQUEST_LABELS = ("view", "method")
+
+request_duration = metrics.Histogram(
+    "http_request_duration_seconds", "Tiempo total de la petición.", REQUEST_LABELS
+)
+request_db_duration = metrics.Histogram(
+    "http_request_db_duration_seconds", "Tiempo en consultas a la BD por petición.", REQUEST_LABELS
+)
+request_db_queries = metrics.Histogram(
+    "http_request_db_queries",
+    "Consultas a la BD por petición.",
+    REQUEST_LABELS,
+    buckets=metrics.QUERY_COUNT_BUCKETS,
+)
+request_serialize_duration = metrics.Histogram(
+    "http_request_serialize_duration_seconds",
+    "Tiempo en serializers por petición.",
+    REQUEST_LABELS,
+)
+request_render_duration = metrics.Histogram(
+    "http_request_render_duration_seconds", "Tiempo de render de la respuesta.", REQUEST_LABELS
+)
+response_size = metrics.Histogram(
+    "http_response_size_bytes",
+    "Tamaño del cuerpo de la respuesta (sin streaming).",
+    REQUEST_LABELS,
+    buckets=metrics.SIZE_BUCKETS,
+)
+requests_total = metrics.Counter(
+    "http_requests_total", "Peticiones atendidas.", (*REQUEST_LABELS, "status")
+)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "serialize_time", "view_end")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.view_end = None
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    execute_wrapper fijo de las conexiones: suma la consulta a la petición
+    en curso (``metrics.current_request``), también desde los hilos de
+    sync_to_async, que copian el contexto.
+    """
+    stats = metrics.current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += perf_counter() - start
+        stats.queries += 1
+
+
+def install_query_counter():
+    """Añade ``count_queries`` a las conexiones del hilo actual (una vez)."""
+    for alias in connections:
+        execute_wrappers = connections[alias].execute_wrappers
+        if count_queries not in execute_wrappers:
+            execute_wrappers.append(count_queries)
+
+
+def _timed(func):
+    def timed(self, *args):
+        stats = metrics.current_request.get()
+        if stats is None:
+            return func(self, *args)
+        start = perf_counter()
+        try:
+            return func(self, *args)
+        finally:
+            stats.serialize_time += perf_counter() - start
+
+    timed.timed = True
+    return timed
+
+
+def instrument_serializers():
+    """
+    Suma a la petición en curso el tiempo de ``serializer.data`` y de
+    ``FastRowSerializer.to_representation``. De DRF se parchea solo
+    ``BaseSerializer.data``: Serializer y ListSerializer llegan a él con
+    ``super()`` y los anidados no pasan por ``.data``, así que nada se cuenta
+    dos veces.
+    """
+    if getattr(BaseSerializer.data.fget, "timed", False):
+        return
+    BaseSerializer.data = property(_timed(BaseSerializer.data.fget))
+    FastRowSerializer.to_representation = _timed(FastRowSerializer.to_representation)
+
+
+class PerformanceMiddleware:
+    """
+    Por petición: tiempo total, consultas y tiempo de BD, tiempo de
+    serializers y de render y tamaño de la respuesta. Se envían en la
+    cabecera ``Server-Timing`` (con PERF_SERVER_TIMING) y se acumulan en
+    histogramas por vista (``/api/metrics/``). Solo con PERF_METRICS=True;
+    debe ser el primer middleware para medir también los demás.
+
+    Las consultas se cuentan con ``count_queries`` en las conexiones de cada
+    hilo. Con ASGI la vista y el ORM corren en el hilo de sync_to_async de
+    la petición: ``process_view`` es síncrono, así que Django lo ejecuta en
+    ese mismo hilo e instala allí el contador.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        instrument_serializers()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        install_query_counter()
+        stats = RequestStats()
+        token = metrics.current_request.set(stats)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        return self._finish(request, response, stats, start)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = metrics.current_request.set(stats)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        return self._finish(request, response, stats, start)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        install_query_counter()
+
+    def process_template_response(self, request, response):
+        # Las respuestas de DRF se renderizan después de este punto
+        stats = metrics.current_request.get()
+        if stats is not None:
+            stats.view_end = perf_counter()
+        return response
+
+    def _finish(self, request, response, stats, start):
+        end = perf_counter()
+        total = end - start
+        render = end - stats.view_end if stats.view_end is not None else 0.0
+
+        match = request.resolver_match
+        labels = (match.view_name or match._func_path if match else "<unresolved>", request.method)
+        request_duration.observe(total, *labels)
+        request_db_duration.observe(stats.db_time, *labels)
+        request_db_queries.observe(stats.queries, *labels)
+        request_serialize_duration.observe(stats.serialize_time, *labels)
+        request_render_duration.observe(render, *labels)
+        if not response.streaming:
+            response_size.observe(len(response.content), *labels)
+        requests_total.inc(*labels, response.status_code)
+
+        if settings.PERF_SERVER_TIMING:
+            response["Server-Timing"] = (
+                f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+                f"serialize;dur={stats.serialize_time * 1000:.2f}, "
+                f"render;dur={render * 1000:.2f}, "
+                f"total;dur={total * 1000:.2f}"
+            )
+        return response
+
+
+class StickyPrimaryMiddleware:
+    """
+    Si la petición ha escrito en la BD, las lecturas de su usuario van a la
+    principal durante DB_REPLICA_STICKY_SECONDS (``db_router.mark_write``).
+    Cubre todas las vistas, no solo las que leen de réplicas. El usuario se
+    lee a la salida: DRF lo copia en ``request.user`` al autenticar.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with db_router.track_writes() as writes:
+            response = self.get_response(request)
+        self._finish(request, writes)
+        return response
+
+    async def __acall__(self, request):
+        with db_router.track_writes() as writes:
+            response = await self.get_response(request)
+        self._finish(request, writes)
+        return response
+
+    def _finish(self, request, writes):
+        if writes["wrote"]:
+            db_router.mark_write(getattr(getattr(request, "user", None), "pk", None))
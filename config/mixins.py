@@ -0,0 +1,469 @@
+import csv
+import hashlib
+from collections import defaultdict
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import db_router, response_cache
+from .parsers import NDJSONParser
+from .renderers import CompactJSONRenderer
+from .serializers import BulkListSerializer, FastRowSerializer
+
+
+def _pagination_columns(view):
+    """Columnas que necesita el paginador del ViewSet para calcular el cursor."""
+    ordering = getattr(view.pagination_class, "ordering", ()) or ()
+    if isinstance(ordering, str):
+        ordering = (ordering,)
+    return [field.lstrip("-") for field in ordering]
+
+
+class _Echo:
+    """Pseudo-buffer para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+async def _aiter_sync(iterator):
+    """
+    Recorre un iterador síncrono desde ASGI bloque a bloque. Django consume
+    entero (en memoria) un iterador síncrono antes de enviarlo por ASGI. Cada
+    ``next`` va al hilo de la petición, el del cursor de servidor.
+    """
+    done = object()
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while (chunk := await next_chunk(iterator, done)) is not done:
+        yield chunk
+
+
+class ExportMixin:
+    """
+    Añade ``GET <recurso>/export/?fmt=ndjson|csv`` a un ModelViewSet.
+
+    Las filas se leen con un cursor de servidor (``.iterator(chunk_size=...)``)
+    y se escriben bloque a bloque en un StreamingHttpResponse, así que la
+    memoria no depende del tamaño de la tabla. Con ASGI el contenido se
+    entrega como iterador asíncrono para que tampoco se acumule allí.
+    """
+
+    export_formats = {
+        "ndjson": "application/x-ndjson",
+        "csv": "text/csv; charset=utf-8",
+    }
+
+    @action(detail=False, methods=["get"], url_path="export", pagination_class=None)
+    def export(self, request):
+        fmt = request.query_params.get("fmt", "ndjson")
+        if fmt not in self.export_formats:
+            return Response(
+                {"fmt": f"Formato no soportado. Usa: {', '.join(self.export_formats)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        chunk_size = getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+        rows = (
+            serializer.to_representation(obj)
+            for obj in queryset.iterator(chunk_size=chunk_size)
+        )
+
+        if fmt == "csv":
+            content = self._stream_csv(rows, list(serializer.fields), chunk_size)
+        else:
+            content = self._stream_ndjson(rows, chunk_size)
+        if isinstance(request._request, ASGIRequest):
+            content = _aiter_sync(content)
+
+        response = StreamingHttpResponse(content, content_type=self.export_formats[fmt])
+        response["Content-Disposition"] = f'attachment; filename="{self.basename}.{fmt}"'
+        return response
+
+    @staticmethod
+    def _batches(rows, size):
+        while True:
+            batch = list(islice(rows, size))
+            if not batch:
+                return
+            yield batch
+
+    def _stream_ndjson(self, rows, chunk_size):
+        dumps = JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        for batch in self._batches(rows, chunk_size):
+            yield "".join(dumps(row) + "\n" for row in batch)
+
+    def _stream_csv(self, rows, columns, chunk_size):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for batch in self._batches(rows, chunk_size):
+            yield "".join(writer.writerow([row.get(c) for c in columns]) for row in batch)
+
+
+class BulkMixin:
+    """
+    Añade ``POST <recurso>/bulk/`` a un ModelViewSet.
+
+    Acepta una lista JSON o un cuerpo NDJSON. Las filas se validan con el
+    serializer del ViewSet en modo lista. Las que no traen ``id`` se
+    insertan con ``bulk_create``; las que lo traen actualizan solo los
+    campos enviados (validación parcial, como un PATCH) con ``bulk_update``.
+    Las filas inválidas no detienen la carga; se devuelven en ``errors`` con
+    su índice.
+    """
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        parser_classes=[JSONParser, NDJSONParser],
+    )
+    def bulk(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response(
+                {"detail": "Se esperaba una lista JSON o un cuerpo NDJSON."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_rows = getattr(settings, "BULK_MAX_ROWS", 50000)
+        if len(rows) > max_rows:
+            return Response(
+                {"detail": f"Máximo {max_rows} filas por petición."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = BulkListSerializer(
+            child=self.get_serializer(), data=rows, context=self.get_serializer_context()
+        )
+        serializer.is_valid()
+        errors = dict(serializer.row_errors)
+
+        model = self.get_queryset().model
+        pending = []
+        for index, data in zip(serializer.valid_indexes, serializer.validated_data):
+            try:
+                pk = model._meta.pk.to_python(rows[index].get("id"))
+            except DjangoValidationError:
+                errors[index] = {"id": ["Identificador no válido."]}
+                continue
+            pending.append((index, pk, data))
+
+        # Un "id" solo sirve para actualizar: nunca se insertan claves explícitas.
+        requested_ids = {pk for _, pk, _ in pending if pk is not None}
+        existing_ids = set()
+        if requested_ids:
+            existing_ids = set(
+                self.get_queryset().filter(pk__in=requested_ids).values_list("pk", flat=True)
+            )
+
+        # Inserciones con todos los campos; actualizaciones agrupadas por los
+        # campos que envió cada fila, para no pisar con NULL o el valor por
+        # defecto los que no venían (como un PATCH)
+        inserts, updates = [], defaultdict(list)
+        auto_now = [f.name for f in model._meta.concrete_fields if getattr(f, "auto_now", False)]
+        now = timezone.now()
+        for index, pk, data in pending:
+            if pk is None:
+                inserts.append(model(**data, **self.get_bulk_save_kwargs()))
+            elif pk not in existing_ids:
+                errors[index] = {"id": ["No existe un registro con este id."]}
+            else:
+                obj = model(pk=pk, **data, **{name: now for name in auto_now})
+                updates[tuple(sorted(data))].append(obj)
+
+        created = len(inserts)
+        updated = sum(len(objs) for objs in updates.values())
+        if created or updated:
+            batch_size = self._bulk_batch_size(request)
+            with transaction.atomic():
+                if inserts:
+                    model._default_manager.bulk_create(inserts, batch_size=batch_size)
+                for fields, objs in updates.items():
+                    if fields or auto_now:
+                        model._default_manager.bulk_update(
+                            objs, [*fields, *auto_now], batch_size=batch_size
+                        )
+                # bulk_create/bulk_update no envían post_save
+                response_cache.invalidate(model)
+
+        return Response(
+            {
+                "created": created,
+                "updated": updated,
+                "errors": [
+                    {"index": index, "errors": errors[index]} for index in sorted(errors)
+                ],
+            },
+            status=status.HTTP_400_BAD_REQUEST if errors and not (created or updated) else status.HTTP_200_OK,
+        )
+
+    def get_bulk_save_kwargs(self):
+        """Campos comunes a todas las filas de la carga (como ``serializer.save(**kwargs)``)."""
+        return {}
+
+    def _bulk_batch_size(self, request):
+        default = getattr(settings, "BULK_BATCH_SIZE", 1000)
+        try:
+            value = int(request.query_params.get("batch_size", default))
+        except (TypeError, ValueError):
+            return default
+        return value if 0 < value <= default * 10 else default
+
+
+class CompanyScopedMixin:
+    """
+    Limita un ModelViewSet a los registros de la empresa del usuario
+    (``request.user.codigo_empresa``) y asigna esa empresa al crear.
+
+    El id de empresa sale del token (ver ``accounts.authentication``), así
+    que filtrar no cuesta una consulta extra, y el listado recorre solo el
+    tramo de la empresa en el índice ``(company, -created_at, -id)``.
+    """
+
+    company_field = "company"
+
+    def get_company_id(self):
+        return getattr(self.request.user, "codigo_empresa_id", None)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        company_id = self.get_company_id()
+        if company_id is None:
+            return queryset.none()
+        return queryset.filter(**{f"{self.company_field}_id": company_id})
+
+    def perform_create(self, serializer):
+        serializer.save(**{f"{self.company_field}_id": self.get_company_id()})
+
+    def get_bulk_save_kwargs(self):
+        return {f"{self.company_field}_id": self.get_company_id()}
+
+
+class SparseFieldsMixin:
+    """
+    ``?fields=id,name`` en las peticiones GET: el serializer solo incluye esos
+    campos y el SELECT solo lee esas columnas (``.only()``), más la clave
+    primaria, las columnas que necesita la paginación y el ``etag_field``
+    de ConditionalGetMixin, para que la ETag no cargue un campo diferido.
+
+    Añade también el renderer ``?format=compact`` (ver ``config.renderers``).
+    """
+
+    fields_param = "fields"
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CompactJSONRenderer]
+
+    def get_sparse_fields(self):
+        """Campos pedidos en ``?fields=`` (None si no se restringe)."""
+        if hasattr(self, "_sparse_fields"):
+            return self._sparse_fields
+
+        self._sparse_fields = None
+        raw = self.request.query_params.get(self.fields_param)
+        if self.request.method == "GET" and raw:
+            requested = [name.strip() for name in raw.split(",") if name.strip()]
+            available = self.get_serializer_class()(context=self.get_serializer_context()).fields
+            unknown = [name for name in requested if name not in available]
+            if unknown:
+                raise ValidationError({
+                    self.fields_param: [
+                        f"Campos no válidos: {', '.join(unknown)}. "
+                        f"Disponibles: {', '.join(available)}."
+                    ]
+                })
+            self._sparse_fields = {name: available[name].source for name in requested}
+        return self._sparse_fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_sparse_fields()
+        if not fields:
+            return queryset
+
+        opts = queryset.model._meta
+        columns = {opts.pk.name, *_pagination_columns(self)}
+        etag_field = getattr(self, "etag_field", None)
+        if etag_field:
+            columns.add(etag_field)
+        for source in fields.values():
+            try:
+                concrete = opts.get_field(source).concrete
+            except FieldDoesNotExist:
+                concrete = False
+            if not concrete:
+                # Campo calculado o de otra tabla: se lee la fila completa
+                return queryset
+            columns.add(source)
+        return queryset.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields:
+            target = getattr(serializer, "child", serializer)
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
+
+
+class FastListMixin:
+    """
+    ``list`` sin instancias de modelo: las filas salen de ``values_list()``
+    y se convierten con un FastRowSerializer construido a partir del
+    serializer del ViewSet (ya recortado por ``?fields=``). El JSON es el
+    mismo que el de la ruta normal, a la que se vuelve si algún campo no
+    admite este camino.
+    """
+
+    fast_list = True
+
+    def list(self, request, *args, **kwargs):
+        fast = FastRowSerializer.from_serializer(self.get_serializer()) if self.fast_list else None
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+
+        extra = [c for c in _pagination_columns(self) if c not in fast.sources]
+        rows = self.filter_queryset(self.get_queryset()).values_list(
+            *fast.sources, *extra, named=True
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast.to_representation(page))
+        return Response(fast.to_representation(rows))
+
+
+class ResponseCacheMixin:
+    """
+    Cachea las respuestas 200 de ``list`` y ``retrieve`` (ver
+    ``config.response_cache``) cuando ``API_RESPONSE_CACHE`` está activo.
+
+    La clave incluye host, ruta con parámetros, formato, empresa del usuario
+    y versión del modelo. Un acierto no consulta la base de datos y responde
+    304 si ``If-None-Match`` coincide con la ETag guardada. Los permisos de
+    vista se siguen comprobando; no hay permisos por objeto que saltarse.
+    """
+
+    cached_headers = ("ETag", "Last-Modified")
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        if not response_cache.enabled():
+            return handler(request, *args, **kwargs)
+
+        model = self.queryset.model
+        tenant = getattr(request.user, "codigo_empresa_id", None)
+        key = response_cache.response_key(model, request, tenant)
+        entry = response_cache.lookup(model, key)
+        if entry is None:
+            # Lo que se guarda sale de la principal: una réplica con retraso
+            # dejaría datos viejos bajo la versión nueva hasta el TTL
+            with db_router.primary_reads():
+                response = handler(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK and isinstance(response, Response):
+                headers = {h: response[h] for h in self.cached_headers if h in response}
+                response_cache.store(key, (response.data, headers))
+            return response
+
+        data, headers = entry
+        if "ETag" in headers:
+            not_modified = get_conditional_response(request, etag=headers["ETag"])
+            if not_modified is not None:
+                return not_modified
+        return Response(data, headers=headers)
+
+
+class ConditionalGetMixin:
+    """
+    ETag en ``list`` y ``retrieve`` de un ModelViewSet: si coincide con
+    ``If-None-Match`` se responde 304 sin serializar ni enviar el cuerpo.
+
+    - Detalle: ``id`` + ``updated_at`` del registro (también Last-Modified).
+    - Listado: ``MAX(updated_at)`` + ``COUNT(*)`` del queryset ya filtrado,
+      en una única consulta agregada. El recuento detecta los borrados, que
+      no cambian el máximo; por eso el listado no envía Last-Modified. Los
+      catálogos tienen un índice ``(company, updated_at)`` para que sea un
+      recorrido solo de índice del tramo de la empresa.
+
+    La URL y el formato forman parte de la ETag, así que cada página,
+    búsqueda o renderer tiene la suya.
+    """
+
+    etag_field = "updated_at"
+
+    def list(self, request, *args, **kwargs):
+        state = self.filter_queryset(self.get_queryset()).aggregate(
+            last=Max(self.etag_field), total=Count("pk")
+        )
+        etag = self._make_etag(state["last"], state["total"])
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        response = super().list(request, *args, **kwargs)
+        response["ETag"] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        modified = getattr(instance, self.etag_field)
+        etag = self._make_etag(instance.pk, modified)
+        last_modified = int(modified.timestamp()) if modified else None
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+
+        response = Response(self.get_serializer(instance).data)
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def _make_etag(self, *state):
+        parts = (self.request.get_full_path(), self.request.accepted_media_type, *state)
+        digest = hashlib.md5("|".join(map(str, parts)).encode(), usedforsecurity=False)
+        return f'W/"{digest.hexdigest()}"'
+
+
+class ReplicaReadMixin:
+    """
+    Lleva las consultas de list/retrieve a una réplica de lectura
+    (config.db_router). Tras una escritura el usuario lee de la principal
+    durante DB_REPLICA_STICKY_SECONDS (ver StickyPrimaryMiddleware).
+    """
+
+    replica_actions = ("list", "retrieve")
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and self.action in self.replica_actions:
+            self._replica_reads = db_router.start_replica_reads(request.user.pk)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        db_router.end_replica_reads(getattr(self, "_replica_reads", None))
+        self._replica_reads = None
+        return super().finalize_response(request, response, *args, **kwargs)
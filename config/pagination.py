@@ -0,0 +1,121 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+from .filters import is_ranked_search
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) sobre ``(-created_at, -id)``.
+
+    El cursor guarda la posición completa ``created_at|id`` del último
+    registro, de modo que cada página se resuelve con un único rango sobre
+    el índice compuesto, sin OFFSET: la página 10.000 cuesta lo mismo que
+    la primera.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = getattr(settings, "API_MAX_PAGE_SIZE", 500)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+
+        if is_ranked_search(request, view):
+            # Búsqueda ordenada por relevancia: solo los N mejores, sin cursor
+            self.cursor = None
+            self.has_next = self.has_previous = False
+            self.page = list(queryset[:self.page_size])
+            return self.page
+
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*[self._invert(o) for o in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            # (cursor invertido) XOR (ordenación descendente) -> buscar hacia atrás
+            descending = self.ordering[0].startswith("-")
+            queryset = queryset.filter(
+                self._seek_filter(current_position, backwards=reverse != descending)
+            )
+
+        # Se pide un registro extra para saber si existe página siguiente.
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _seek_filter(self, position, backwards):
+        """
+        Condición ``(created_at, id) < (c, i)`` (o ``>``) escrita de forma que
+        PostgreSQL pueda acotar el rango con el índice compuesto.
+        """
+        ts_field, id_field = (o.lstrip("-") for o in self.ordering[:2])
+        try:
+            raw_ts, raw_id = position.rsplit("|", 1)
+            ts, pk = datetime.fromisoformat(raw_ts), int(raw_id)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        op = "lt" if backwards else "gt"
+        return Q(**{f"{ts_field}__{op}e": ts}) & (
+            Q(**{f"{ts_field}__{op}": ts}) | Q(**{f"{id_field}__{op}": pk})
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field_name in (o.lstrip("-") for o in ordering[:2]):
+            if isinstance(instance, dict):
+                attr = instance[field_name]
+            else:
+                attr = getattr(instance, field_name)
+            values.append(attr.isoformat() if isinstance(attr, datetime) else str(attr))
+        return "|".join(values)
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith("-") else "-" + field
@@ -0,0 +1,116 @@
+"""
+Backend de PostgreSQL con pool de conexiones (psycopg_pool).
+
+Django 5.0 no trae ``OPTIONS["pool"]`` (llega en 5.1); este backend lo
+implementa con la misma configuración, así que al actualizar Django basta
+con volver a ``django.db.backends.postgresql``.
+
+Hay un pool por alias y proceso, compartido por todos los hilos. Al empezar
+a usar la BD en una petición Django toma una conexión ya abierta (TCP + TLS
++ autenticación hechos) y al terminar la petición la devuelve al pool en
+lugar de cerrarla. Requiere ``CONN_MAX_AGE = 0``: la vida de las conexiones
+la gestiona el pool.
+
+Los pools se cierran antes de borrar la BD de tests (sus conexiones la
+mantendrían ocupada) y al terminar el proceso.
+"""
+
+import atexit
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base, creation
+from psycopg_pool import ConnectionPool
+
+_pools = {}
+_lock = threading.Lock()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # DROP DATABASE falla mientras haya pools con conexiones abiertas a
+        # ella: el de este alias y los de sus réplicas (TEST MIRROR)
+        _close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    @property
+    def pool(self):
+        # La clave incluye NAME para que la BD de tests no reutilice el pool
+        key = (self.alias, self.settings_dict["NAME"])
+        pool = _pools.get(key)
+        if pool is not None:
+            return pool
+        if self.settings_dict["CONN_MAX_AGE"] != 0:
+            raise ImproperlyConfigured("El pool de conexiones requiere CONN_MAX_AGE = 0.")
+
+        with _lock:
+            if key not in _pools:
+                options = self.settings_dict["OPTIONS"].get("pool") or {}
+                if options is True:
+                    options = {}
+                conn_params = self.get_connection_params()
+                # Django activa o desactiva autocommit después de cada getconn
+                conn_params["autocommit"] = True
+                _pools[key] = ConnectionPool(
+                    kwargs=conn_params,
+                    open=True,
+                    check=(
+                        ConnectionPool.check_connection
+                        if self.settings_dict["CONN_HEALTH_CHECKS"]
+                        else None
+                    ),
+                    name=self.alias,
+                    **options,
+                )
+        return _pools[key]
+
+    def close_pool(self):
+        with _lock:
+            for key in [key for key in _pools if key[0] == self.alias]:
+                _pools.pop(key).close()
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.getconn()
+        # Como en el backend de Django: el nivel de aislamiento por defecto
+        # o el de OPTIONS
+        isolation_level = self.settings_dict["OPTIONS"].get("isolation_level")
+        if isolation_level is None:
+            self.isolation_level = base.IsolationLevel.READ_COMMITTED
+        else:
+            try:
+                self.isolation_level = base.IsolationLevel(isolation_level)
+            except ValueError:
+                raise ImproperlyConfigured(
+                    f"Invalid transaction isolation level {isolation_level} "
+                    f"specified. Use one of the psycopg.IsolationLevel values."
+                )
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # putconn deshace la transacción abierta, si la hay
+                self.connection._pool.putconn(self.connection)
+                self.connection = None
+
+
+def _close_pools(name=None):
+    """Cierra los pools de la BD ``name`` (todos si es None)."""
+    with _lock:
+        keys = [key for key in _pools if name is None or key[1] == name]
+        pools = [_pools.pop(key) for key in keys]
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(_close_pools)
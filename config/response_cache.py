@@ -0,0 +1,126 @@
+"""
+Caché de respuestas de los listados y el detalle de los catálogos.
+
+Cada modelo tiene un número de versión guardado en la caché que forma parte
+de la clave de todas sus respuestas. Al guardar o borrar un registro
+(post_save/post_delete, o a mano tras un ``bulk_create``) se incrementa esa
+versión: invalidar es una sola operación y las entradas antiguas dejan de
+leerse y caducan por TTL.
+
+Usa el alias de caché ``api`` (ver ``CACHES`` en settings): memoria local o
+cualquier servidor con protocolo Redis.
+"""
+
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+CACHE_ALIAS = "api"
+
+_stats = Counter()
+_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def enabled():
+    return settings.API_RESPONSE_CACHE
+
+
+def _version_key(model):
+    return f"api:version:{model._meta.label_lower}"
+
+
+def version(model):
+    """
+    Versión actual del modelo. Si la clave no existe (primer uso o
+    desalojada) se crea con la hora en ns, nunca con un valor ya usado.
+    """
+    cache = get_cache()
+    key = _version_key(model)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        value = cache.get(key)
+    return value
+
+
+def bump(model):
+    cache = get_cache()
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate(model):
+    """Incrementa la versión al confirmar la transacción en curso."""
+    transaction.on_commit(lambda: bump(model))
+
+
+def _model_changed(sender, **kwargs):
+    invalidate(sender)
+
+
+def track(model):
+    """Invalida las respuestas cacheadas de ``model`` al guardar o borrar."""
+    uid = f"response_cache:{model._meta.label_lower}"
+    post_save.connect(_model_changed, sender=model, dispatch_uid=uid)
+    post_delete.connect(_model_changed, sender=model, dispatch_uid=uid)
+
+
+def response_key(model, request, tenant):
+    raw = "|".join(
+        map(str, (request.get_host(), request.get_full_path(), request.accepted_media_type, tenant))
+    )
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return f"api:response:{model._meta.label_lower}:{version(model)}:{digest}"
+
+
+def lookup(model, key):
+    entry = get_cache().get(key)
+    with _lock:
+        _stats[(model._meta.label_lower, "hits" if entry is not None else "misses")] += 1
+    return entry
+
+
+def store(key, entry):
+    get_cache().set(key, entry, settings.API_RESPONSE_CACHE_TTL)
+
+
+def stats():
+    """Aciertos y fallos por modelo del proceso actual."""
+    with _lock:
+        counts = dict(_stats)
+    models = {}
+    for (label, kind), value in counts.items():
+        models.setdefault(label, {"hits": 0, "misses": 0})[kind] = value
+    total_hits = total_lookups = 0
+    for data in models.values():
+        lookups = data["hits"] + data["misses"]
+        data["hit_ratio"] = round(data["hits"] / lookups, 4) if lookups else 0.0
+        total_hits += data["hits"]
+        total_lookups += lookups
+    return {
+        "enabled": enabled(),
+        "backend": type(get_cache()).__name__,
+        "ttl": settings.API_RESPONSE_CACHE_TTL,
+        "hits": total_hits,
+        "misses": total_lookups - total_hits,
+        "hit_ratio": round(total_hits / total_lookups, 4) if total_lookups else 0.0,
+        "models": models,
+    }
+
+
+def clear_stats():
+    with _lock:
+        _stats.clear()
@@ -0,0 +1,435 @@
+"""
+Prueba de carga de la API completa contra un servidor real.
+
+1. ``seed=1``: borra lo sembrado en una ejecución anterior y crea con
+   ``bulk_create`` ``companies`` empresas, ``rows`` registros por catálogo
+   (clientes, proveedores, artículos y almacenes) y ``users`` usuarios
+   admin repartidos entre ellas. Todo lleva el prefijo "Bench"; con
+   ``seed=0`` se reutiliza lo que haya.
+2. Arranca gunicorn (``workers`` x ``threads``) con PERF_METRICS. Google y
+   OpenAI se sustituyen por servidores locales que responden tras
+   ``upstream_latency`` segundos (ver ``locations.scripts.bench_async``).
+   Con ``server=http://host:puerto`` se usa un servidor ya arrancado y,
+   por defecto, no se lanzan los escenarios que llaman a Google u OpenAI.
+   DEBUG se hereda del entorno: para medir como en producción hay que
+   lanzar con ``DEBUG=False``, que exige SSL hacia PostgreSQL.
+3. Por escenario, ``requests`` peticiones con ``concurrency`` hilos (tras
+   ``warmup``): peticiones/s, latencia media y p50/p95/p99, códigos de
+   respuesta y consultas por petición (de la cabecera ``Server-Timing``).
+
+El resultado se imprime en JSON y se guarda en ``output``. Con
+``baseline=<fichero>`` se añade, por escenario, el cociente frente a una
+ejecución anterior (``req_per_s`` > 1 mejora, ``p95_ms`` > 1 empeora).
+
+    python manage.py runscript config.scripts.bench_api --script-args \\
+        rows=10000 users=50 requests=500 concurrency=16 output=bench.json
+
+``scenarios=clients.list,login`` limita los escenarios; ``scenarios=``
+vacío solo siembra.
+"""
+
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+
+from accounts.views import EmailTokenObtainPairSerializer
+from articles.models import Article
+from clients.models import Client
+from companies.models import Company
+from config import response_cache
+from locations.scripts.bench_async import start_mock_process
+from providers.models import Provider
+from warehouses.models import Warehouse
+
+PREFIX = "Bench"
+PASSWORD = "contraseña-de-prueba"
+
+CATALOGS = {"clients": Client, "providers": Provider, "articles": Article, "warehouses": Warehouse}
+# Los que tienen email, teléfono y notas
+CONTACTS = (Client, Provider)
+
+# Escenarios que llaman a Google u OpenAI
+EXTERNAL = ("geocode", "describe")
+
+OPENAI_RESPONSE = json.dumps({
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "Ciudad de prueba junto al mar"},
+        "finish_reason": "stop",
+    }],
+    "usage": {"prompt_tokens": 30, "completion_tokens": 8, "total_tokens": 38},
+}).encode()
+
+SERVER_QUERIES = re.compile(r'desc="(\d+) queries"')
+SERVER_TOTAL = re.compile(r"total;dur=([\d.]+)")
+
+
+# --- Datos -------------------------------------------------------------------
+
+def bench_companies():
+    return Company.objects.filter(name__startswith=f"{PREFIX} ")
+
+
+def clear():
+    User = get_user_model()
+    company_ids = list(bench_companies().values_list("id", flat=True))
+    if not company_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(company_ids))
+    with transaction.atomic():
+        # Un DELETE por tabla: con .delete() el ORM cargaría cada fila para
+        # enviar post_delete (invalidación de la caché de respuestas)
+        with connection.cursor() as cursor:
+            for model in CATALOGS.values():
+                table = connection.ops.quote_name(model._meta.db_table)
+                cursor.execute(f"DELETE FROM {table} WHERE company_id IN ({placeholders})", company_ids)
+                response_cache.invalidate(model)
+        User.objects.filter(codigo_empresa_id__in=company_ids).delete()
+        bench_companies().delete()
+
+
+def seed(companies, rows, users):
+    User = get_user_model()
+    batch_size = settings.BULK_BATCH_SIZE
+    # Cada empresa necesita al menos un usuario para leer sus registros
+    companies = max(1, min(companies, users))
+    clear()
+    with transaction.atomic():
+        company_objs = Company.objects.bulk_create(
+            [Company(name=f"{PREFIX} {i}") for i in range(companies)], batch_size=batch_size
+        )
+        for name, model in CATALOGS.items():
+            objs = []
+            for i in range(rows):
+                obj = model(company=company_objs[i % companies], name=f"{PREFIX} {name} {i}")
+                if model in CONTACTS:
+                    obj.email = f"bench{i}@example.com"
+                    obj.phone = f"+34 600 {i:06d}"
+                    obj.notes = "Registro generado para la prueba de carga" if i % 3 else None
+                objs.append(obj)
+            model.objects.bulk_create(objs, batch_size=batch_size)
+            response_cache.invalidate(model)  # bulk_create no envía post_save
+
+        # Un solo hash para todos: el coste del hasher se mide en el login
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            [
+                User(
+                    email=f"bench-user{i}@example.com",
+                    password=password,
+                    role="admin",  # también pueden leer empresas y usuarios
+                    codigo_empresa=company_objs[i % companies],
+                )
+                for i in range(users)
+            ],
+            batch_size=batch_size,
+        )
+    return {"companies": companies, "rows_per_catalog": rows, "users": users}
+
+
+class Fixture:
+    """Usuarios, tokens e ids sembrados que usan los escenarios."""
+
+    def __init__(self):
+        User = get_user_model()
+        self.companies = list(bench_companies().values_list("id", flat=True))
+        self.users = list(User.objects.filter(codigo_empresa_id__in=self.companies).order_by("id"))
+        if not self.users:
+            raise CommandError("No hay datos sembrados: ejecuta con seed=1.")
+
+        # (empresa, id) de cada catálogo, solo de empresas con usuario
+        with_users = {user.codigo_empresa_id for user in self.users}
+        self.ids = {
+            name: [
+                pair
+                for pair in model.objects.filter(company_id__in=with_users)
+                .order_by("id")
+                .values_list("company_id", "id")
+            ]
+            for name, model in CATALOGS.items()
+        }
+
+        self.headers = {}
+        self.user_by_company = {}
+        with transaction.atomic():
+            for user in self.users:
+                access = EmailTokenObtainPairSerializer.get_token(user).access_token
+                self.headers[user.pk] = {"Authorization": f"Bearer {access}"}
+                self.user_by_company.setdefault(user.codigo_empresa_id, user)
+        self.refresh_tokens = []
+
+    def issue_refresh_tokens(self, count):
+        # Cada refresh consume un token (rotación con blacklist)
+        with transaction.atomic():
+            self.refresh_tokens = [
+                str(EmailTokenObtainPairSerializer.get_token(self.users[i % len(self.users)]))
+                for i in range(count)
+            ]
+
+    def auth(self, i):
+        return self.headers[self.users[i % len(self.users)].pk]
+
+
+# --- Escenarios --------------------------------------------------------------
+
+def build_scenarios(fixture):
+    """Nombre -> función ``i -> (método, ruta, kwargs de requests)``."""
+    scenarios = {}
+
+    def catalog(name):
+        def list_(i):
+            return "GET", f"/api/{name}/", {"headers": fixture.auth(i)}
+
+        def retrieve(i):
+            company_id, pk = fixture.ids[name][i % len(fixture.ids[name])]
+            headers = fixture.headers[fixture.user_by_company[company_id].pk]
+            return "GET", f"/api/{name}/{pk}/", {"headers": headers}
+
+        def create(i):
+            body = {"name": f"{PREFIX} {name} nuevo {i}"}
+            return "POST", f"/api/{name}/", {"headers": fixture.auth(i), "json": body}
+
+        scenarios[f"{name}.list"] = list_
+        if fixture.ids[name]:
+            scenarios[f"{name}.retrieve"] = retrieve
+        scenarios[f"{name}.create"] = create
+
+    for name in CATALOGS:
+        catalog(name)
+
+    scenarios["companies.list"] = lambda i: ("GET", "/api/companies/", {"headers": fixture.auth(i)})
+    scenarios["companies.retrieve"] = lambda i: (
+        "GET",
+        f"/api/companies/{fixture.companies[i % len(fixture.companies)]}/",
+        {"headers": fixture.auth(i)},
+    )
+    scenarios["users.list"] = lambda i: ("GET", "/api/accounts/users/", {"headers": fixture.auth(i)})
+    scenarios["me"] = lambda i: ("GET", "/api/accounts/me/", {"headers": fixture.auth(i)})
+    scenarios["login"] = lambda i: (
+        "POST",
+        "/api/accounts/token/",
+        {"json": {"email": fixture.users[i % len(fixture.users)].email, "password": PASSWORD}},
+    )
+    # list.pop() es atómico: cada token se usa una sola vez
+    scenarios["refresh"] = lambda i: (
+        "POST", "/api/accounts/token/refresh/", {"json": {"refresh": fixture.refresh_tokens.pop()}}
+    )
+    # Coordenadas y ciudades aleatorias: fallos de caché, llegan a los mocks
+    scenarios["geocode"] = lambda i: (
+        "POST",
+        "/api/locations/get-city-name/",
+        {
+            "headers": fixture.auth(i),
+            "json": {"latitude": random.uniform(-60, 60), "longitude": random.uniform(-180, 180)},
+        },
+    )
+    scenarios["describe"] = lambda i: (
+        "POST",
+        "/api/locations/generate-description/",
+        {
+            "headers": fixture.auth(i),
+            "json": {"city_name": f"Ciudad {uuid.uuid4().hex[:8]}", "topic": "Historia"},
+        },
+    )
+    return scenarios
+
+
+# --- Carga -------------------------------------------------------------------
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def run_scenario(base_url, build, total, concurrency, warmup):
+    local = threading.local()
+
+    def one(i):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        method, path, kwargs = build(i)
+        start = time.perf_counter()
+        try:
+            response = session.request(method, base_url + path, timeout=60, **kwargs)
+        except requests.RequestException:
+            return time.perf_counter() - start, 0, None, None
+        elapsed = time.perf_counter() - start
+        timing = response.headers.get("Server-Timing", "")
+        queries = SERVER_QUERIES.search(timing)
+        server = SERVER_TOTAL.search(timing)
+        return (
+            elapsed,
+            response.status_code,
+            int(queries.group(1)) if queries else None,
+            float(server.group(1)) / 1000 if server else None,
+        )
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(warmup)))
+        start = time.perf_counter()
+        results = list(pool.map(one, range(warmup, warmup + total)))
+        elapsed = time.perf_counter() - start
+
+    timings = sorted(r[0] for r in results)
+    statuses = Counter(r[1] for r in results)
+    queries = [r[2] for r in results if r[2] is not None]
+    server = sorted(r[3] for r in results if r[3] is not None)
+    return {
+        "requests": total,
+        "errors": sum(count for code, count in statuses.items() if not 200 <= code < 400),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "req_per_s": round(total / elapsed, 1),
+        "mean_ms": ms(sum(timings) / len(timings)),
+        "p50_ms": ms(percentile(timings, 0.50)),
+        "p95_ms": ms(percentile(timings, 0.95)),
+        "p99_ms": ms(percentile(timings, 0.99)),
+        "server_p50_ms": ms(percentile(server, 0.50)) if server else None,
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def start_server(workers, threads, env):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn", "config.wsgi:application",
+            "--chdir", str(settings.BASE_DIR), "--bind", f"127.0.0.1:{port}",
+            "--workers", str(workers), "--threads", str(threads),
+            "--log-level", "warning",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while True:
+        # Login de un usuario inexistente: consulta la BD y, si todo va
+        # bien, responde 401. Un 5xx (BD inaccesible, SSL...) no vale.
+        try:
+            response = requests.post(
+                f"{base_url}/api/accounts/token/",
+                json={"email": "bench-probe@example.com", "password": "x"},
+                timeout=5,
+            )
+            error = f"HTTP {response.status_code}" if response.status_code >= 500 else None
+        except requests.RequestException as exc:
+            error = str(exc)
+        if error is None:
+            return process, base_url
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.terminate()
+            process.wait()
+            raise CommandError(f"gunicorn no ha arrancado: {error}")
+        time.sleep(0.2)
+
+
+def compare(result, baseline_path):
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = json.load(fh)["scenarios"]
+    for name, data in result["scenarios"].items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        data["vs_baseline"] = {
+            key: round(data[key] / old[key], 3)
+            for key in ("req_per_s", "p50_ms", "p95_ms", "p99_ms", "queries_per_request")
+            if data.get(key) and old.get(key)
+        }
+
+
+def run(*args):
+    options = {
+        "seed": "1", "companies": "10", "rows": "1000", "users": "20",
+        "requests": "200", "concurrency": "8", "warmup": "10",
+        "workers": "2", "threads": "4", "upstream_latency": "0.05",
+        "server": "", "scenarios": None, "output": "bench_api.json", "baseline": "",
+    }
+    options.update(arg.split("=", 1) for arg in args)
+    total, concurrency, warmup = (int(options[k]) for k in ("requests", "concurrency", "warmup"))
+
+    result = {
+        "options": {k: v for k, v in options.items() if k not in ("output", "baseline")},
+        "database": connection.vendor,
+    }
+    if options["seed"] == "1":
+        start = time.perf_counter()
+        result["seed"] = seed(int(options["companies"]), int(options["rows"]), int(options["users"]))
+        result["seed"]["seconds"] = round(time.perf_counter() - start, 2)
+
+    fixture = Fixture()
+    available = build_scenarios(fixture)
+    if options["scenarios"] is None:
+        names = [n for n in available if not (options["server"] and n in EXTERNAL)]
+    else:
+        names = [n for n in options["scenarios"].split(",") if n]
+    unknown = set(names) - set(available)
+    if unknown:
+        raise CommandError(f"Escenarios desconocidos: {', '.join(sorted(unknown))}.")
+    if not names:
+        print(json.dumps(result, indent=2))
+        return
+    if "refresh" in names:
+        fixture.issue_refresh_tokens(total + warmup)
+
+    processes, server = [], None
+    try:
+        if options["server"]:
+            base_url = options["server"].rstrip("/")
+        else:
+            latency = float(options["upstream_latency"])
+            google, google_port = start_mock_process(latency)
+            openai, openai_port = start_mock_process(latency, OPENAI_RESPONSE)
+            processes += [google, openai]
+            env = {
+                **os.environ,
+                "ALLOWED_HOSTS": "127.0.0.1,localhost",
+                "PERF_METRICS": "True",
+                "PERF_SERVER_TIMING": "True",
+                "GOOGLE_GEOCODING_URL": f"http://127.0.0.1:{google_port}/geocode",
+                "GOOGLE_GEOCODING_API_KEY": "bench",
+                "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+                "OPENAI_API_KEY": "bench",
+            }
+            server, base_url = start_server(int(options["workers"]), int(options["threads"]), env)
+            processes.append(server)
+
+        result["scenarios"] = {
+            name: run_scenario(base_url, available[name], total, concurrency, warmup) for name in names
+        }
+    finally:
+        for process in processes:
+            process.terminate()
+        if server:
+            server.wait()
+
+    if options["baseline"]:
+        compare(result, options["baseline"])
+    if options["output"]:
+        with open(options["output"], "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,86 @@
+"""
+Latencia por petición con y sin reutilizar conexiones a PostgreSQL.
+
+Lanza un proceso por modo (``new``: CONN_MAX_AGE=0, ``persistent``:
+DB_CONN_MAX_AGE, ``pool``: DB_POOL) contra la BD de ``DB_*``. Cada petición
+simulada reproduce el ciclo de Django: ``request_started``, ``queries``
+consultas y ``request_finished`` (que cierra o devuelve la conexión).
+``backends`` es el número de conexiones distintas que se llegaron a usar.
+
+    DB_HOST=localhost python manage.py runscript config.scripts.bench_db_connections \\
+        --script-args requests=500 threads=4
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+MODES = {
+    "new": {"DB_POOL": "", "DB_CONN_MAX_AGE": "0"},
+    "persistent": {"DB_POOL": "", "DB_CONN_MAX_AGE": "60"},
+    "pool": {"DB_POOL": "True"},
+}
+
+
+def simulated_request(queries):
+    start = time.perf_counter()
+    request_started.send(sender=__name__)
+    try:
+        with connection.cursor() as cursor:
+            for _ in range(queries):
+                cursor.execute("SELECT pg_backend_pid()")
+                pid = cursor.fetchone()[0]
+    finally:
+        request_finished.send(sender=__name__)
+    return time.perf_counter() - start, pid
+
+
+def worker(requests, threads, queries):
+    simulated_request(queries)  # calentamiento: importaciones, primer pool
+    with ThreadPoolExecutor(threads) as executor:
+        start = time.perf_counter()
+        results = list(executor.map(lambda _: simulated_request(queries), range(requests)))
+        elapsed = time.perf_counter() - start
+    timings = sorted(seconds for seconds, _ in results)
+    return {
+        "engine": settings.DATABASES["default"]["ENGINE"],
+        "conn_max_age": settings.DATABASES["default"]["CONN_MAX_AGE"],
+        "mean_ms": round(statistics.mean(timings) * 1000, 3),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95)] * 1000, 3),
+        "requests_per_s": round(requests / elapsed, 1),
+        "backends": len({pid for _, pid in results}),
+    }
+
+
+def run(*args):
+    options = {"requests": "500", "threads": "4", "queries": "1", "modes": ",".join(MODES)}
+    options.update(arg.split("=", 1) for arg in args)
+    requests, threads, queries = (int(options[k]) for k in ("requests", "threads", "queries"))
+
+    if options.get("worker"):
+        print(json.dumps(worker(requests, threads, queries)))
+        return
+
+    result = {"requests": requests, "threads": threads, "queries": queries, "modes": {}}
+    for mode in options["modes"].split(","):
+        output = subprocess.run(
+            [
+                sys.executable, "manage.py", "runscript", __name__,
+                "--script-args", "worker=1", *(f"{k}={v}" for k, v in options.items() if k != "modes"),
+            ],
+            env={**os.environ, **MODES[mode]},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result["modes"][mode] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(result, indent=2))
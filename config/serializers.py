@@ -0,0 +1,137 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, relations, serializers
+from rest_framework.settings import api_settings
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer que no aborta en la primera fila inválida: deja en
+    ``validated_data`` las filas válidas y en ``row_errors`` un diccionario
+    ``{índice: errores}`` con las demás.
+
+    Las filas con ``update_key`` son actualizaciones y se validan en modo
+    parcial: ningún campo es obligatorio y solo se devuelven los enviados.
+    """
+
+    update_key = "id"
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError(
+                {"non_field_errors": ["Se esperaba una lista de elementos."]}
+            )
+
+        self.row_errors = {}
+        self.valid_indexes = []
+        validated = []
+        partial = self.partial
+        try:
+            for index, item in enumerate(data):
+                # Los campos consultan root.partial al validar
+                self.partial = partial or (
+                    isinstance(item, dict) and item.get(self.update_key) is not None
+                )
+                try:
+                    validated.append(self.run_child_validation(item))
+                except serializers.ValidationError as exc:
+                    self.row_errors[index] = exc.detail
+                else:
+                    self.valid_indexes.append(index)
+        finally:
+            self.partial = partial
+        return validated
+
+
+# Campos cuyo to_representation deja intacto el valor que devuelve la BD
+_PASSTHROUGH_FIELDS = (serializers.BooleanField, serializers.CharField, serializers.IntegerField)
+# Campos que necesitan la instancia o una relación, no el valor de la columna
+_UNSUPPORTED_FIELDS = (
+    serializers.BaseSerializer,
+    serializers.FileField,
+    serializers.HiddenField,
+    serializers.SerializerMethodField,
+    relations.RelatedField,
+    relations.ManyRelatedField,
+)
+
+
+def _datetime_converter(field):
+    """Como DateTimeField.to_representation en ISO 8601, con la zona resuelta una vez."""
+    tz = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+
+    def convert(value):
+        if tz is None or value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    return convert
+
+
+class FastRowSerializer:
+    """
+    Convierte tuplas de ``values_list()`` en los mismos dicts que produciría
+    el ModelSerializer del que se construye, sin instancias de modelo ni la
+    maquinaria de campos de DRF: cada columna tiene un conversor calculado de
+    antemano (o ninguno, si el valor ya sale tal cual).
+
+    ``from_serializer`` devuelve None si algún campo no admite este camino
+    (relaciones anidadas, SerializerMethodField, campos no concretos...).
+    """
+
+    def __init__(self, names, sources, converters):
+        self.names = names
+        self.sources = sources
+        self.converters = converters
+
+    @classmethod
+    def from_serializer(cls, serializer):
+        opts = serializer.Meta.model._meta
+        names, sources, converters = [], [], []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if len(field.source_attrs) != 1 or field.source in sources:
+                return None
+            try:
+                if not opts.get_field(field.source).concrete:
+                    return None
+            except FieldDoesNotExist:
+                return None
+
+            if isinstance(field, relations.PrimaryKeyRelatedField):
+                # values_list("fk") devuelve el id: es lo que DRF serializa
+                if field.pk_field is not None:
+                    return None
+                convert = None
+            elif isinstance(field, _UNSUPPORTED_FIELDS):
+                return None
+            elif isinstance(field, serializers.DateTimeField):
+                output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+                if isinstance(output_format, str) and output_format.lower() == ISO_8601:
+                    convert = _datetime_converter(field)
+                else:
+                    convert = field.to_representation
+            elif isinstance(field, _PASSTHROUGH_FIELDS):
+                convert = None
+            else:
+                convert = field.to_representation
+
+            if convert is not None:
+                converters.append((len(names), convert))
+            names.append(name)
+            sources.append(field.source)
+        return cls(names, sources, converters)
+
+    def to_representation(self, rows):
+        """Acepta tuplas con columnas extra al final (se ignoran)."""
+        names, converters, width = self.names, self.converters, len(self.names)
+        data = []
+        for row in rows:
+            values = list(row[:width])
+            for index, convert in converters:
+                value = values[index]
+                if value is not None:
+                    values[index] = convert(value)
+            data.append(dict(zip(names, values)))
+        return data
@@ -1,3 +1,4 @@
+import copy
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -21,7 +22,9 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
+    "rest_framework_simplejwt.token_blacklist",
     "corsheaders",
     "accounts",
     "clients",
@@ -36,6 +39,8 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = "accounts.User"
 
 MIDDLEWARE = [
+    # Primero, para medir también el resto de middlewares
+    "config.middleware.PerformanceMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.security.SecurityMiddleware",
@@ -44,6 +49,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # Tras una escritura, lecturas del usuario en la principal (db_router)
+    "config.middleware.StickyPrimaryMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -65,6 +72,10 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
+
+# Servir get-city-name/ y generate-description/ con las vistas async (solo bajo ASGI)
+LOCATIONS_ASYNC_VIEWS = os.getenv("LOCATIONS_ASYNC_VIEWS") == "True"
 
 # DEBUG: True en local, False en producción
 # Se puede controlar con variable de entorno DEBUG o ENVIRONMENT
@@ -79,14 +90,47 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        # Segundos que se reutiliza cada conexión; 0 = una conexión nueva por
+        # petición (conexión TCP + TLS + autenticación cada vez)
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "0")),
+        # Comprobar con un SELECT 1 una conexión reutilizada antes de usarla
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True",
+        "OPTIONS": {},
     }
 }
 
 # Solo requerir SSL en producción (cuando DEBUG es False)
 if not DEBUG:
-    DATABASES["default"]["OPTIONS"] = {
-        "sslmode": "require",
+    DATABASES["default"]["OPTIONS"]["sslmode"] = "require"
+
+# Pool de conexiones por proceso (config/postgresql_pool), alternativa a
+# DB_CONN_MAX_AGE; recomendable con ASGI y con muchos hilos por worker.
+# DB_POOL_TIMEOUT: segundos esperando una conexión libre antes de fallar.
+if os.getenv("DB_POOL") == "True":
+    DATABASES["default"]["ENGINE"] = "config.postgresql_pool"
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    }
+
+# Réplicas de lectura (config/db_router.py): DB_REPLICA_HOSTS="host[:puerto],..."
+# con las mismas credenciales y opciones que la principal. Tras una
+# escritura, las lecturas de ese usuario van a la principal durante
+# DB_REPLICA_STICKY_SECONDS.
+DATABASE_REPLICAS = []
+for _number, _host in enumerate(filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), 1):
+    _host, _, _port = _host.strip().partition(":")
+    DATABASES[f"replica{_number}"] = {
+        **copy.deepcopy(DATABASES["default"]),
+        "HOST": _host,
+        "PORT": _port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
     }
+    DATABASE_REPLICAS.append(f"replica{_number}")
+DATABASE_ROUTERS = ["config.db_router.ReplicaRouter"]
+DB_REPLICA_STICKY_SECONDS = int(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
 
 # if DEBUG:
 #     DATABASES = {
@@ -116,13 +160,54 @@ if not DEBUG:
 #     }
 
 REST_FRAMEWORK = {
+    # JWT sin SELECT por petición: request.user se construye con los claims
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # Misma salida que JSONRenderer, codificada con orjson si está instalado
+    "DEFAULT_RENDERER_CLASSES": (
+        "config.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    # Paginación por cursor (keyset) para los listados de catálogo
+    "DEFAULT_PAGINATION_CLASS": "config.pagination.KeysetCursorPagination",
+    "PAGE_SIZE": int(os.getenv("API_PAGE_SIZE", "50")),
+}
+
+# Máximo que un cliente puede pedir con ?page_size=
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "500"))
+
+# Filas por lectura del cursor de servidor en los endpoints /export/
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+
+# Carga masiva (/bulk/): filas por INSERT y máximo de filas por petición
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "50000"))
+
+# Hasher de contraseñas: PASSWORD_HASHER codifica las nuevas (y recodifica
+# las demás en su siguiente login); el resto de la lista solo verifica.
+# PASSWORD_HASH_COST ajusta su coste (ver accounts/hashers.py; argon2 y
+# bcrypt requieren argon2-cffi / bcrypt). Sin valor, el de Django.
+_PASSWORD_HASHERS = {
+    "pbkdf2_sha256": "accounts.hashers.PBKDF2PasswordHasher",
+    "scrypt": "accounts.hashers.ScryptPasswordHasher",
+    "argon2": "accounts.hashers.Argon2PasswordHasher",
+    "bcrypt_sha256": "accounts.hashers.BCryptSHA256PasswordHasher",
 }
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2_sha256")
+PASSWORD_HASH_COST = int(os.getenv("PASSWORD_HASH_COST", "0")) or None
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+]
+
+# last_login en el login por JWT: "off", "sync" o "batch" (ver accounts/last_login.py)
+LAST_LOGIN_UPDATE = os.getenv("LAST_LOGIN_UPDATE", "off")
+LAST_LOGIN_MIN_INTERVAL = int(os.getenv("LAST_LOGIN_MIN_INTERVAL", "0"))
+LAST_LOGIN_BATCH_SIZE = int(os.getenv("LAST_LOGIN_BATCH_SIZE", "100"))
+LAST_LOGIN_BATCH_SECONDS = float(os.getenv("LAST_LOGIN_BATCH_SECONDS", "30"))
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
@@ -131,6 +216,103 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
 }
 
+# Geocodificación inversa (locations)
+GOOGLE_GEOCODING_URL = os.getenv(
+    "GOOGLE_GEOCODING_URL", "https://maps.googleapis.com/maps/api/geocode/json"
+)
+# Pool de conexiones keep-alive hacia Google, reintentos ante 429/5xx
+GEOCODING_POOL_SIZE = int(os.getenv("GEOCODING_POOL_SIZE", "10"))
+GEOCODING_ASYNC_POOL_SIZE = int(os.getenv("GEOCODING_ASYNC_POOL_SIZE", "200"))
+GEOCODING_RETRIES = int(os.getenv("GEOCODING_RETRIES", "2"))
+GEOCODING_BACKOFF = float(os.getenv("GEOCODING_BACKOFF", "0.2"))
+GEOCODING_TIMEOUT = float(os.getenv("GEOCODING_TIMEOUT", "10"))
+# Decimales de la rejilla de la caché (3 ~ 110 m), vida en segundos, tamaño
+# máximo de la tabla y entradas del LRU en memoria (0 lo desactiva)
+GEOCODE_CACHE_PRECISION = int(os.getenv("GEOCODE_CACHE_PRECISION", "3"))
+GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600)))
+GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", "200000"))
+GEOCODE_CACHE_L1_SIZE = int(os.getenv("GEOCODE_CACHE_L1_SIZE", "10000"))
+GEOCODE_CACHE_EVICT_EVERY = int(os.getenv("GEOCODE_CACHE_EVICT_EVERY", "500"))
+# Aciertos acumulados antes de escribir hits/last_used_at, y segundos máximos
+# entre escrituras
+GEOCODE_CACHE_TOUCH_BATCH = int(os.getenv("GEOCODE_CACHE_TOUCH_BATCH", "500"))
+GEOCODE_CACHE_TOUCH_SECONDS = float(os.getenv("GEOCODE_CACHE_TOUCH_SECONDS", "60"))
+# get-city-names/: puntos máximos por petición y llamadas simultáneas a Google
+GEOCODE_BATCH_MAX_POINTS = int(os.getenv("GEOCODE_BATCH_MAX_POINTS", "1000"))
+GEOCODE_BATCH_CONCURRENCY = int(os.getenv("GEOCODE_BATCH_CONCURRENCY", "8"))
+
+# Descripciones generadas con OpenAI (locations): modelo y vida de la caché
+OPENAI_DESCRIPTION_MODEL = os.getenv("OPENAI_DESCRIPTION_MODEL", "gpt-4o-mini")
+DESCRIPTION_CACHE_TTL = int(os.getenv("DESCRIPTION_CACHE_TTL", str(7 * 24 * 3600)))
+# Segundos por intento y reintentos del SDK de OpenAI (OPENAI_BASE_URL, que
+# lee el propio SDK, permite apuntar a un servidor de pruebas)
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+# Circuit breaker de Google y OpenAI (locations/upstream.py): tras
+# UPSTREAM_BREAKER_FAILURES fallos seguidos se responde 503 sin llamar
+# durante UPSTREAM_BREAKER_RESET segundos
+UPSTREAM_BREAKER_FAILURES = int(os.getenv("UPSTREAM_BREAKER_FAILURES", "5"))
+UPSTREAM_BREAKER_RESET = float(os.getenv("UPSTREAM_BREAKER_RESET", "30"))
+
+# Caché de Django: memoria local por defecto (una por proceso). Con REDIS_URL
+# se comparte entre workers (requiere el paquete "redis").
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Caché de respuestas de los catálogos (config.response_cache), desactivada
+# por defecto. Sin API_CACHE_URL/REDIS_URL es memoria local: solo sirve con
+# un único worker, porque las invalidaciones no llegan a los demás procesos.
+# API_CACHE_URL acepta cualquier servidor con protocolo Redis (redis://...).
+API_RESPONSE_CACHE = os.getenv("API_RESPONSE_CACHE") == "True"
+API_RESPONSE_CACHE_TTL = int(os.getenv("API_RESPONSE_CACHE_TTL", "300"))
+API_CACHE_URL = os.getenv("API_CACHE_URL") or os.getenv("REDIS_URL")
+if API_CACHE_URL:
+    CACHES["api"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": API_CACHE_URL,
+    }
+else:
+    CACHES["api"] = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "api-responses",
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("API_RESPONSE_CACHE_MAX_ENTRIES", "5000"))},
+    }
+
+# Sin Redis cada worker invalida solo su copia: conviene un TTL corto
+PRIMARY_COMPANY_CACHE_TTL = int(os.getenv("PRIMARY_COMPANY_CACHE_TTL", "300"))
+
+# Métricas por vista (config.middleware.PerformanceMiddleware): cabecera
+# Server-Timing e histogramas en /api/metrics/, accesible con
+# "Authorization: Bearer <METRICS_TOKEN>" o con un JWT de administrador
+PERF_METRICS = os.getenv("PERF_METRICS") == "True"
+PERF_SERVER_TIMING = os.getenv("PERF_SERVER_TIMING", "True") == "True"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Auditoría de la administración de usuarios (logger "accounts.audit")
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "accounts.audit": {
+            "handlers": ["console"],
+            "level": os.getenv("AUDIT_LOG_LEVEL", "INFO"),
+        },
+    },
+}
+
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "Europe/Madrid"
 USE_I18N = True
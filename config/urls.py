@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.urls import path, include
+from .views import MetricsView, ResponseCacheStatsView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -10,4 +11,6 @@ urlpatterns = [
     path("api/articles/", include("articles.urls")),
     path("api/warehouses/", include("warehouses.urls")),
     path("api/locations/", include("locations.urls")),
+    path("api/cache-stats/", ResponseCacheStatsView.as_view(), name="response-cache-stats"),
+    path("api/metrics/", MetricsView.as_view(), name="metrics"),
 ]
@@ -0,0 +1,47 @@
+import hmac
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from rest_framework import authentication, permissions, views
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from accounts.permissions import IsAdmin
+
+from . import metrics, response_cache
+
+
+class ResponseCacheStatsView(views.APIView):
+    """Aciertos de la caché de respuestas de este proceso (solo administradores)."""
+
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(response_cache.stats())
+
+
+class MetricsTokenAuthentication(authentication.BaseAuthentication):
+    """``Authorization: Bearer <METRICS_TOKEN>`` para el scraper de Prometheus."""
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        token = settings.METRICS_TOKEN
+        if token and len(header) == 2 and hmac.compare_digest(header[1], token.encode()):
+            return AnonymousUser(), self
+        return None
+
+
+class HasMetricsToken(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return isinstance(request.auth, MetricsTokenAuthentication)
+
+
+class MetricsView(views.APIView):
+    """Métricas del proceso en formato Prometheus (METRICS_TOKEN o administradores)."""
+
+    authentication_classes = [MetricsTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    permission_classes = [HasMetricsToken | IsAdmin]
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,3 +1,15 @@
 from django.contrib import admin
+from .models import DescriptionCacheEntry, GeocodeCacheEntry
 
-# Register your models here.
+@admin.register(GeocodeCacheEntry)
+class GeocodeCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "city_name", "lat_key", "lng_key", "precision", "hits", "last_used_at")
+    search_fields = ("city_name", "formatted_address")
+    ordering = ("-last_used_at",)
+
+@admin.register(DescriptionCacheEntry)
+class DescriptionCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "city_key", "topic", "description", "created_at")
+    search_fields = ("city_key",)
+    list_filter = ("topic",)
+    ordering = ("-created_at",)
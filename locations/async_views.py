@@ -0,0 +1,155 @@
+"""
+Versiones asíncronas de los endpoints de locations.
+
+DRF no ejecuta vistas ``async``, así que son vistas de Django que repiten
+la autenticación JWT y la validación con los mismos serializers. Solo
+aportan algo servidas por ASGI (ver ``config/asgi.py``): mientras esperan a
+Google u OpenAI el worker sigue atendiendo otras peticiones.
+"""
+
+import json
+import os
+
+import openai
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
+
+from . import cache as geocode_cache
+from .descriptions import MissingAPIKey, get_description_async
+from .geocoding import GeocodingError, GeocodingTimeout, LocationNotFound, reverse_geocode_async
+from .serializers import (
+    GenerateDescriptionRequestSerializer,
+    GenerateDescriptionResponseSerializer,
+    LocationRequestSerializer,
+    LocationResponseSerializer,
+)
+from .upstream import CircuitOpen
+from .views import OPENAI_TIMEOUT_MESSAGE, circuit_open_response, openai_error_payload
+
+
+def _authenticate(request):
+    for auth_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        result = auth_class().authenticate(request)
+        if result is not None:
+            return result[0]
+    return None
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncAPIView(View):
+    """Autenticación JWT y parseo del cuerpo JSON para las vistas async."""
+
+    http_method_names = ["post", "options"]
+
+    async def authenticate(self, request):
+        try:
+            user = await sync_to_async(_authenticate)(request)
+        except AuthenticationFailed as exc:
+            return None, JsonResponse({"detail": str(exc.detail)}, status=exc.status_code)
+        if user is None or not user.is_authenticated:
+            return None, JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        return user, None
+
+    @staticmethod
+    def json_body(request):
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+
+
+class AsyncGetCityNameView(AsyncAPIView):
+    async def post(self, request):
+        user, error = await self.authenticate(request)
+        if error:
+            return error
+
+        serializer = LocationRequestSerializer(data=self.json_body(request))
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        latitude = serializer.validated_data["latitude"]
+        longitude = serializer.validated_data["longitude"]
+
+        cached = await sync_to_async(geocode_cache.lookup)(latitude, longitude)
+        if cached is not None:
+            return JsonResponse(LocationResponseSerializer(cached).data)
+
+        google_api_key = os.getenv("GOOGLE_GEOCODING_API_KEY")
+        if not google_api_key:
+            return JsonResponse(
+                {"error": "Google Geocoding API key not configured"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        try:
+            cell_lat, cell_lng = geocode_cache.cell_center(
+                geocode_cache.quantize(latitude, longitude)
+            )
+            result = await reverse_geocode_async(cell_lat, cell_lng, google_api_key)
+            await sync_to_async(geocode_cache.store)(latitude, longitude, result)
+            return JsonResponse(LocationResponseSerializer(result).data)
+        except LocationNotFound:
+            return JsonResponse(
+                {"error": "No se pudo obtener la ubicación"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        except CircuitOpen as e:
+            data, code, headers = circuit_open_response(e)
+            return JsonResponse(data, status=code, headers=headers)
+        except GeocodingTimeout as e:
+            return JsonResponse(
+                {"error": f"Google API no respondió a tiempo: {str(e)}"},
+                status=status.HTTP_504_GATEWAY_TIMEOUT,
+            )
+        except GeocodingError as e:
+            return JsonResponse(
+                {"error": f"Error al conectar con Google API: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        except Exception as e:
+            return JsonResponse(
+                {"error": f"Error inesperado: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class AsyncGenerateDescriptionView(AsyncAPIView):
+    async def post(self, request):
+        user, error = await self.authenticate(request)
+        if error:
+            return error
+
+        serializer = GenerateDescriptionRequestSerializer(data=self.json_body(request))
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            description = await get_description_async(
+                serializer.validated_data["city_name"], serializer.validated_data["topic"]
+            )
+            return JsonResponse(GenerateDescriptionResponseSerializer({"description": description}).data)
+        except MissingAPIKey:
+            return JsonResponse(
+                {"error": "OpenAI API key not configured"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        except CircuitOpen as e:
+            data, code, headers = circuit_open_response(e)
+            return JsonResponse(data, status=code, headers=headers)
+        except openai.APITimeoutError:
+            return JsonResponse(
+                {"error": OPENAI_TIMEOUT_MESSAGE}, status=status.HTTP_504_GATEWAY_TIMEOUT
+            )
+        except Exception as e:
+            return JsonResponse(openai_error_payload(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
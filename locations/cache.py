@@ -0,0 +1,271 @@
+"""
+Caché de geocodificación inversa.
+
+Dos niveles: un LRU opcional en memoria del proceso (L1) y la tabla
+``GeocodeCacheEntry`` (L2) compartida por todos los workers. Las claves son
+las coordenadas cuantizadas a ``GEOCODE_CACHE_PRECISION`` decimales
+(3 decimales ~ 110 m).
+
+Los aciertos (de L1 y de L2) no escriben en la tabla uno a uno: se acumulan
+por entrada y cada ``GEOCODE_CACHE_TOUCH_BATCH`` aciertos o
+``GEOCODE_CACHE_TOUCH_SECONDS`` segundos se vuelcan ``hits`` y
+``last_used_at`` con un UPDATE por número de aciertos. Así el LRU de la
+tabla también ve las claves que solo se sirven desde L1.
+"""
+
+import atexit
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from .models import GeocodeCacheEntry
+
+_lock = threading.Lock()
+_l1 = OrderedDict()
+_stats = {"l1_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_stores_since_evict = 0
+_touches = defaultdict(int)
+_last_touch_flush = time.monotonic()
+
+
+def _precision():
+    return settings.GEOCODE_CACHE_PRECISION
+
+
+def quantize(latitude, longitude, precision=None):
+    """Devuelve la clave de celda ``(precision, lat_key, lng_key)``."""
+    precision = _precision() if precision is None else precision
+    factor = 10 ** precision
+    return precision, round(latitude * factor), round(longitude * factor)
+
+
+def cell_center(key):
+    """Coordenadas que representan a la celda (las que se envían a Google)."""
+    precision, lat_key, lng_key = key
+    factor = 10 ** precision
+    return lat_key / factor, lng_key / factor
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def _l1_get(key):
+    if settings.GEOCODE_CACHE_L1_SIZE <= 0:
+        return None
+    with _lock:
+        item = _l1.get(key)
+        if item is None:
+            return None
+        value, expires_at, pk = item
+        if expires_at <= timezone.now():
+            del _l1[key]
+            return None
+        _l1.move_to_end(key)
+        _stats["l1_hits"] += 1
+    _touch([pk])
+    return value
+
+
+def _l1_set(key, value, expires_at, pk):
+    size = settings.GEOCODE_CACHE_L1_SIZE
+    if size <= 0:
+        return
+    with _lock:
+        _l1[key] = (value, expires_at, pk)
+        _l1.move_to_end(key)
+        while len(_l1) > size:
+            _l1.popitem(last=False)
+
+
+def _touch(pks):
+    """Anota aciertos de esas entradas; se escriben en ``flush_touches``."""
+    with _lock:
+        for pk in pks:
+            if pk is not None:
+                _touches[pk] += 1
+        due = (
+            len(_touches) >= settings.GEOCODE_CACHE_TOUCH_BATCH
+            or time.monotonic() - _last_touch_flush >= settings.GEOCODE_CACHE_TOUCH_SECONDS
+        )
+    if due:
+        flush_touches()
+
+
+def flush_touches():
+    """Vuelca los aciertos pendientes: un UPDATE por cada número de aciertos."""
+    global _last_touch_flush
+    with _lock:
+        pending = dict(_touches)
+        _touches.clear()
+        _last_touch_flush = time.monotonic()
+    by_count = defaultdict(list)
+    for pk, count in pending.items():
+        by_count[count].append(pk)
+    now = timezone.now()
+    for count, pks in by_count.items():
+        GeocodeCacheEntry.objects.filter(pk__in=pks).update(
+            hits=F("hits") + count, last_used_at=now
+        )
+    return len(pending)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        flush_touches()
+    except DatabaseError:
+        # Al apagar el worker la BD puede no estar disponible
+        pass
+
+
+def lookup(latitude, longitude):
+    """Busca en L1 y después en BD. Devuelve el dict del resultado o None."""
+    key = quantize(latitude, longitude)
+    value = _l1_get(key)
+    if value is not None:
+        return value
+
+    ttl = timedelta(seconds=settings.GEOCODE_CACHE_TTL)
+    now = timezone.now()
+    precision, lat_key, lng_key = key
+    entry = (
+        GeocodeCacheEntry.objects.filter(
+            precision=precision, lat_key=lat_key, lng_key=lng_key, created_at__gt=now - ttl
+        )
+        .only("id", "city_name", "formatted_address", "created_at")
+        .first()
+    )
+    if entry is None:
+        _count("misses")
+        return None
+
+    _count("db_hits")
+    value = {"city_name": entry.city_name, "formatted_address": entry.formatted_address}
+    _l1_set(key, value, entry.created_at + ttl, entry.pk)
+    _touch([entry.pk])
+    return value
+
+
+def lookup_many(keys):
+    """
+    Versión por lotes de lookup para claves ya cuantizadas: una sola consulta
+    a BD para todas las que no estén en L1. Devuelve ``{clave: resultado}``
+    solo con las encontradas.
+    """
+    found = {}
+    pending = []
+    for key in keys:
+        value = _l1_get(key)
+        if value is None:
+            pending.append(key)
+        else:
+            found[key] = value
+    if not pending:
+        return found
+
+    ttl = timedelta(seconds=settings.GEOCODE_CACHE_TTL)
+    now = timezone.now()
+    wanted = set(pending)
+    entries = GeocodeCacheEntry.objects.filter(
+        precision__in={k[0] for k in pending},
+        lat_key__in={k[1] for k in pending},
+        lng_key__in={k[2] for k in pending},
+        created_at__gt=now - ttl,
+    ).only("id", "precision", "lat_key", "lng_key", "city_name", "formatted_address", "created_at")
+
+    hit_ids = []
+    for entry in entries:
+        key = (entry.precision, entry.lat_key, entry.lng_key)
+        if key not in wanted:
+            continue
+        value = {"city_name": entry.city_name, "formatted_address": entry.formatted_address}
+        found[key] = value
+        hit_ids.append(entry.pk)
+        _l1_set(key, value, entry.created_at + ttl, entry.pk)
+
+    _touch(hit_ids)
+    with _lock:
+        _stats["db_hits"] += len(hit_ids)
+        _stats["misses"] += len(pending) - len(hit_ids)
+    return found
+
+
+def store(latitude, longitude, value):
+    """Guarda (o renueva) el resultado de la celda que contiene el punto."""
+    store_key(quantize(latitude, longitude), value)
+
+
+def store_key(key, value):
+    """Como store, pero con la clave de celda ya calculada."""
+    global _stores_since_evict
+
+    precision, lat_key, lng_key = key
+    now = timezone.now()
+    pk = None
+    try:
+        entry, _ = GeocodeCacheEntry.objects.update_or_create(
+            precision=precision,
+            lat_key=lat_key,
+            lng_key=lng_key,
+            defaults={
+                "city_name": value["city_name"],
+                "formatted_address": value.get("formatted_address", ""),
+                "created_at": now,
+                "last_used_at": now,
+            },
+        )
+        pk = entry.pk
+    except IntegrityError:
+        # Otro worker guardó la misma celda a la vez: su valor es igual de válido.
+        pass
+    _l1_set(key, value, now + timedelta(seconds=settings.GEOCODE_CACHE_TTL), pk)
+
+    with _lock:
+        _stats["stores"] += 1
+        _stores_since_evict += 1
+        run_eviction = _stores_since_evict >= settings.GEOCODE_CACHE_EVICT_EVERY
+        if run_eviction:
+            _stores_since_evict = 0
+    if run_eviction:
+        evict()
+
+
+def evict():
+    """Borra entradas caducadas y, si sobran, las menos usadas recientemente (LRU)."""
+    flush_touches()
+    ttl = timedelta(seconds=settings.GEOCODE_CACHE_TTL)
+    deleted, _ = GeocodeCacheEntry.objects.filter(created_at__lte=timezone.now() - ttl).delete()
+
+    excess = GeocodeCacheEntry.objects.count() - settings.GEOCODE_CACHE_MAX_ENTRIES
+    if excess > 0:
+        oldest = GeocodeCacheEntry.objects.order_by("last_used_at").values_list("pk", flat=True)[:excess]
+        more, _ = GeocodeCacheEntry.objects.filter(pk__in=list(oldest)).delete()
+        deleted += more
+
+    with _lock:
+        _stats["evictions"] += deleted
+    return deleted
+
+
+def clear_l1():
+    with _lock:
+        _l1.clear()
+
+
+def stats():
+    """Contadores del proceso actual más el tamaño de cada nivel."""
+    with _lock:
+        data = dict(_stats)
+        data["l1_size"] = len(_l1)
+    lookups = data["l1_hits"] + data["db_hits"] + data["misses"]
+    data["hit_ratio"] = round((data["l1_hits"] + data["db_hits"]) / lookups, 4) if lookups else 0.0
+    data["db_size"] = GeocodeCacheEntry.objects.count()
+    return data
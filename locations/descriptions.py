@@ -0,0 +1,201 @@
+"""
+Descripciones breves de ciudades generadas con OpenAI.
+
+Las respuestas se guardan en ``DescriptionCacheEntry`` con una vida de
+``DESCRIPTION_CACHE_TTL`` segundos. Si varias peticiones piden a la vez la
+misma ciudad y tema, solo una llama a OpenAI; el resto espera su resultado.
+"""
+
+import asyncio
+import os
+import threading
+import unicodedata
+import weakref
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from openai import AsyncOpenAI, OpenAI
+
+from .models import DescriptionCacheEntry
+from .upstream import openai_api, record_openai_usage
+
+SYSTEM_PROMPT = "Eres un asistente que genera descripciones breves y precisas sobre lugares."
+MAX_LENGTH = 40
+
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Versión asíncrona: cliente y peticiones en curso por event loop
+_async_clients = weakref.WeakKeyDictionary()
+_async_inflight = weakref.WeakKeyDictionary()
+
+
+class MissingAPIKey(Exception):
+    """OPENAI_API_KEY no está configurada."""
+
+
+def _client_options():
+    # Sin timeout propio el SDK espera hasta 10 minutos por respuesta
+    return {"timeout": settings.OPENAI_TIMEOUT, "max_retries": settings.OPENAI_MAX_RETRIES}
+
+
+def get_client():
+    """Cliente OpenAI reutilizado entre peticiones (se recrea si cambia la key)."""
+    global _client, _client_key
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise MissingAPIKey()
+    if _client is None or _client_key != api_key:
+        with _client_lock:
+            if _client is None or _client_key != api_key:
+                _client = OpenAI(api_key=api_key, **_client_options())
+                _client_key = api_key
+    return _client
+
+
+def get_async_client():
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise MissingAPIKey()
+    loop = asyncio.get_running_loop()
+    cached = _async_clients.get(loop)
+    if cached is None or cached[0] != api_key:
+        cached = (api_key, AsyncOpenAI(api_key=api_key, **_client_options()))
+        _async_clients[loop] = cached
+    return cached[1]
+
+
+def normalize_city(city_name):
+    """'  SEVILLA ' y 'sevilla' comparten entrada."""
+    text = unicodedata.normalize("NFKC", city_name)
+    return " ".join(text.split()).casefold()
+
+
+def build_prompt(city_name, topic):
+    return (
+        f"Escribe una frase corta (máximo {MAX_LENGTH} caracteres) sobre {city_name} "
+        f"relacionada con {topic}. La frase debe ser informativa y concisa."
+    )
+
+
+def truncate(description):
+    # Asegurar que no supere los 40 caracteres
+    description = description.strip()
+    if len(description) > MAX_LENGTH:
+        description = description[:MAX_LENGTH - 3] + "..."
+    return description
+
+
+def _completion_kwargs(city_name, topic):
+    return {
+        "model": settings.OPENAI_DESCRIPTION_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": build_prompt(city_name, topic)},
+        ],
+        "max_tokens": 50,
+        "temperature": 0.7,
+    }
+
+
+def generate_description(city_name, topic):
+    """Llama a OpenAI sin pasar por la caché (CircuitOpen si se da por caído)."""
+    client = get_client()
+    with openai_api.call():
+        response = client.chat.completions.create(**_completion_kwargs(city_name, topic))
+    record_openai_usage(response.model, response.usage)
+    return truncate(response.choices[0].message.content)
+
+
+async def generate_description_async(city_name, topic):
+    client = get_async_client()
+    with openai_api.call():
+        response = await client.chat.completions.create(**_completion_kwargs(city_name, topic))
+    record_openai_usage(response.model, response.usage)
+    return truncate(response.choices[0].message.content)
+
+
+def _cached(city_key, topic):
+    ttl = timedelta(seconds=settings.DESCRIPTION_CACHE_TTL)
+    return (
+        DescriptionCacheEntry.objects.filter(
+            city_key=city_key, topic=topic, created_at__gt=timezone.now() - ttl
+        )
+        .values_list("description", flat=True)
+        .first()
+    )
+
+
+def _store(city_key, topic, description):
+    # La caché es opcional: si no se puede guardar (carrera con otro worker,
+    # clave demasiado larga...) la descripción ya pagada se devuelve igual.
+    # El savepoint evita dejar rota una transacción de quien llama.
+    try:
+        with transaction.atomic():
+            DescriptionCacheEntry.objects.update_or_create(
+                city_key=city_key,
+                topic=topic,
+                defaults={"description": description, "created_at": timezone.now()},
+            )
+    except DatabaseError:
+        pass
+
+
+def get_description(city_name, topic, refresh=False):
+    """Devuelve la descripción cacheada o la genera (una sola llamada por clave)."""
+    city_key = normalize_city(city_name)
+    if not refresh:
+        description = _cached(city_key, topic)
+        if description is not None:
+            return description
+
+    key = (city_key, topic)
+    with _inflight_lock:
+        lock = _inflight.setdefault(key, threading.Lock())
+
+    with lock:
+        try:
+            # Quien esperaba al lock encuentra ya el resultado del primero
+            if not refresh:
+                description = _cached(city_key, topic)
+                if description is not None:
+                    return description
+            description = generate_description(city_name, topic)
+            _store(city_key, topic, description)
+            return description
+        finally:
+            with _inflight_lock:
+                if _inflight.get(key) is lock:
+                    del _inflight[key]
+
+
+async def _fill_async(city_name, city_key, topic):
+    description = await generate_description_async(city_name, topic)
+    await sync_to_async(_store)(city_key, topic, description)
+    return description
+
+
+async def get_description_async(city_name, topic):
+    """Versión asíncrona de get_description, con single-flight por event loop."""
+    city_key = normalize_city(city_name)
+    description = await sync_to_async(_cached)(city_key, topic)
+    if description is not None:
+        return description
+
+    inflight = _async_inflight.setdefault(asyncio.get_running_loop(), {})
+    key = (city_key, topic)
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fill_async(city_name, city_key, topic))
+        inflight[key] = task
+        task.add_done_callback(lambda _: inflight.pop(key, None))
+    # shield: si un cliente corta la conexión no se cancela la llamada de los demás
+    return await asyncio.shield(task)
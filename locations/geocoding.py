@@ -0,0 +1,118 @@
+import os
+
+import httpx
+import requests
+from django.conf import settings
+
+from .http_client import AsyncOutboundClient, OutboundClient
+from .upstream import exception_outcome, google_geocoding
+
+# Cliente compartido por todas las peticiones del proceso
+client = OutboundClient(
+    pool_size=settings.GEOCODING_POOL_SIZE,
+    retries=settings.GEOCODING_RETRIES,
+    backoff=settings.GEOCODING_BACKOFF,
+    timeout=settings.GEOCODING_TIMEOUT,
+)
+async_client = AsyncOutboundClient(
+    pool_size=settings.GEOCODING_ASYNC_POOL_SIZE,
+    retries=settings.GEOCODING_RETRIES,
+    backoff=settings.GEOCODING_BACKOFF,
+    timeout=settings.GEOCODING_TIMEOUT,
+)
+
+
+class GeocodingError(Exception):
+    """Fallo al hablar con la API de geocodificación."""
+
+
+class LocationNotFound(GeocodingError):
+    """La API respondió, pero sin resultados para esas coordenadas."""
+
+
+class GeocodingTimeout(GeocodingError):
+    """Google no respondió dentro de GEOCODING_TIMEOUT (reintentos incluidos)."""
+
+
+# Google responde 200 también cuando falla: el error va en "status" del
+# cuerpo. Cuota agotada y error interno cuentan para el circuit breaker;
+# clave o petición inválidas son nuestras y no dicen nada del servicio.
+# OK y ZERO_RESULTS quedan como 2xx.
+GOOGLE_STATUS_OUTCOMES = {
+    "OVER_QUERY_LIMIT": ("over_query_limit", True),
+    "UNKNOWN_ERROR": ("unknown_error", True),
+    "REQUEST_DENIED": ("request_denied", False),
+    "INVALID_REQUEST": ("invalid_request", False),
+}
+
+
+def _error(exc):
+    error_class = GeocodingTimeout if exception_outcome(exc)[0] == "timeout" else GeocodingError
+    return error_class(str(exc))
+
+
+def parse_geocode_response(data):
+    """Extrae ``city_name`` y ``formatted_address`` de una respuesta de Google."""
+    status = data.get("status", "")
+    if status in GOOGLE_STATUS_OUTCOMES:
+        raise GeocodingError(f"{status}: {data.get('error_message', '')}".rstrip(": "))
+    if status != "OK" or not data.get("results"):
+        raise LocationNotFound(status)
+
+    result = data["results"][0]
+    formatted_address = result.get("formatted_address", "")
+    city_name = formatted_address
+
+    # Intentar obtener el nombre de la ciudad desde los componentes
+    for component in result.get("address_components", []):
+        types = component.get("types", [])
+        if "locality" in types:
+            city_name = component.get("long_name", city_name)
+            break
+        elif "administrative_area_level_2" in types and city_name == formatted_address:
+            city_name = component.get("long_name", city_name)
+
+    return {"city_name": city_name, "formatted_address": formatted_address}
+
+
+def _params(latitude, longitude, api_key):
+    return {
+        "latlng": f"{latitude},{longitude}",
+        "key": api_key or os.getenv("GOOGLE_GEOCODING_API_KEY"),
+        "language": "es",
+    }
+
+
+def reverse_geocode(latitude, longitude, api_key=None):
+    """
+    Llama a Google Geocoding API y devuelve el resultado ya parseado. Con el
+    circuit breaker abierto lanza CircuitOpen sin llamar.
+    """
+    params = _params(latitude, longitude, api_key)
+    try:
+        with google_geocoding.call() as call:
+            response = client.get(settings.GOOGLE_GEOCODING_URL, params=params)
+            call.status = response.status_code
+            if response.ok:
+                data = response.json()
+                call.outcome = GOOGLE_STATUS_OUTCOMES.get(data.get("status"))
+        response.raise_for_status()
+    except (requests.RequestException, ValueError) as exc:
+        raise _error(exc) from exc
+    return parse_geocode_response(data)
+
+
+async def reverse_geocode_async(latitude, longitude, api_key=None):
+    """Versión asíncrona de reverse_geocode (httpx)."""
+    params = _params(latitude, longitude, api_key)
+    try:
+        with google_geocoding.call() as call:
+            response = await async_client.get(settings.GOOGLE_GEOCODING_URL, params=params)
+            call.status = response.status_code
+            if response.is_success:
+                data = response.json()
+                call.outcome = GOOGLE_STATUS_OUTCOMES.get(data.get("status"))
+        response.raise_for_status()
+    except (httpx.HTTPError, ValueError) as exc:
+        raise _error(exc) from exc
+    return parse_geocode_response(data)
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class OutboundClient:
+    """
+    Sesión HTTP compartida para las llamadas salientes de una app.
+
+    Mantiene conexiones keep-alive en un pool (se ahorran DNS, TCP y TLS en
+    cada llamada), reintenta con backoff exponencial ante 429/5xx y lleva
+    la cuenta del tiempo de cada llamada.
+    """
+
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    def __init__(self, pool_size=10, retries=2, backoff=0.2, timeout=10):
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._session = None
+        self._lock = threading.Lock()
+        self._metrics = {"calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+
+    @property
+    def session(self):
+        # Se crea en el primer uso: así no se hereda un pool abierto al hacer fork
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def _build_session(self):
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=self.retry_statuses,
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.get(url, **kwargs)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            self._record(time.perf_counter() - start, failed)
+
+    def _record(self, elapsed, failed):
+        with self._lock:
+            self._metrics["calls"] += 1
+            self._metrics["errors"] += int(failed)
+            self._metrics["total_seconds"] += elapsed
+            self._metrics["max_seconds"] = max(self._metrics["max_seconds"], elapsed)
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._metrics)
+        data["avg_ms"] = round(data["total_seconds"] * 1000 / data["calls"], 3) if data["calls"] else 0.0
+        data["max_ms"] = round(data.pop("max_seconds") * 1000, 3)
+        data.pop("total_seconds")
+        return data
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+class AsyncOutboundClient(OutboundClient):
+    """
+    Equivalente asíncrono de OutboundClient sobre ``httpx.AsyncClient``.
+
+    Un ``AsyncClient`` queda ligado al event loop en el que se crea, así que
+    se guarda uno por loop (en la práctica, uno por worker de uvicorn).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client_for_loop(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            limits = httpx.Limits(
+                max_connections=self.pool_size, max_keepalive_connections=self.pool_size
+            )
+            client = httpx.AsyncClient(limits=limits, timeout=self.timeout)
+            self._clients[loop] = client
+        return client
+
+    async def get(self, url, **kwargs):
+        client = self._client_for_loop()
+        start = time.perf_counter()
+        failed = True
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    response = await client.get(url, **kwargs)
+                except httpx.TransportError:
+                    if attempt == self.retries:
+                        raise
+                else:
+                    if response.status_code not in self.retry_statuses or attempt == self.retries:
+                        failed = response.status_code >= 400
+                        return response
+                await asyncio.sleep(self.backoff * (2 ** attempt))
+        finally:
+            self._record(time.perf_counter() - start, failed)
+
+    async def aclose(self):
+        clients, self._clients = self._clients, weakref.WeakKeyDictionary()
+        for client in list(clients.values()):
+            await client.aclose()
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from locations.descriptions import MissingAPIKey, get_description
+from locations.serializers import GenerateDescriptionRequestSerializer
+
+TOPICS = list(GenerateDescriptionRequestSerializer().fields["topic"].choices)
+
+
+class Command(BaseCommand):
+    help = "Genera y guarda en caché las descripciones de una lista de ciudades."
+
+    def add_arguments(self, parser):
+        parser.add_argument("cities", nargs="*", help="Nombres de ciudad.")
+        parser.add_argument("--file", help="Fichero con una ciudad por línea.")
+        parser.add_argument(
+            "--topic", action="append", choices=TOPICS, help="Tema (repetible). Por defecto, todos."
+        )
+        parser.add_argument(
+            "--refresh", action="store_true", help="Regenerar aunque ya exista en caché."
+        )
+
+    def handle(self, *args, **options):
+        cities = list(options["cities"])
+        if options["file"]:
+            with open(options["file"], encoding="utf-8") as fh:
+                cities += [line.strip() for line in fh if line.strip()]
+        if not cities:
+            raise CommandError("Indica al menos una ciudad o --file.")
+
+        topics = options["topic"] or TOPICS
+        done = failed = 0
+        for city in cities:
+            for topic in topics:
+                try:
+                    description = get_description(city, topic, refresh=options["refresh"])
+                except MissingAPIKey:
+                    raise CommandError("OPENAI_API_KEY no está configurada.")
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{city} / {topic}: {exc}")
+                    continue
+                done += 1
+                self.stdout.write(f"{city} / {topic}: {description}")
+
+        self.stdout.write(self.style.SUCCESS(f"{done} descripciones en caché, {failed} errores."))
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('precision', models.PositiveSmallIntegerField()),
+                ('lat_key', models.IntegerField()),
+                ('lng_key', models.IntegerField()),
+                ('city_name', models.CharField(max_length=255)),
+                ('formatted_address', models.CharField(blank=True, max_length=512)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Geocode cache entry',
+                'verbose_name_plural': 'Geocode cache entries',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='geocodecacheentry',
+            constraint=models.UniqueConstraint(fields=('precision', 'lat_key', 'lng_key'), name='geocode_cache_cell_uniq'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DescriptionCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city_key', models.CharField(max_length=255)),
+                ('topic', models.CharField(max_length=50)),
+                ('description', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Description cache entry',
+                'verbose_name_plural': 'Description cache entries',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='descriptioncacheentry',
+            constraint=models.UniqueConstraint(fields=('city_key', 'topic'), name='description_cache_uniq'),
+        ),
+    ]
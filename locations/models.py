@@ -1,3 +1,51 @@
 from django.db import models
 
-# Create your models here.
+
+class GeocodeCacheEntry(models.Model):
+    """
+    Resultado de geocodificación inversa guardado por celda de la rejilla.
+
+    ``lat_key``/``lng_key`` son las coordenadas multiplicadas por
+    10**precision y redondeadas, de modo que todos los puntos de una misma
+    celda comparten entrada.
+    """
+
+    precision = models.PositiveSmallIntegerField()
+    lat_key = models.IntegerField()
+    lng_key = models.IntegerField()
+    city_name = models.CharField(max_length=255)
+    formatted_address = models.CharField(max_length=512, blank=True)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Geocode cache entry"
+        verbose_name_plural = "Geocode cache entries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["precision", "lat_key", "lng_key"], name="geocode_cache_cell_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.lat_key},{self.lng_key} -> {self.city_name}"
+
+
+class DescriptionCacheEntry(models.Model):
+    """Descripción generada por OpenAI para una ciudad (normalizada) y un tema."""
+
+    city_key = models.CharField(max_length=255)
+    topic = models.CharField(max_length=50)
+    description = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Description cache entry"
+        verbose_name_plural = "Description cache entries"
+        constraints = [
+            models.UniqueConstraint(fields=["city_key", "topic"], name="description_cache_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.city_key} / {self.topic}"
@@ -0,0 +1,148 @@
+"""
+Compara el rendimiento de la geocodificación síncrona y asíncrona contra un
+servidor local que imita a Google con una latencia fija.
+
+    python manage.py runscript bench_async --script-args requests=500 latency=0.2 workers=4
+
+``workers`` son los hilos síncronos (lo que puede atender un worker
+gunicorn con hilos); la versión async usa un solo event loop con hasta
+``concurrency`` llamadas en vuelo.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from locations import geocoding
+
+GOOGLE_RESPONSE = json.dumps({
+    "status": "OK",
+    "results": [{
+        "formatted_address": "Calle Mayor, Madrid, España",
+        "address_components": [{"long_name": "Madrid", "types": ["locality"]}],
+    }],
+}).encode()
+
+
+class MockUpstream:
+    """
+    Servidor HTTP/1.1 keep-alive mínimo sobre asyncio, en su propio hilo.
+    Responde siempre lo mismo tras ``latency`` segundos sin bloquear, de modo
+    que no limita la concurrencia que se está midiendo.
+    """
+
+    def __init__(self, latency, body=GOOGLE_RESPONSE):
+        self.latency = latency
+        self.response = (
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+        ready = threading.Event()
+        threading.Thread(target=self._serve, args=(ready,), daemon=True).start()
+        ready.wait()
+
+    def _serve(self, ready):
+        asyncio.set_event_loop(self.loop)
+        server = self.loop.run_until_complete(
+            asyncio.start_server(self._handle, "127.0.0.1", 0, backlog=4096)
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        ready.set()
+        self.loop.run_forever()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                headers = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in headers.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(self.latency)
+                writer.write(self.response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def shutdown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def _serve_forever(latency, queue, body):
+    server = MockUpstream(latency, body)
+    queue.put(server.port)
+    threading.Event().wait()
+
+
+def start_mock_process(latency, body=GOOGLE_RESPONSE):
+    """
+    Lanza MockUpstream en otro proceso para que no compita por el GIL con el
+    cliente que se mide. Devuelve ``(proceso, puerto)``.
+    """
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve_forever, args=(latency, queue, body), daemon=True)
+    process.start()
+    return process, queue.get(timeout=10)
+
+
+def bench_sync(total, workers):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda i: geocoding.reverse_geocode(40.0, -3.0, "bench"), range(total)))
+    return time.perf_counter() - start
+
+
+async def bench_async(total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await geocoding.reverse_geocode_async(40.0, -3.0, "bench")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    await geocoding.async_client.aclose()
+    return elapsed
+
+
+def run(*args):
+    options = {"requests": "200", "latency": "0.1", "workers": "4", "concurrency": "50"}
+    options.update(arg.split("=", 1) for arg in args)
+    total = int(options["requests"])
+    latency = float(options["latency"])
+    workers = int(options["workers"])
+    concurrency = int(options["concurrency"])
+
+    process, port = start_mock_process(latency)
+    settings.GOOGLE_GEOCODING_URL = f"http://127.0.0.1:{port}/geocode"
+    geocoding.client.pool_size = max(workers, geocoding.client.pool_size)
+    geocoding.async_client.pool_size = max(concurrency, geocoding.async_client.pool_size)
+
+    try:
+        sync_seconds = bench_sync(total, workers)
+        async_seconds = asyncio.run(bench_async(total, concurrency))
+    finally:
+        process.terminate()
+
+    result = {
+        "requests": total,
+        "upstream_latency_s": latency,
+        "sync": {"threads": workers, "seconds": round(sync_seconds, 3),
+                 "req_per_s": round(total / sync_seconds, 1)},
+        "async": {"concurrency": concurrency, "seconds": round(async_seconds, 3),
+                  "req_per_s": round(total / async_seconds, 1)},
+    }
+    print(json.dumps(result, indent=2))
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 
 
@@ -6,13 +7,24 @@ class LocationRequestSerializer(serializers.Serializer):
     longitude = serializers.FloatField(required=True)
 
 
+class BatchLocationRequestSerializer(serializers.Serializer):
+    points = LocationRequestSerializer(many=True, allow_empty=False)
+
+    def validate_points(self, value):
+        max_points = settings.GEOCODE_BATCH_MAX_POINTS
+        if len(value) > max_points:
+            raise serializers.ValidationError(f"Máximo {max_points} puntos por petición.")
+        return value
+
+
 class LocationResponseSerializer(serializers.Serializer):
     city_name = serializers.CharField()
     formatted_address = serializers.CharField(required=False)
 
 
 class GenerateDescriptionRequestSerializer(serializers.Serializer):
-    city_name = serializers.CharField(required=True)
+    # Mismo límite que DescriptionCacheEntry.city_key: se rechaza antes de llamar a OpenAI
+    city_name = serializers.CharField(required=True, max_length=255)
     topic = serializers.ChoiceField(
         choices=["Historia", "Geografía", "Economía"], required=True
     )
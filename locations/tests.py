@@ -1,3 +1,478 @@
-from django.test import TestCase
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connections
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import set_user_claims
+from accounts.models import User
+
+from . import cache as geocode_cache
+from . import descriptions, geocoding, views
+from .http_client import AsyncOutboundClient, OutboundClient
+from .models import DescriptionCacheEntry, GeocodeCacheEntry
+from .upstream import google_geocoding, openai_api, openai_tokens, requests_total
+
+GOOGLE_OK = {
+    "status": "OK",
+    "results": [
+        {
+            "formatted_address": "Sevilla, España",
+            "address_components": [{"long_name": "Sevilla", "types": ["locality"]}],
+        }
+    ],
+}
+OPENAI_OK = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "Sevilla, ciudad del sol"},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 30, "completion_tokens": 8, "total_tokens": 38},
+}
+
+
+class StubUpstream:
+    """
+    Servidor HTTP local que responde ``status``/``body`` tras ``delay``
+    segundos. ``body`` puede ser una función que recibe la ruta pedida.
+    """
+
+    def __init__(self, status=200, body=None, delay=0):
+        self.status, self.body, self.delay = status, body or {}, delay
+        self.hits = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self):
+                stub.hits += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                time.sleep(stub.delay)
+                body = stub.body(self.path) if callable(stub.body) else stub.body
+                payload = json.dumps(body).encode()
+                try:
+                    self.send_response(stub.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # el cliente ya cortó por timeout
+
+            do_GET = do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(UPSTREAM_BREAKER_FAILURES=3, UPSTREAM_BREAKER_RESET=60)
+class UpstreamTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user(email="u@example.com", password="x"))
+        google_geocoding.breaker.reset()
+        openai_api.breaker.reset()
+        # Sin reintentos ni conexiones reutilizadas de otros tests
+        patcher = mock.patch.object(geocoding, "client", OutboundClient(retries=0, timeout=0.5))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(geocoding.client.close)
+
+    def stub(self, **kwargs):
+        stub = StubUpstream(**kwargs)
+        self.addCleanup(stub.close)
+        return stub
+
+    def city_name(self, stub, latitude):
+        with override_settings(GOOGLE_GEOCODING_URL=stub.url), mock.patch.dict(
+            os.environ, {"GOOGLE_GEOCODING_API_KEY": "test"}
+        ):
+            return self.client.post(
+                reverse("get-city-name"), {"latitude": latitude, "longitude": -5.98}, format="json"
+            )
+
+    def test_google_success_is_counted(self):
+        stub = self.stub(body=GOOGLE_OK)
+        before = requests_total.value("google_geocoding", "2xx")
+        response = self.city_name(stub, 37.101)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["city_name"], "Sevilla")
+        self.assertEqual(requests_total.value("google_geocoding", "2xx"), before + 1)
+
+    def test_circuit_opens_after_repeated_failures(self):
+        stub = self.stub(status=503)
+        before = requests_total.value("google_geocoding", "5xx")
+        for i in range(3):
+            self.assertEqual(self.city_name(stub, 37.2 + i / 100).status_code, 500)
+        self.assertEqual(requests_total.value("google_geocoding", "5xx"), before + 3)
+
+        response = self.city_name(stub, 37.3)
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(stub.hits, 3)
+
+    def test_google_errors_with_http_200(self):
+        stub = self.stub(body={"status": "OVER_QUERY_LIMIT", "error_message": "Cuota agotada"})
+        before = requests_total.value("google_geocoding", "over_query_limit")
+        for i in range(3):
+            response = self.city_name(stub, 37.5 + i / 100)
+            self.assertEqual(response.status_code, 500)
+            self.assertIn("OVER_QUERY_LIMIT", response.data["error"])
+        self.assertEqual(requests_total.value("google_geocoding", "over_query_limit"), before + 3)
+        self.assertEqual(self.city_name(stub, 37.6).status_code, 503)
+        self.assertEqual(stub.hits, 3)
+
+    def test_request_denied_does_not_open_circuit(self):
+        stub = self.stub(body={"status": "REQUEST_DENIED"})
+        for i in range(4):
+            self.assertEqual(self.city_name(stub, 37.7 + i / 100).status_code, 500)
+        self.assertEqual(stub.hits, 4)
+
+        stub = self.stub(body={"status": "ZERO_RESULTS", "results": []})
+        before = requests_total.value("google_geocoding", "2xx")
+        self.assertEqual(self.city_name(stub, 37.8).status_code, 404)
+        self.assertEqual(requests_total.value("google_geocoding", "2xx"), before + 1)
+
+    def test_timeout(self):
+        stub = self.stub(body=GOOGLE_OK, delay=1)
+        before = requests_total.value("google_geocoding", "timeout")
+        self.assertEqual(self.city_name(stub, 37.401).status_code, 504)
+        self.assertEqual(requests_total.value("google_geocoding", "timeout"), before + 1)
+
+    def test_openai_token_usage(self):
+        stub = self.stub(body=OPENAI_OK)
+        before = openai_tokens.value("gpt-4o-mini", "completion")
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "OPENAI_BASE_URL": stub.url}):
+            descriptions._client = None
+            self.addCleanup(setattr, descriptions, "_client", None)
+            response = self.client.post(
+                reverse("generate-description"),
+                {"city_name": "Sevilla", "topic": "Historia"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["description"], "Sevilla, ciudad del sol")
+        self.assertEqual(openai_tokens.value("gpt-4o-mini", "completion"), before + 8)
+        self.assertGreater(requests_total.value("openai", "2xx"), 0)
+
+
+@override_settings(GEOCODE_CACHE_TOUCH_BATCH=1000, GEOCODE_CACHE_TOUCH_SECONDS=3600)
+class GeocodeCacheTests(APITestCase):
+    def setUp(self):
+        geocode_cache.clear_l1()
+        geocode_cache.flush_touches()
+        self.addCleanup(geocode_cache.clear_l1)
+
+    def test_hits_are_batched(self):
+        geocode_cache.store(36.5001, -6.2801, {"city_name": "Cádiz"})
+        entry = GeocodeCacheEntry.objects.get()
+        geocode_cache.clear_l1()
+
+        with self.assertNumQueries(1):  # solo el SELECT de L2
+            self.assertEqual(geocode_cache.lookup(36.5002, -6.2802)["city_name"], "Cádiz")
+        with self.assertNumQueries(0):  # L1
+            geocode_cache.lookup(36.5001, -6.2801)
+            geocode_cache.lookup_many([geocode_cache.quantize(36.5001, -6.2801)])
+
+        self.assertEqual(geocode_cache.flush_touches(), 1)
+        entry_after = GeocodeCacheEntry.objects.get()
+        self.assertEqual(entry_after.hits, 3)
+        self.assertGreater(entry_after.last_used_at, entry.last_used_at)
+
+    @override_settings(GEOCODE_CACHE_MAX_ENTRIES=2)
+    def test_eviction_keeps_keys_served_from_l1(self):
+        for i, city in enumerate(["Caliente", "Tibia", "Fría"]):
+            geocode_cache.store(40 + i, -3, {"city_name": city})
+        # "Caliente" es la más antigua en la tabla, pero se sirve desde L1
+        geocode_cache.lookup(40, -3)
+        geocode_cache.evict()
+        self.assertEqual(
+            set(GeocodeCacheEntry.objects.values_list("city_name", flat=True)), {"Caliente", "Fría"}
+        )
+
+    def test_view_serves_repeated_cell_from_cache(self):
+        self.client.force_authenticate(User.objects.create_user(email="c@example.com", password="x"))
+        stub = StubUpstream(body=GOOGLE_OK)
+        self.addCleanup(stub.close)
+        with override_settings(GOOGLE_GEOCODING_URL=stub.url), mock.patch.dict(
+            os.environ, {"GOOGLE_GEOCODING_API_KEY": "test"}
+        ):
+            for latitude in (37.5551, 37.5552):  # misma celda
+                response = self.client.post(
+                    reverse("get-city-name"), {"latitude": latitude, "longitude": -5.98}, format="json"
+                )
+                self.assertEqual(response.data["city_name"], "Sevilla")
+        self.assertEqual(stub.hits, 1)
+
+
+def google_by_latitude(path):
+    """Respuesta de Google con la latitud pedida como ciudad; sin resultados al sur de 0."""
+    latitude = parse_qs(urlsplit(path).query)["latlng"][0].split(",")[0]
+    if latitude.startswith("-"):
+        return {"status": "ZERO_RESULTS", "results": []}
+    return {
+        "status": "OK",
+        "results": [{"address_components": [{"long_name": latitude, "types": ["locality"]}]}],
+    }
+
+
+class BatchGeocodeTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user(email="u@example.com", password="x"))
+        geocode_cache.clear_l1()
+        self.addCleanup(geocode_cache.clear_l1)
+        google_geocoding.breaker.reset()
+        self.stub = StubUpstream(body=google_by_latitude)
+        self.addCleanup(self.stub.close)
+
+    def batch(self, *latitudes):
+        points = [{"latitude": latitude, "longitude": -5.98} for latitude in latitudes]
+        with override_settings(GOOGLE_GEOCODING_URL=self.stub.url), mock.patch.dict(
+            os.environ, {"GOOGLE_GEOCODING_API_KEY": "test"}
+        ):
+            return self.client.post(reverse("get-city-names"), {"points": points}, format="json")
+
+    def test_duplicates_and_order(self):
+        # 37.1001 y 37.1002 caen en la misma celda que 37.1
+        response = self.batch(37.1001, 38.2, 37.1002, 37.1001)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(r["latitude"], r["city_name"]) for r in response.data["results"]],
+            [(37.1001, "37.1"), (38.2, "38.2"), (37.1002, "37.1"), (37.1001, "37.1")],
+        )
+        self.assertEqual(self.stub.hits, 2)
+
+    def test_cached_cells_skip_google(self):
+        geocode_cache.store(37.3, -5.98, {"city_name": "En caché"})
+        response = self.batch(37.3, 38.3)
+        self.assertEqual([r["city_name"] for r in response.data["results"]], ["En caché", "38.3"])
+        self.assertEqual(self.stub.hits, 1)
+
+        geocode_cache.clear_l1()  # ahora las dos salen de la tabla
+        self.batch(38.3, 37.3)
+        self.assertEqual(self.stub.hits, 1)
+
+    def test_point_errors_do_not_fail_the_batch(self):
+        response = self.batch(37.4, -10.5)
+        self.assertEqual(response.status_code, 200)
+        ok, failed = response.data["results"]
+        self.assertEqual(ok["city_name"], "37.4")
+        self.assertEqual(
+            failed,
+            {"latitude": -10.5, "longitude": -5.98, "error": "No se pudo obtener la ubicación"},
+        )
+
+    @override_settings(GEOCODE_BATCH_MAX_POINTS=2)
+    def test_max_points(self):
+        response = self.batch(37.5, 37.6, 37.7)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("points", response.data)
+        self.assertEqual(self.batch().status_code, 400)
+        self.assertEqual(self.stub.hits, 0)
+
+
+class DescriptionMixin:
+    """OpenAI sustituido por un StubUpstream y el cliente compartido recreado."""
+
+    def setUp(self):
+        super().setUp()
+        openai_api.breaker.reset()
+        self.stub = StubUpstream(body=OPENAI_OK, delay=getattr(self, "upstream_delay", 0))
+        self.addCleanup(self.stub.close)
+        env = mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "OPENAI_BASE_URL": self.stub.url})
+        env.start()
+        self.addCleanup(env.stop)
+        descriptions._client = None
+        self.addCleanup(setattr, descriptions, "_client", None)
+
+    def describe(self, city_name, topic="Historia"):
+        return self.client.post(
+            reverse("generate-description"), {"city_name": city_name, "topic": topic}, format="json"
+        )
+
+
+class DescriptionCacheTests(DescriptionMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(User.objects.create_user(email="d@example.com", password="x"))
+
+    def test_cache_hit_skips_openai(self):
+        self.assertEqual(self.describe("Sevilla").data["description"], "Sevilla, ciudad del sol")
+        with self.assertNumQueries(1):  # SELECT de la caché
+            response = self.describe("  SEVILLA ")
+        self.assertEqual(response.data["description"], "Sevilla, ciudad del sol")
+        self.assertEqual(self.stub.hits, 1)
+
+        self.describe("Sevilla", "Economía")  # otro tema, otra entrada
+        self.assertEqual(self.stub.hits, 2)
+
+    @override_settings(DESCRIPTION_CACHE_TTL=60)
+    def test_expired_entry_is_regenerated(self):
+        self.describe("Sevilla")
+        DescriptionCacheEntry.objects.update(created_at=timezone.now() - timedelta(seconds=61))
+        self.assertEqual(self.describe("Sevilla").status_code, 200)
+        self.assertEqual(self.stub.hits, 2)
+        self.assertEqual(DescriptionCacheEntry.objects.count(), 1)
+
+    def test_city_name_too_long(self):
+        response = self.describe("x" * 256)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("city_name", response.data)
+        self.assertEqual(self.stub.hits, 0)
+
+    def test_store_failure_still_returns_description(self):
+        with mock.patch.object(
+            DescriptionCacheEntry.objects, "update_or_create", side_effect=DatabaseError("sin sitio")
+        ):
+            response = self.describe("Sevilla")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["description"], "Sevilla, ciudad del sol")
+        self.assertFalse(DescriptionCacheEntry.objects.exists())
+
+    def test_prewarm_command(self):
+        out = StringIO()
+        call_command("prewarm_descriptions", "Sevilla", "Cádiz", "--topic", "Historia", stdout=out)
+        self.assertIn("2 descripciones en caché, 0 errores.", out.getvalue())
+        self.assertEqual(self.stub.hits, 2)
+
+        call_command("prewarm_descriptions", "sevilla", "--topic", "Historia", stdout=StringIO())
+        self.assertEqual(self.stub.hits, 2)
+        call_command("prewarm_descriptions", "Sevilla", "--topic", "Historia", "--refresh", stdout=StringIO())
+        self.assertEqual(self.stub.hits, 3)
+
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": ""}):
+            with self.assertRaises(CommandError):
+                call_command("prewarm_descriptions", "Sevilla", stdout=StringIO())
+
+
+class DescriptionSingleFlightTests(DescriptionMixin, APITransactionTestCase):
+    # Cada hilo usa su propia conexión: la entrada tiene que estar confirmada
+    upstream_delay = 0.3
+
+    def test_concurrent_requests_call_openai_once(self):
+        results = []
+
+        def worker():
+            try:
+                results.append(descriptions.get_description("Sevilla", "Historia"))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["Sevilla, ciudad del sol"] * 5)
+        self.assertEqual(self.stub.hits, 1)
+
+
+@override_settings(UPSTREAM_BREAKER_FAILURES=1, UPSTREAM_BREAKER_RESET=60, OPENAI_MAX_RETRIES=0)
+class AsyncViewTests(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(email="a@example.com", password="x")
+        self.headers = {"Authorization": f"Bearer {set_user_claims(AccessToken.for_user(user), user)}"}
+        geocode_cache.clear_l1()
+        self.addCleanup(geocode_cache.clear_l1)
+        google_geocoding.breaker.reset()
+        openai_api.breaker.reset()
+        patcher = mock.patch.object(geocoding, "async_client", AsyncOutboundClient(retries=0, timeout=0.5))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stub(self, **kwargs):
+        stub = StubUpstream(**kwargs)
+        self.addCleanup(stub.close)
+        return stub
+
+    async def post(self, name, data, stub=None, headers=None):
+        # Google y OpenAI responden desde el mismo stub
+        stub = stub or self.stub(status=500)
+        env = {"GOOGLE_GEOCODING_API_KEY": "test", "OPENAI_API_KEY": "test", "OPENAI_BASE_URL": stub.url}
+        with override_settings(GOOGLE_GEOCODING_URL=stub.url), mock.patch.dict(os.environ, env):
+            return await AsyncClient().post(
+                reverse(name), data, content_type="application/json",
+                headers=self.headers if headers is None else headers,
+            )
+
+    async def city_name(self, latitude, stub=None, **kwargs):
+        return await self.post(
+            "get-city-name-async", {"latitude": latitude, "longitude": -5.98}, stub, **kwargs
+        )
+
+    async def describe(self, city_name, stub=None, **kwargs):
+        return await self.post(
+            "generate-description-async", {"city_name": city_name, "topic": "Historia"}, stub, **kwargs
+        )
+
+    async def test_requires_authentication(self):
+        for response in (
+            await self.city_name(37.1, headers={}),
+            await self.describe("Sevilla", headers={}),
+            await self.describe("Sevilla", headers={"Authorization": "Bearer no-es-un-token"}),
+        ):
+            self.assertEqual(response.status_code, 401)
+
+    async def test_invalid_body(self):
+        response = await self.post("get-city-name-async", {"latitude": "norte"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {"latitude", "longitude"})
+        response = await self.describe("x" * 256)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("city_name", response.json())
+
+    async def test_cache_hit_skips_upstream(self):
+        await sync_to_async(geocode_cache.store)(37.2, -5.98, {"city_name": "En caché"})
+        await sync_to_async(descriptions._store)("sevilla", "Historia", "Descripción en caché")
+        stub = self.stub(status=500)
+
+        response = await self.city_name(37.2001, stub)
+        self.assertEqual(response.json(), {"city_name": "En caché"})
+        response = await self.describe(" Sevilla ", stub)
+        self.assertEqual(response.json(), {"description": "Descripción en caché"})
+        self.assertEqual(stub.hits, 0)
+
+    async def test_circuit_open(self):
+        stub = self.stub(status=503)
+        self.assertEqual((await self.city_name(37.3, stub)).status_code, 500)
+        self.assertEqual((await self.describe("Sevilla", stub)).status_code, 500)
+
+        for response in (await self.city_name(37.4, stub), await self.describe("Cádiz", stub)):
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response["Retry-After"], "60")
+        self.assertEqual(stub.hits, 2)
+
+    @override_settings(OPENAI_TIMEOUT=0.5)
+    async def test_timeout(self):
+        stub = self.stub(body=OPENAI_OK, delay=1)
+        self.assertEqual((await self.city_name(37.5, stub)).status_code, 504)
+        response = await self.describe("Sevilla", stub)
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(response.json(), {"error": views.OPENAI_TIMEOUT_MESSAGE})
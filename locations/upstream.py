@@ -0,0 +1,178 @@
+"""
+Métricas y circuit breaker de las llamadas a Google Geocoding y OpenAI.
+
+Cada llamada deja su latencia (``upstream_request_duration_seconds``) y su
+resultado (``upstream_requests_total``: clase de estado HTTP, ``timeout``,
+``connection``, ``error`` o ``circuit_open``) en config.metrics, que se
+publican en /api/metrics/. De OpenAI se suman además los tokens de cada
+respuesta (``openai_tokens_total``).
+
+Circuit breaker: tras UPSTREAM_BREAKER_FAILURES fallos seguidos (timeouts,
+errores de conexión, 429, 5xx o los errores que Google da con un 200, ver
+``locations.geocoding``) el servicio se da por caído y durante
+UPSTREAM_BREAKER_RESET segundos las llamadas fallan al instante con
+CircuitOpen, sin tener un worker esperando. Pasado ese tiempo pasa una
+llamada de prueba: si va bien se cierra y, si no, se vuelve a abrir. El
+estado es de cada proceso.
+"""
+
+import threading
+import time
+
+import httpx
+import openai
+import requests
+from django.conf import settings
+from urllib3.exceptions import TimeoutError as Urllib3TimeoutError
+
+from config import metrics
+
+CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+
+request_duration = metrics.Histogram(
+    "upstream_request_duration_seconds",
+    "Duración de las llamadas a servicios externos (con reintentos).",
+    ("upstream",),
+    buckets=(*metrics.DURATION_BUCKETS, 30, 60),
+)
+requests_total = metrics.Counter(
+    "upstream_requests_total", "Llamadas a servicios externos por resultado.", ("upstream", "outcome")
+)
+circuit_state = metrics.Gauge(
+    "upstream_circuit_state", "Circuit breaker: 0 cerrado, 1 abierto, 2 en prueba.", ("upstream",)
+)
+openai_tokens = metrics.Counter(
+    "openai_tokens_total", "Tokens consumidos en OpenAI.", ("model", "type")
+)
+
+
+class CircuitOpen(Exception):
+    """El servicio externo se da por caído: no se llega a llamar."""
+
+    def __init__(self, upstream, retry_after):
+        super().__init__(f"{upstream} no disponible temporalmente")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+def _is_timeout(exc):
+    if isinstance(exc, (requests.Timeout, httpx.TimeoutException, openai.APITimeoutError)):
+        return True
+    # requests convierte un timeout de lectura tras agotar los reintentos en
+    # ConnectionError(MaxRetryError(reason=ReadTimeoutError))
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, Urllib3TimeoutError)
+
+
+def status_outcome(status_code):
+    """(resultado, cuenta como fallo del servicio) de una respuesta HTTP."""
+    if status_code == 429:
+        return "429", True
+    return f"{status_code // 100}xx", status_code >= 500
+
+
+def exception_outcome(exc):
+    if _is_timeout(exc):
+        return "timeout", True
+    if isinstance(exc, (requests.ConnectionError, httpx.TransportError, openai.APIConnectionError)):
+        return "connection", True
+    if isinstance(exc, openai.APIStatusError):
+        return status_outcome(exc.status_code)
+    # Errores nuestros (parseo, programación): no dicen nada del servicio
+    return "error", False
+
+
+class CircuitBreaker:
+    def __init__(self, name):
+        self.name = name
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+        circuit_state.set(CLOSED, name)
+
+    def before_call(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == OPEN and elapsed >= settings.UPSTREAM_BREAKER_RESET:
+                # Esta llamada es la prueba; las demás siguen fallando hasta que termine
+                self._set_state(HALF_OPEN)
+                return
+            retry_after = max(settings.UPSTREAM_BREAKER_RESET - elapsed, 1)
+        requests_total.inc(self.name, "circuit_open")
+        raise CircuitOpen(self.name, retry_after)
+
+    def record(self, failed):
+        with self._lock:
+            if not failed:
+                self.failures = 0
+                if self.state != CLOSED:
+                    self._set_state(CLOSED)
+            else:
+                self.failures += 1
+                if self.state == HALF_OPEN or self.failures >= settings.UPSTREAM_BREAKER_FAILURES:
+                    self.opened_at = time.monotonic()
+                    self._set_state(OPEN)
+
+    def reset(self):
+        with self._lock:
+            self.failures = 0
+            self._set_state(CLOSED)
+
+    def _set_state(self, state):
+        self.state = state
+        circuit_state.set(state, self.name)
+
+
+class _Call:
+    """
+    Bloque ``with`` de una llamada. Quien llama apunta ``status`` de la
+    respuesta y, si el cuerpo dice otra cosa que el estado HTTP,
+    ``outcome``: (resultado, cuenta como fallo del servicio).
+    """
+
+    def __init__(self, upstream):
+        self.upstream = upstream
+        self.status = None
+        self.outcome = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        request_duration.observe(time.perf_counter() - self.start, self.upstream.name)
+        if exc is not None:
+            outcome, failed = exception_outcome(exc)
+        elif self.outcome is not None:
+            outcome, failed = self.outcome
+        elif self.status is not None:
+            outcome, failed = status_outcome(self.status)
+        else:
+            outcome, failed = "2xx", False
+        requests_total.inc(self.upstream.name, outcome)
+        self.upstream.breaker.record(failed)
+        return False
+
+
+class Upstream:
+    def __init__(self, name):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+
+    def call(self):
+        """Comprueba el circuit breaker (CircuitOpen) y mide el bloque."""
+        self.breaker.before_call()
+        return _Call(self)
+
+
+def record_openai_usage(model, usage):
+    if usage is not None:
+        openai_tokens.inc(model, "prompt", amount=usage.prompt_tokens or 0)
+        openai_tokens.inc(model, "completion", amount=usage.completion_tokens or 0)
+
+
+google_geocoding = Upstream("google_geocoding")
+openai_api = Upstream("openai")
@@ -1,7 +1,28 @@
+from django.conf import settings
 from django.urls import path
-from .views import GetCityNameView, GenerateDescriptionView
+from .views import (
+    BatchGetCityNameView,
+    GenerateDescriptionView,
+    GeocodeCacheStatsView,
+    GetCityNameView,
+)
+from .async_views import AsyncGetCityNameView, AsyncGenerateDescriptionView
+
+# Con LOCATIONS_ASYNC_VIEWS (despliegue ASGI) las rutas principales usan las vistas async
+if settings.LOCATIONS_ASYNC_VIEWS:
+    city_name_view, description_view = AsyncGetCityNameView, AsyncGenerateDescriptionView
+else:
+    city_name_view, description_view = GetCityNameView, GenerateDescriptionView
 
 urlpatterns = [
-    path("get-city-name/", GetCityNameView.as_view(), name="get-city-name"),
-    path("generate-description/", GenerateDescriptionView.as_view(), name="generate-description"),
+    path("get-city-name/", city_name_view.as_view(), name="get-city-name"),
+    path("get-city-names/", BatchGetCityNameView.as_view(), name="get-city-names"),
+    path("get-city-name/cache-stats/", GeocodeCacheStatsView.as_view(), name="geocode-cache-stats"),
+    path("generate-description/", description_view.as_view(), name="generate-description"),
+    path("async/get-city-name/", AsyncGetCityNameView.as_view(), name="get-city-name-async"),
+    path(
+        "async/generate-description/",
+        AsyncGenerateDescriptionView.as_view(),
+        name="generate-description-async",
+    ),
 ]
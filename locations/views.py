@@ -1,12 +1,22 @@
+import math
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
 from django.conf import settings
 from rest_framework import views, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from openai import OpenAI
+
+from accounts.permissions import IsAdmin
+from . import cache as geocode_cache
+from .geocoding import GeocodingError, GeocodingTimeout, LocationNotFound, reverse_geocode
+from .geocoding import client as geocoding_client
+from .descriptions import MissingAPIKey, get_description
+from .upstream import CircuitOpen
 
 from .serializers import (
+    BatchLocationRequestSerializer,
     LocationRequestSerializer,
     LocationResponseSerializer,
     GenerateDescriptionRequestSerializer,
@@ -14,6 +24,46 @@ from .serializers import (
 )
 
 
+def openai_error_payload(exc):
+    """Traduce un error de OpenAI a un mensaje comprensible para el usuario."""
+    error_message = str(exc)
+    error_str_lower = error_message.lower()
+
+    # Manejar errores específicos de OpenAI
+    if "insufficient_quota" in error_str_lower or "429" in error_message:
+        error_message = (
+            "Tu cuenta de OpenAI ha excedido la cuota disponible o tiene problemas de facturación. "
+            "Por favor, verifica tu plan y método de pago en https://platform.openai.com/account/billing"
+        )
+    elif "invalid api key" in error_str_lower or "401" in error_message or "authentication" in error_str_lower:
+        error_message = (
+            "La API key de OpenAI no es válida o ha sido revocada. "
+            "Verifica que la clave en el archivo .env coincida con la de tu dashboard: "
+            "https://platform.openai.com/api-keys"
+        )
+
+    response_data = {"error": error_message}
+    if settings.DEBUG:
+        response_data["raw_error"] = str(exc)
+    return response_data
+
+
+UPSTREAM_UNAVAILABLE = {
+    "google_geocoding": "El servicio de geolocalización no está disponible. Inténtalo más tarde.",
+    "openai": "El servicio de descripciones no está disponible. Inténtalo más tarde.",
+}
+OPENAI_TIMEOUT_MESSAGE = "OpenAI no respondió a tiempo."
+
+
+def circuit_open_response(exc):
+    """Cuerpo, estado (503) y cabeceras para un CircuitOpen."""
+    return (
+        {"error": UPSTREAM_UNAVAILABLE[exc.upstream]},
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        {"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
 class GetCityNameView(views.APIView):
     permission_classes = [IsAuthenticated]
 
@@ -24,6 +74,12 @@ class GetCityNameView(views.APIView):
 
         latitude = serializer.validated_data["latitude"]
         longitude = serializer.validated_data["longitude"]
+
+        # Coordenadas de la misma celda ya resueltas: sin llamada externa
+        cached = geocode_cache.lookup(latitude, longitude)
+        if cached is not None:
+            return Response(LocationResponseSerializer(cached).data, status=status.HTTP_200_OK)
+
         google_api_key = os.getenv("GOOGLE_GEOCODING_API_KEY")
 
         if not google_api_key:
@@ -33,44 +89,30 @@ class GetCityNameView(views.APIView):
             )
 
         try:
-            # Llamar a Google Geocoding API
-            url = "https://maps.googleapis.com/maps/api/geocode/json"
-            params = {
-                "latlng": f"{latitude},{longitude}",
-                "key": google_api_key,
-                "language": "es",
-            }
-
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            if data["status"] != "OK" or not data.get("results"):
-                return Response(
-                    {"error": "No se pudo obtener la ubicación"},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
-
-            # Extraer el nombre de la ciudad/población
-            result = data["results"][0]
-            formatted_address = result.get("formatted_address", "")
-            city_name = formatted_address
-
-            # Intentar obtener el nombre de la ciudad desde los componentes
-            for component in result.get("address_components", []):
-                types = component.get("types", [])
-                if "locality" in types:
-                    city_name = component.get("long_name", city_name)
-                    break
-                elif "administrative_area_level_2" in types and city_name == formatted_address:
-                    city_name = component.get("long_name", city_name)
-
-            response_serializer = LocationResponseSerializer(
-                {"city_name": city_name, "formatted_address": formatted_address}
+            # Llamar a Google Geocoding API con el centro de la celda
+            cell_lat, cell_lng = geocode_cache.cell_center(
+                geocode_cache.quantize(latitude, longitude)
             )
+            result = reverse_geocode(cell_lat, cell_lng, google_api_key)
+            geocode_cache.store(latitude, longitude, result)
+
+            response_serializer = LocationResponseSerializer(result)
             return Response(response_serializer.data, status=status.HTTP_200_OK)
 
-        except requests.RequestException as e:
+        except LocationNotFound:
+            return Response(
+                {"error": "No se pudo obtener la ubicación"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        except CircuitOpen as e:
+            data, code, headers = circuit_open_response(e)
+            return Response(data, status=code, headers=headers)
+        except GeocodingTimeout as e:
+            return Response(
+                {"error": f"Google API no respondió a tiempo: {str(e)}"},
+                status=status.HTTP_504_GATEWAY_TIMEOUT,
+            )
+        except GeocodingError as e:
             return Response(
                 {"error": f"Error al conectar con Google API: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -82,6 +124,80 @@ class GetCityNameView(views.APIView):
             )
 
 
+class BatchGetCityNameView(views.APIView):
+    """
+    Geocodificación inversa de una lista de puntos (p. ej. una traza GPS).
+
+    Los puntos se agrupan por celda de la caché; las celdas que no están en
+    caché se piden a Google en paralelo (como mucho GEOCODE_BATCH_CONCURRENCY
+    a la vez). La respuesta mantiene el orden de entrada.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BatchLocationRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        points = serializer.validated_data["points"]
+        keys = [geocode_cache.quantize(p["latitude"], p["longitude"]) for p in points]
+        results = geocode_cache.lookup_many(set(keys))
+        missing = [key for key in dict.fromkeys(keys) if key not in results]
+
+        errors = {}
+        if missing:
+            google_api_key = os.getenv("GOOGLE_GEOCODING_API_KEY")
+            if not google_api_key:
+                return Response(
+                    {"error": "Google Geocoding API key not configured"},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+            def fetch(key):
+                try:
+                    return key, reverse_geocode(*geocode_cache.cell_center(key), google_api_key), None
+                except LocationNotFound:
+                    return key, None, "No se pudo obtener la ubicación"
+                except CircuitOpen as e:
+                    return key, None, UPSTREAM_UNAVAILABLE[e.upstream]
+                except GeocodingError as e:
+                    return key, None, f"Error al conectar con Google API: {str(e)}"
+
+            workers = min(settings.GEOCODE_BATCH_CONCURRENCY, len(missing))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                fetched = list(pool.map(fetch, missing))
+
+            # Las escrituras en BD se hacen aquí y no en los hilos del pool
+            for key, value, error in fetched:
+                if error:
+                    errors[key] = error
+                else:
+                    results[key] = value
+                    geocode_cache.store_key(key, value)
+
+        data = []
+        for point, key in zip(points, keys):
+            item = {"latitude": point["latitude"], "longitude": point["longitude"]}
+            if key in results:
+                item.update(LocationResponseSerializer(results[key]).data)
+            else:
+                item["error"] = errors[key]
+            data.append(item)
+        return Response({"results": data}, status=status.HTTP_200_OK)
+
+
+class GeocodeCacheStatsView(views.APIView):
+    """Contadores de la caché y del cliente de geocodificación (solo administradores)."""
+
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        data = geocode_cache.stats()
+        data["upstream"] = geocoding_client.stats()
+        return Response(data)
+
+
 class GenerateDescriptionView(views.APIView):
     permission_classes = [IsAuthenticated]
 
@@ -92,72 +208,30 @@ class GenerateDescriptionView(views.APIView):
 
         city_name = serializer.validated_data["city_name"]
         topic = serializer.validated_data["topic"]
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-
-        if not openai_api_key:
-            return Response(
-                {"error": "OpenAI API key not configured"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
 
         try:
-            # Inicializar cliente OpenAI con api_key como parámetro
-            client = OpenAI(api_key=openai_api_key)
-            
-            # Crear el prompt para OpenAI
-            prompt = f"Escribe una frase corta (máximo 40 caracteres) sobre {city_name} relacionada con {topic}. La frase debe ser informativa y concisa."
-
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Eres un asistente que genera descripciones breves y precisas sobre lugares.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=50,
-                temperature=0.7,
-            )
-
-            description = response.choices[0].message.content.strip()
-
-            # Asegurar que no supere los 40 caracteres
-            if len(description) > 40:
-                description = description[:37] + "..."
+            description = get_description(city_name, topic)
 
             response_serializer = GenerateDescriptionResponseSerializer(
                 {"description": description}
             )
             return Response(response_serializer.data, status=status.HTTP_200_OK)
 
+        except MissingAPIKey:
+            return Response(
+                {"error": "OpenAI API key not configured"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        except CircuitOpen as e:
+            data, code, headers = circuit_open_response(e)
+            return Response(data, status=code, headers=headers)
+        except openai.APITimeoutError:
+            return Response(
+                {"error": OPENAI_TIMEOUT_MESSAGE},
+                status=status.HTTP_504_GATEWAY_TIMEOUT,
+            )
         except Exception as e:
-            error_message = str(e)
-            error_str_lower = error_message.lower()
-            
-            # Manejar errores específicos de OpenAI
-            if "insufficient_quota" in error_str_lower or "429" in error_message:
-                error_message = (
-                    "Tu cuenta de OpenAI ha excedido la cuota disponible o tiene problemas de facturación. "
-                    "Por favor, verifica tu plan y método de pago en https://platform.openai.com/account/billing"
-                )
-            elif "invalid api key" in error_str_lower or "401" in error_message or "authentication" in error_str_lower:
-                error_message = (
-                    "La API key de OpenAI no es válida o ha sido revocada. "
-                    "Verifica que la clave en el archivo .env coincida con la de tu dashboard: "
-                    "https://platform.openai.com/api-keys"
-                )
-            elif "insufficient_quota" in error_str_lower:
-                error_message = (
-                    "Tu cuenta de OpenAI ha excedido la cuota disponible. "
-                    "Verifica tu plan y método de pago en https://platform.openai.com/account/billing"
-                )
-            
-            response_data = {"error": error_message}
-            if settings.DEBUG:
-                response_data["raw_error"] = str(e)
-            
             return Response(
-                response_data,
+                openai_error_payload(e),
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ProvidersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'providers'
+
+    def ready(self):
+        from config import response_cache
+        response_cache.track(self.get_model("Provider"))
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:52
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY no puede ir dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('providers', '0002_created_at_id_index'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='provider',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='provider_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='provider',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['email'], name='provider_email_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='provider',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['phone'], name='provider_phone_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='provider',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['notes'], name='provider_notes_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='provider',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', 'notes', config='spanish'), name='provider_fts'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.0.6 on 2026-10-18 18:10
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+BATCH_SIZE = 5000
+
+
+def assign_default_company(apps, schema_editor):
+    """Asigna los registros existentes a la empresa principal, por lotes"""
+    Provider = apps.get_model('providers', 'Provider')
+    Company = apps.get_model('companies', 'Company')
+
+    if not Provider.objects.filter(company__isnull=True).exists():
+        return
+    company = (
+        Company.objects.filter(is_primary=True).first()
+        or Company.objects.order_by('id').first()
+        or Company.objects.create(name="Empresa Principal", is_primary=True)
+    )
+
+    # Migración no atómica: cada lote se confirma por separado y no se
+    # bloquea la tabla entera durante todo el backfill
+    while True:
+        ids = list(
+            Provider.objects.filter(company__isnull=True)
+            .values_list('id', flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            break
+        Provider.objects.filter(id__in=ids).update(company=company)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('providers', '0003_search_indexes'),
+        ('companies', '0005_company_single_primary'),
+    ]
+
+    operations = [
+        # Paso 1: Agregar el campo como nullable
+        migrations.AddField(
+            model_name='provider',
+            name='company',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='providers', to='companies.company', verbose_name='Empresa'),
+        ),
+        # Paso 2: Asignar los registros existentes a la empresa principal
+        migrations.RunPython(assign_default_company, migrations.RunPython.noop),
+        # Paso 3: Hacer el campo no-nullable
+        migrations.AlterField(
+            model_name='provider',
+            name='company',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='providers', to='companies.company', verbose_name='Empresa'),
+        ),
+        AddIndexConcurrently(
+            model_name='provider',
+            index=models.Index(fields=['company', '-created_at', '-id'], name='provider_company_created_idx'),
+        ),
+    ]
@@ -1,6 +1,17 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
+from companies.models import Company
 
 class Provider(models.Model):
+    # Sin índice propio: lo cubre "provider_company_created_idx"
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.PROTECT,
+        related_name="providers",
+        verbose_name="Empresa",
+        db_index=False,
+    )
     name = models.CharField(max_length=150)
     email = models.EmailField(blank=True, null=True)
     phone = models.CharField(max_length=50, blank=True, null=True)
@@ -10,6 +21,17 @@ class Provider(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="provider_created_id_idx"),
+            models.Index(fields=["company", "-created_at", "-id"], name="provider_company_created_idx"),
+            # MAX(updated_at) + COUNT(*) de la ETag del listado, sin leer la tabla
+            models.Index(fields=["company", "updated_at"], name="provider_company_updated_idx"),
+            GinIndex(fields=["name"], name="provider_name_trgm", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["email"], name="provider_email_trgm", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["phone"], name="provider_phone_trgm", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["notes"], name="provider_notes_trgm", opclasses=["gin_trgm_ops"]),
+            GinIndex(SearchVector("name", "notes", config="spanish"), name="provider_fts"),
+        ]
 
     def __str__(self):
         return self.name
@@ -1,3 +1,195 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.db import connection
+from django.db.models import Count, Max
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from accounts.models import User
+from clients.tests import FAKE_REDIS_CACHES
+from companies.models import Company
+from config import response_cache
+
+from .models import Provider
+from .views import ProviderViewSet
+
+
+class CatalogTestCase(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Empresa A")
+        self.client.force_authenticate(
+            User.objects.create_user(email="u@example.com", password="x", codigo_empresa=self.company)
+        )
+
+
+class KeysetPaginationTests(CatalogTestCase):
+    def test_forward_and_backward_pages(self):
+        now = timezone.now()
+        for i in range(5):
+            obj = Provider.objects.create(company=self.company, name=f"Proveedor {i}")
+            # Pares con el mismo created_at: el desempate es el id
+            Provider.objects.filter(pk=obj.pk).update(created_at=now - timedelta(minutes=i // 2))
+        expected = list(
+            Provider.objects.filter(company=self.company)
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+
+        pages, url = [], reverse("providers-list") + "?page_size=2"
+        while url:
+            data = self.client.get(url).data
+            pages.append([row["id"] for row in data["results"]])
+            url = data["next"]
+        self.assertEqual([pk for page in pages for pk in page], expected)
+
+        back, url = [pages[-1]], data["previous"]
+        while url:
+            data = self.client.get(url).data
+            back.append([row["id"] for row in data["results"]])
+            url = data["previous"]
+        self.assertEqual(back, pages[::-1])
+
+
+class SearchTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ("Talleres ACME", "acme_norte", "Ferretería 100%"):
+            Provider.objects.create(company=self.company, name=name)
+
+    def search(self, term):
+        response = self.client.get(reverse("providers-list"), {"search": term})
+        self.assertEqual(response.status_code, 200)
+        return sorted(row["name"] for row in response.data["results"])
+
+    def test_contains_is_case_insensitive_and_escapes_wildcards(self):
+        self.assertEqual(self.search("Acme"), ["Talleres ACME", "acme_norte"])
+        self.assertEqual(self.search("e_n"), ["acme_norte"])
+        self.assertEqual(self.search("100%"), ["Ferretería 100%"])
+
+    @skipUnless(connection.vendor == "postgresql", "índices pg_trgm")
+    def test_contains_uses_trigram_index(self):
+        request = Request(APIRequestFactory().get("/", {"search": "acme"}))
+        queryset = ProviderViewSet.filter_backends[0]().filter_queryset(
+            request, Provider.objects.all(), ProviderViewSet()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_indexscan = off")
+        plan = queryset.explain()
+        self.assertIn("provider_name_trgm", plan)
+        self.assertNotIn("Seq Scan", plan)
+
+
+class ConditionalGetTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.obj = Provider.objects.create(company=self.company, name="Uno")
+
+    def test_list(self):
+        url = reverse("providers-list")
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(1):  # solo el agregado
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.obj.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail(self):
+        url = reverse("providers-detail", args=[self.obj.pk])
+        response = self.client.get(url)
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    @skipUnless(connection.vendor == "postgresql", "plan de PostgreSQL")
+    def test_list_etag_uses_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = (
+            Provider.objects.filter(company=self.company)
+            .values("company")
+            .annotate(last=Max("updated_at"), total=Count("pk"))
+            .explain()
+        )
+        self.assertIn("using provider_company_updated_idx", plan)
+
+
+@override_settings(API_RESPONSE_CACHE=True, CACHES=FAKE_REDIS_CACHES)
+class ResponseCacheTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        response_cache.get_cache().clear()
+        response_cache.clear_stats()
+        Provider.objects.create(company=self.company, name="Uno")
+        self.url = reverse("providers-list")
+
+    def names(self):
+        return [row["name"] for row in self.client.get(self.url).data["results"]]
+
+    def test_hit_skips_database(self):
+        self.assertEqual(self.names(), ["Uno"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ["Uno"])
+        self.assertEqual(response_cache.stats()["models"]["providers.provider"]["hits"], 1)
+
+    def test_version_bumps_on_commit(self):
+        before = response_cache.version(Provider)
+        self.names()
+        with self.captureOnCommitCallbacks(execute=True):
+            Provider.objects.create(company=self.company, name="Dos")
+        self.assertGreater(response_cache.version(Provider), before)
+        self.assertEqual(self.names(), ["Dos", "Uno"])
+
+
+class SparseFieldsTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.obj = Provider.objects.create(company=self.company, name="Uno", email="a@example.com")
+
+    def test_detail_reads_only_requested_columns(self):
+        url = reverse("providers-detail", args=[self.obj.pk])
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"fields": "name"})
+        self.assertEqual(response.data, {"name": "Uno"})
+
+    def test_list(self):
+        with self.assertNumQueries(2):  # ETag del listado + página
+            response = self.client.get(reverse("providers-list"), {"fields": "id,email"})
+        self.assertEqual(response.data["results"], [{"id": self.obj.id, "email": "a@example.com"}])
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse("providers-list"), {"fields": "name,nope"})
+        self.assertEqual(response.status_code, 400)
+
+
+class FastListParityTests(CatalogTestCase):
+    """El listado rápido devuelve los mismos bytes que ModelSerializer + JSONRenderer."""
+
+    def setUp(self):
+        super().setUp()
+        Provider.objects.create(
+            company=self.company, name="Ñandú “Ltd” ✓\u2028", email="ñ@example.com",
+            phone="+34 600", notes="línea\u2028otra\u2029fin",
+        )
+        # Sin email, teléfono ni notas: salen como null
+        Provider.objects.create(company=self.company, name="Otro")
+        Provider.objects.filter(name="Otro").update(
+            created_at=datetime(2024, 1, 15, 10, 30, 0, 123456, tzinfo=dt_timezone.utc)
+        )
+
+    def test_list_bytes(self):
+        url = reverse("providers-list")
+        for params in ({}, {"fields": "id,name,created_at"}, {"search": "Ñandú"}):
+            with self.subTest(params):
+                fast = self.client.get(url, params)
+                with mock.patch.object(ProviderViewSet, "fast_list", False), \
+                        mock.patch.object(ProviderViewSet, "renderer_classes", [JSONRenderer]):
+                    slow = self.client.get(url, params)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, slow.content)
+                self.assertIn(b'"results":[{', fast.content)
+                self.assertIn(b"\\u2028", fast.content)
@@ -1,8 +1,32 @@
 from rest_framework import viewsets, permissions
+from config.filters import TrigramSearchFilter
+from config.mixins import (
+    BulkMixin,
+    CompanyScopedMixin,
+    ConditionalGetMixin,
+    ExportMixin,
+    FastListMixin,
+    ReplicaReadMixin,
+    ResponseCacheMixin,
+    SparseFieldsMixin,
+)
 from .models import Provider
 from .serializers import ProviderSerializer
 
-class ProviderViewSet(viewsets.ModelViewSet):
+class ProviderViewSet(
+    ReplicaReadMixin,
+    CompanyScopedMixin,
+    SparseFieldsMixin,
+    ResponseCacheMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    BulkMixin,
+    ExportMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Provider.objects.all()
     serializer_class = ProviderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [TrigramSearchFilter]
+    search_fields = ["name", "email", "phone", "notes"]
+    search_fulltext_fields = ["name", "notes"]
@@ -4,9 +4,12 @@ from django.db.models.signals import post_migrate
 
 def create_initial_warehouse(sender, **kwargs):
     """Crea un registro inicial si la tabla está vacía"""
+    from companies.services import default_company
     from .models import Warehouse
     if Warehouse.objects.count() == 0:
-        Warehouse.objects.create(name="Mi Almacén")
+        company = default_company()
+        if company:
+            Warehouse.objects.create(name="Mi Almacén", company=company)
 
 
 class WarehousesConfig(AppConfig):
@@ -14,4 +17,6 @@ class WarehousesConfig(AppConfig):
     name = 'warehouses'
 
     def ready(self):
+        from config import response_cache
+        response_cache.track(self.get_model("Warehouse"))
         post_migrate.connect(create_initial_warehouse, sender=self)
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:36
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY: no bloquea las escrituras en tablas grandes,
+    # pero no puede ir dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('warehouses', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='warehouse',
+            index=models.Index(fields=['-created_at', '-id'], name='warehouse_created_id_idx'),
+        ),
+    ]
@@ -1,12 +1,27 @@
 from django.db import models
+from companies.models import Company
 
 class Warehouse(models.Model):
+    # Sin índice propio: lo cubre "warehouse_company_created_idx"
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.PROTECT,
+        related_name="warehouses",
+        verbose_name="Empresa",
+        db_index=False,
+    )
     name = models.CharField(max_length=150)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="warehouse_created_id_idx"),
+            models.Index(fields=["company", "-created_at", "-id"], name="warehouse_company_created_idx"),
+            # MAX(updated_at) + COUNT(*) de la ETag del listado, sin leer la tabla
+            models.Index(fields=["company", "updated_at"], name="warehouse_company_updated_idx"),
+        ]
         verbose_name = "Warehouse"
         verbose_name_plural = "Warehouses"
 
@@ -1,8 +1,26 @@
 from rest_framework import viewsets, permissions
+from config.mixins import (
+    BulkMixin,
+    CompanyScopedMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    ReplicaReadMixin,
+    ResponseCacheMixin,
+    SparseFieldsMixin,
+)
 from .models import Warehouse
 from .serializers import WarehouseSerializer
 
-class WarehouseViewSet(viewsets.ModelViewSet):
+class WarehouseViewSet(
+    ReplicaReadMixin,
+    CompanyScopedMixin,
+    SparseFieldsMixin,
+    ResponseCacheMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    BulkMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Warehouse.objects.all()
     serializer_class = WarehouseSerializer
     permission_classes = [permissions.IsAuthenticated]